@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Literal, Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing import Annotated, Literal, Optional, List, Dict, Any, Type, Union
 from enum import Enum
 
 
@@ -34,6 +34,9 @@ class ActionType(str, Enum):
     # Phase 4: Utility Actions
     WAIT_FOR_NAVIGATION = "waitForNavigation"
     SCROLL_UNTIL_FOUND = "scrollUntilFound"
+    
+    # Compound action: runs its steps in order as one action
+    SEQUENCE = "sequence"
 
 
 class SelectorStrategy(str, Enum):
@@ -43,6 +46,9 @@ class SelectorStrategy(str, Enum):
 
 
 class Action(BaseModel):
+    """Base action carrying every field the executors and extension read."""
+    model_config = ConfigDict(use_enum_values=True)
+    
     action: ActionType
     
     # Common fields
@@ -86,13 +92,177 @@ class Action(BaseModel):
     
     # Phase 4: Additional metadata
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict)
+
+
+# Typed actions: each narrows `action` to its tag. They inherit every Action
+# field with the same defaults, so they accept the same dicts as Action and
+# serialize to the same shape for the extension; only SequenceAction adds a
+# field of its own.
+
+class OpenUrlAction(Action):
+    action: Literal[ActionType.OPEN_URL]
+
+
+class TypeTextAction(Action):
+    action: Literal[ActionType.TYPE_TEXT]
+
+
+class ClickElementAction(Action):
+    action: Literal[ActionType.CLICK_ELEMENT]
+
+
+class ScrollPageAction(Action):
+    action: Literal[ActionType.SCROLL_PAGE]
+
+
+class ExtractContentAction(Action):
+    action: Literal[ActionType.EXTRACT_CONTENT]
+
+
+class KeyPressAction(Action):
+    action: Literal[ActionType.KEY_PRESS]
+
+
+class WaitForElementAction(Action):
+    action: Literal[ActionType.WAIT_FOR_ELEMENT]
+
+
+class HoverElementAction(Action):
+    action: Literal[ActionType.HOVER_ELEMENT]
+
+
+class FocusInputAction(Action):
+    action: Literal[ActionType.FOCUS_INPUT]
+
+
+class ScreenshotAction(Action):
+    action: Literal[ActionType.SCREENSHOT]
+
+
+class ExtractLinksAction(Action):
+    action: Literal[ActionType.EXTRACT_LINKS]
+
+
+class RetryAction(Action):
+    action: Literal[ActionType.RETRY_ACTION]
+
+
+class PlayVideoAction(Action):
+    action: Literal[ActionType.PLAY_VIDEO]
+
+
+class PauseVideoAction(Action):
+    action: Literal[ActionType.PAUSE_VIDEO]
+
+
+class OpenSettingsMenuAction(Action):
+    action: Literal[ActionType.OPEN_SETTINGS_MENU]
+
+
+class SetQualityAction(Action):
+    action: Literal[ActionType.SET_QUALITY]
+
+
+class CreatePlaylistAction(Action):
+    action: Literal[ActionType.CREATE_PLAYLIST]
+
+
+class AddToPlaylistAction(Action):
+    action: Literal[ActionType.ADD_TO_PLAYLIST]
+
+
+class SavePlaylistAction(Action):
+    action: Literal[ActionType.SAVE_PLAYLIST]
+
+
+class OpenPlaylistAction(Action):
+    action: Literal[ActionType.OPEN_PLAYLIST]
+
+
+class PlayPlaylistAction(Action):
+    action: Literal[ActionType.PLAY_PLAYLIST]
+
+
+class WaitForNavigationAction(Action):
+    action: Literal[ActionType.WAIT_FOR_NAVIGATION]
+
+
+class ScrollUntilFoundAction(Action):
+    action: Literal[ActionType.SCROLL_UNTIL_FOUND]
+
+
+class SequenceAction(Action):
+    action: Literal[ActionType.SEQUENCE]
+    steps: List[Dict[str, Any]]
+
+
+ACTION_MODELS: Dict[ActionType, Type[Action]] = {
+    ActionType.OPEN_URL: OpenUrlAction,
+    ActionType.TYPE_TEXT: TypeTextAction,
+    ActionType.CLICK_ELEMENT: ClickElementAction,
+    ActionType.SCROLL_PAGE: ScrollPageAction,
+    ActionType.EXTRACT_CONTENT: ExtractContentAction,
+    ActionType.KEY_PRESS: KeyPressAction,
+    ActionType.WAIT_FOR_ELEMENT: WaitForElementAction,
+    ActionType.HOVER_ELEMENT: HoverElementAction,
+    ActionType.FOCUS_INPUT: FocusInputAction,
+    ActionType.SCREENSHOT: ScreenshotAction,
+    ActionType.EXTRACT_LINKS: ExtractLinksAction,
+    ActionType.RETRY_ACTION: RetryAction,
+    ActionType.PLAY_VIDEO: PlayVideoAction,
+    ActionType.PAUSE_VIDEO: PauseVideoAction,
+    ActionType.OPEN_SETTINGS_MENU: OpenSettingsMenuAction,
+    ActionType.SET_QUALITY: SetQualityAction,
+    ActionType.CREATE_PLAYLIST: CreatePlaylistAction,
+    ActionType.ADD_TO_PLAYLIST: AddToPlaylistAction,
+    ActionType.SAVE_PLAYLIST: SavePlaylistAction,
+    ActionType.OPEN_PLAYLIST: OpenPlaylistAction,
+    ActionType.PLAY_PLAYLIST: PlayPlaylistAction,
+    ActionType.WAIT_FOR_NAVIGATION: WaitForNavigationAction,
+    ActionType.SCROLL_UNTIL_FOUND: ScrollUntilFoundAction,
+    ActionType.SEQUENCE: SequenceAction,
+}
+
+# Tagged union: validation dispatches straight to the model for `action`
+# instead of trying each member in turn
+AnyAction = Annotated[Union[tuple(ACTION_MODELS.values())], Field(discriminator="action")]
+
+
+# Built once at import: a TypeAdapter (and the JSON schema) rebuilds its
+# validator/serializer state on every instantiation.
+ACTION_JSON_SCHEMA = Action.model_json_schema()
+# Serializes any action; typed actions share the base fields
+ACTION_ADAPTER = TypeAdapter(Action)
+ACTIONS_ADAPTER = TypeAdapter(List[AnyAction])
+# Validates one action into its typed model, e.g. a sequence's steps
+ANY_ACTION_ADAPTER = TypeAdapter(AnyAction)
+
+
+# Field names each typed action accepts / requires, for construct_actions
+_KNOWN_FIELDS = {tag: frozenset(model.model_fields) for tag, model in ACTION_MODELS.items()}
+_REQUIRED_FIELDS = {
+    tag: frozenset(name for name, info in model.model_fields.items() if info.is_required())
+    for tag, model in ACTION_MODELS.items()
+}
+
+
+def construct_actions(raw_actions: List[Dict[str, Any]]) -> List[Action]:
+    """
+    Build typed actions from trusted planner output without validating values.
     
-    class Config:
-        use_enum_values = True
-        json_encoders = {
-            SelectorStrategy: lambda v: v.value,
-            ActionType: lambda v: v.value
-        }
+    Falls back to full validation if any dict has an unknown tag, an unknown
+    field or a missing required field, e.g. from a planner on an older schema.
+    """
+    actions = []
+    for raw in raw_actions:
+        tag = raw.get("action")
+        if tag not in ACTION_MODELS:
+            return ACTIONS_ADAPTER.validate_python(raw_actions)
+        keys = raw.keys()
+        if not (keys <= _KNOWN_FIELDS[tag] and _REQUIRED_FIELDS[tag] <= keys):
+            return ACTIONS_ADAPTER.validate_python(raw_actions)
+        actions.append(ACTION_MODELS[tag].model_construct(**raw))
+    return actions
 
 
 def create_action(
@@ -100,4 +270,33 @@ def create_action(
     **kwargs
 ) -> Action:
     """Helper to create actions with type hints and defaults"""
-    return Action(action=action_type, **kwargs)
+    return ACTION_MODELS[ActionType(action_type)](action=action_type, **kwargs)
+
+
+# Serialized defaults of the base fields, in field order, for create_action_dict
+_ACTION_DEFAULTS = Action.model_construct(action=ActionType.OPEN_URL).model_dump()
+
+
+def create_action_dict(
+    action_type: ActionType,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Build the dict create_action(...).dict() returns without building the model.
+    
+    For planner-built actions whose values are known to be valid; fields the
+    action doesn't have are dropped, as the model would ignore them.
+    """
+    tag = ActionType(action_type)
+    action = {**_ACTION_DEFAULTS, "action": tag.value, "metadata": {}}
+    known = _KNOWN_FIELDS[tag]
+    for name, value in kwargs.items():
+        if name in known:
+            action[name] = value
+    fallback_selectors = action["fallback_selectors"]
+    if fallback_selectors:
+        action["fallback_selectors"] = {
+            SelectorStrategy(strategy).value: selector
+            for strategy, selector in fallback_selectors.items()
+        }
+    return action
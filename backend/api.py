@@ -4,7 +4,9 @@ API Endpoints for AutoPilot AI
 Provides HTTP endpoints for interacting with the task executor.
 """
 from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import Dict, List, Optional
 import uuid
@@ -18,7 +20,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="AutoPilot AI API",
     description="API for executing and managing browser automation tasks",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Enable CORS
@@ -41,7 +44,7 @@ class CommandResponse(BaseModel):
     result: Optional[Dict] = None
     error: Optional[str] = None
 
-@app.post("/execute", response_model=CommandResponse)
+@app.post("/execute", responses={200: {"model": CommandResponse}})
 async def execute_command(request: CommandRequest):
     """
     Execute a natural language command.
@@ -64,7 +67,8 @@ async def execute_command(request: CommandRequest):
             "error": result.error
         }
         
-        return response_data
+        # Serialize directly; CommandResponse only documents the schema
+        return ORJSONResponse(jsonable_encoder(response_data))
         
     except Exception as e:
         logger.exception("Error executing command")
@@ -10,11 +10,16 @@ Key Features:
 """
 
 import os
+import json
 import logging
+from functools import lru_cache
+from time import perf_counter_ns
 from enum import Enum
 from typing import List, Dict, Any, Optional, Literal
 
-from fastapi import FastAPI, HTTPException, Depends, status
+import orjson
+from fastapi import FastAPI, HTTPException, Depends, Response, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
@@ -25,7 +30,8 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from llm_planner import plan_actions, autonomous_planner
+from llm_planner import plan_actions, autonomous_planner, observation_fingerprint
+from action_schema import Action, ACTION_ADAPTER, ACTION_JSON_SCHEMA
 
 # --- Configuration ---
 
@@ -40,6 +46,24 @@ class LLMProvider(str, Enum):
 DEFAULT_LLM_PROVIDER = LLMProvider.OPENAI
 DEFAULT_TIMEOUT_MS = 30000  # 30 seconds
 
+# Static planner prompt. It must stay byte-identical across requests so that
+# provider-side prompt caching can reuse it; per-request content (the command,
+# observations) always goes after it.
+PLANNER_SYSTEM_PROMPT = (
+    "You are the AutoPilot AI task planner. Convert the user's browser command "
+    "into a JSON array of actions. Each action must match this JSON schema:\n"
+    f"{json.dumps(ACTION_JSON_SCHEMA, sort_keys=True)}\n\n"
+    "Examples:\n"
+    'Command: "open youtube and search for lofi songs"\n'
+    'Actions: [{"action": "openUrl", "url": "https://www.youtube.com"}, '
+    '{"action": "typeText", "selector": "input#search", "text": "lofi songs"}, '
+    '{"action": "keyPress", "key": "Enter"}]\n'
+    'Command: "play video and set quality to 1080p"\n'
+    'Actions: [{"action": "playVideo"}, {"action": "setQuality", "quality": "1080p"}]\n\n'
+    "Return only the JSON array, nothing else."
+)
+PLANNER_PROMPT_CACHE_KEY = "autopilot-planner-v1"
+
 # --- Models ---
 
 class PlanRequest(BaseModel):
@@ -48,6 +72,10 @@ class PlanRequest(BaseModel):
     timeout_ms: int = DEFAULT_TIMEOUT_MS
 
 
+# Response models document the API schema (see the routes' responses=);
+# handlers serialize their in-process payloads directly instead of
+# validating them through these models on every request.
+
 class PlanResponse(BaseModel):
     actions: List[Dict[str, Any]]
     provider: str
@@ -94,7 +122,23 @@ class LLMProviderClient:
     
     async def generate_plan(self, command: str, **kwargs) -> List[Dict[str, Any]]:
         """Generate an action plan from natural language"""
+        return await self.send_request(self.build_request(command), command, **kwargs)
+    
+    def build_request(self, command: str) -> Dict[str, Any]:
+        """Build the provider request, with the static prompt first and the command last"""
         raise NotImplementedError()
+    
+    async def send_request(self, request: Dict[str, Any], command: str, **kwargs) -> List[Dict[str, Any]]:
+        """Send a built request to the provider and return the planned actions"""
+        # Provider transports are not wired in yet; plan with the heuristic planner
+        return plan_actions(command)
+    
+    def build_messages(self, command: str) -> List[Dict[str, Any]]:
+        """Build chat messages with the static prompt first and the command last"""
+        return [
+            {"role": "system", "content": PLANNER_SYSTEM_PROMPT},
+            {"role": "user", "content": command}
+        ]
 
 
 class OpenAIClient(LLMProviderClient):
@@ -106,10 +150,12 @@ class OpenAIClient(LLMProviderClient):
             logger.warning("OPENAI_API_KEY not set. Using fallback planner.")
             raise ValueError("OPENAI_API_KEY not configured. Please update the .env file.")
     
-    async def generate_plan(self, command: str, **kwargs):
-        # In a real implementation, this would call the OpenAI API
-        # For now, we'll use the heuristic planner as a fallback
-        return plan_actions(command)
+    def build_request(self, command: str) -> Dict[str, Any]:
+        """Build a chat completion request that shares the cached prompt prefix"""
+        return {
+            "messages": self.build_messages(command),
+            "prompt_cache_key": PLANNER_PROMPT_CACHE_KEY
+        }
 
 
 class GeminiClient(LLMProviderClient):
@@ -120,15 +166,46 @@ class GeminiClient(LLMProviderClient):
         if not self.api_key or self.api_key == "your_gemini_api_key_here":
             logger.warning("GEMINI_API_KEY not set. Using fallback planner.")
             raise ValueError("GEMINI_API_KEY not configured. Please update the .env file.")
+        # Name of a cachedContent resource holding PLANNER_SYSTEM_PROMPT, if one was created
+        self.cached_content: Optional[str] = os.getenv("GEMINI_CACHED_CONTENT")
     
-    async def generate_plan(self, command: str, **kwargs):
-        # Placeholder for Gemini API integration
-        return plan_actions(command)
+    def build_request(self, command: str) -> Dict[str, Any]:
+        """Build a generateContent request, referencing the cached prompt when available"""
+        if self.cached_content:
+            return {"cached_content": self.cached_content, "contents": [command]}
+        return {"system_instruction": PLANNER_SYSTEM_PROMPT, "contents": [command]}
+
+
+class ClaudeClient(LLMProviderClient):
+    """Anthropic Claude API client"""
+    
+    def __init__(self):
+        self.api_key = os.getenv("ANTHROPIC_API_KEY")
+        if not self.api_key or self.api_key == "your_anthropic_api_key_here":
+            logger.warning("ANTHROPIC_API_KEY not set. Using fallback planner.")
+            raise ValueError("ANTHROPIC_API_KEY not configured. Please update the .env file.")
+    
+    def build_request(self, command: str) -> Dict[str, Any]:
+        """Build a messages request with the static prompt marked as cacheable"""
+        return {
+            "system": [{
+                "type": "text",
+                "text": PLANNER_SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"}
+            }],
+            "messages": [{"role": "user", "content": command}]
+        }
 
 
 # Provider factory
 async def get_llm_provider(provider: LLMProvider = DEFAULT_LLM_PROVIDER) -> LLMProviderClient:
     """Get the appropriate LLM provider client"""
+    return _create_llm_client(provider)
+
+
+@lru_cache(maxsize=None)
+def _create_llm_client(provider: LLMProvider) -> LLMProviderClient:
+    """Create the client for a provider once; later requests reuse it"""
     try:
         if provider == LLMProvider.OPENAI:
             try:
@@ -144,6 +221,13 @@ async def get_llm_provider(provider: LLMProvider = DEFAULT_LLM_PROVIDER) -> LLMP
                 logger.warning(f"Falling back to HeuristicPlanner: {str(e)}")
                 return HeuristicPlannerClient()
                 
+        elif provider == LLMProvider.CLAUDE:
+            try:
+                return ClaudeClient()
+            except ValueError as e:
+                logger.warning(f"Falling back to HeuristicPlanner: {str(e)}")
+                return HeuristicPlannerClient()
+                
         # Default to heuristic planner if provider not implemented
         return HeuristicPlannerClient()
         
@@ -168,24 +252,29 @@ class HeuristicPlannerClient(LLMProviderClient):
 app = FastAPI(
     title="AutoPilot AI Backend — Phase 1",
     description="Enhanced AI Task Planner with multi-LLM support",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 
 # --- API Endpoints ---
 
-@app.get("/health", response_model=HealthResponse)
+# The health payload never changes, so it is serialized once at import
+_HEALTH_PAYLOAD = orjson.dumps({
+    "status": "ok",
+    "phase": 1,
+    "llm_providers": [p.value for p in LLMProvider],
+    "active_provider": DEFAULT_LLM_PROVIDER.value
+})
+
+
+@app.get("/health", responses={200: {"model": HealthResponse}})
 async def health():
     """Health check endpoint"""
-    return {
-        "status": "ok",
-        "phase": 1,
-        "llm_providers": [p.value for p in LLMProvider],
-        "active_provider": DEFAULT_LLM_PROVIDER.value
-    }
+    return Response(content=_HEALTH_PAYLOAD, media_type="application/json")
 
 
-@app.post("/plan", response_model=PlanResponse)
+@app.post("/plan", responses={200: {"model": PlanResponse}})
 async def plan(
     request: PlanRequest,
     llm_provider: LLMProviderClient = Depends(get_llm_provider)
@@ -195,9 +284,7 @@ async def plan(
     
     Supports multiple LLM providers with fallback to heuristic planner.
     """
-    import time
-    
-    start_time = time.time()
+    start = perf_counter_ns()
     
     try:
         # Generate the action plan using the selected provider
@@ -206,13 +293,15 @@ async def plan(
             timeout_ms=request.timeout_ms
         )
         
-        processing_time_ms = (time.time() - start_time) * 1000
+        processing_time_ms = (perf_counter_ns() - start) / 1e6
         
-        return PlanResponse(
-            actions=actions,
-            provider=llm_provider.__class__.__name__,
-            processing_time_ms=round(processing_time_ms, 2)
-        )
+        # Planner output is already a list of plain action dicts, so serialize it
+        # directly instead of re-validating it through PlanResponse
+        return ORJSONResponse({
+            "actions": actions,
+            "provider": llm_provider.__class__.__name__,
+            "processing_time_ms": round(processing_time_ms, 2)
+        })
         
     except Exception as e:
         raise HTTPException(
@@ -221,7 +310,7 @@ async def plan(
         )
 
 
-@app.post("/vision/analyze", response_model=VisionResponse)
+@app.post("/vision/analyze", responses={200: {"model": VisionResponse}})
 async def vision_analyze(req: VisionRequest):
     """Phase 3 placeholder: analyze a screenshot (base64) and return heuristic element hints.
     This is a stub; replace with actual Vision AI integration later."""
@@ -235,11 +324,23 @@ async def vision_analyze(req: VisionRequest):
         {"label": "Search box", "selector": "input[type='text'], input[name='q'], input#search"},
     ]
 
-    return VisionResponse(ok=True, elements=hints, message="Mock analysis — integrate real Vision API in Phase 4")
+    return ORJSONResponse({
+        "ok": True,
+        "elements": hints,
+        "message": "Mock analysis — integrate real Vision API in Phase 4"
+    })
 
 
 # Update 1: Autonomous execution endpoint
-@app.post("/autonomous/next-action", response_model=AutonomousActionResponse)
+# Reasoning suffix per action type; other actions get " | Executing <action>"
+_ACTION_REASONING = {
+    "clickElement": " | Clicking element based on page analysis",
+    "typeText": " | Typing in detected input field",
+    "scrollPage": " | Scrolling to find more content"
+}
+
+
+@app.post("/autonomous/next-action", responses={200: {"model": AutonomousActionResponse}})
 async def autonomous_next_action(request: AutonomousActionRequest):
     """Get next action for autonomous execution based on goal and observation with SEE → THINK → ACT."""
     try:
@@ -247,21 +348,35 @@ async def autonomous_next_action(request: AutonomousActionRequest):
         if not autonomous_planner.current_goal_state or autonomous_planner.current_goal_state.goal != request.goal:
             autonomous_planner.start_new_goal(request.goal)
         
-        # Update planner state with latest observation
-        autonomous_planner.update_state(request.observation)
-        
-        # Update 2: Use enhanced DOM interpretation for SEE → THINK → ACT
-        next_actions = autonomous_planner.decide_next_step(request.observation)
+        # Polling frontends re-post an unchanged page for the same step; answer with
+        # the previous actions without updating state or re-planning
+        fingerprint = observation_fingerprint(request.observation)
+        if fingerprint == autonomous_planner._last_obs_hash and request.step == autonomous_planner._last_step:
+            next_actions = autonomous_planner._last_actions
+        else:
+            # Update planner state with latest observation
+            autonomous_planner.update_state(request.observation)
+            
+            # Update 2: Use enhanced DOM interpretation for SEE → THINK → ACT
+            next_actions = autonomous_planner.decide_next_step(request.observation, fingerprint)
+            autonomous_planner._last_obs_hash = fingerprint
+            autonomous_planner._last_step = request.step
+            autonomous_planner._last_actions = next_actions
         
         if not next_actions:
             # Goal completed or no more actions
-            return AutonomousActionResponse(
-                completed=True,
-                reasoning="Goal completed or no further actions available"
-            )
+            response_data = {
+                "action": None,
+                "completed": True,
+                "reasoning": "Goal completed or no further actions available",
+                "next_step_hint": None
+            }
+            return ORJSONResponse(response_data)
         
         # Return the first action from the list
-        next_action = next_actions[0].dict() if hasattr(next_actions[0], 'dict') else next_actions[0]
+        next_action = next_actions[0]
+        if isinstance(next_action, Action):
+            next_action = ACTION_ADAPTER.dump_python(next_action, mode="json")
         
         # Add reasoning based on current state and DOM interpretation
         current_step_info = ""
@@ -277,27 +392,21 @@ async def autonomous_next_action(request: AutonomousActionRequest):
             dom = request.observation
             if dom and not dom.get('error'):
                 page_type = dom.get('pageType', 'unknown')
-                reasoning = f"SEE → THINK → ACT: Analyzed {page_type} page. {current_step_info}"
                 
                 # Add specific reasoning based on action type
                 action_type = next_action.get('action', '')
-                if action_type == 'clickElement':
-                    reasoning += f" | Clicking element based on page analysis"
-                elif action_type == 'typeText':
-                    reasoning += f" | Typing in detected input field"
-                elif action_type == 'scrollPage':
-                    reasoning += f" | Scrolling to find more content"
-                else:
-                    reasoning += f" | Executing {action_type}"
+                suffix = _ACTION_REASONING.get(action_type) or f" | Executing {action_type}"
+                reasoning = f"SEE → THINK → ACT: Analyzed {page_type} page. {current_step_info}{suffix}"
             else:
                 reasoning = f"Using fallback planning. {current_step_info}"
         
-        return AutonomousActionResponse(
-            action=next_action,
-            completed=False,
-            reasoning=reasoning,
-            next_step_hint="Executing action and observing results..."
-        )
+        response_data = {
+            "action": next_action,
+            "completed": False,
+            "reasoning": reasoning,
+            "next_step_hint": "Executing action and observing results..."
+        }
+        return ORJSONResponse(response_data)
         
     except Exception as e:
         logger.error(f"Error in autonomous_next_action: {str(e)}")
@@ -7,24 +7,54 @@ This is the main engine that powers Update 4 - True Autonomous Agent Mode.
 
 import logging
 import asyncio
-from typing import Dict, Any, List, Optional
+import re
+import time
+from collections import deque
+from itertools import islice
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import asdict, dataclass, replace
 from datetime import datetime, timedelta
-from goal_engine import Goal, TaskGraph, Subgoal, goal_interpreter, subgoal_decomposer
+from goal_engine import Goal, TaskGraph, Subgoal, get_goal_interpreter, get_subgoal_decomposer
 from goal_checker import goal_checker
 from llm_planner import plan_actions
 from autonomous_executor import AutonomousExecutor
-import json
+import orjson
 
 logger = logging.getLogger(__name__)
 
+@dataclass(slots=True)
+class ExecutionRecord:
+    """Summary of one goal execution, kept in the engine's history."""
+    goal: str
+    timestamp: str  # ISO-8601 start time
+    duration: float
+    completed: bool
+    subgoals_completed: int
+    total_subgoals: int
+
 class AutonomousEngine:
     """Main autonomous execution engine for goal-driven tasks."""
     
-    def __init__(self, max_execution_time: int = 300, max_subgoals: int = 10):
+    # Critical subgoals that should abort execution when they fail
+    _CRITICAL_PATTERNS = re.compile(r"navigate|search|access", re.IGNORECASE)
+    
+    def __init__(self, max_execution_time: int = 300, max_subgoals: int = 10,
+                 plan_cache_enabled: bool = True, plan_cache_size: int = 128,
+                 history_size: int = 1000):
         self.max_execution_time = timedelta(seconds=max_execution_time)
         self.max_subgoals = max_subgoals
         self.executor = AutonomousExecutor()
-        self.execution_history = []
+        
+        # Most recent executions, with running totals kept for statistics
+        self.execution_history: "deque[ExecutionRecord]" = deque(maxlen=history_size)
+        self._successful_executions = 0
+        self._total_duration = 0.0
+        self._total_subgoals = 0
+        
+        # Subgoal plans from successful executions, reused for equivalent goals
+        self.plan_cache_enabled = plan_cache_enabled
+        self.plan_cache_size = plan_cache_size
+        self.plan_cache: Dict[Tuple[str, str, str], List[Subgoal]] = {}
         
     async def execute_goal(self, user_command: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -38,17 +68,22 @@ class AutonomousEngine:
             Dict containing the final result and execution details
         """
         start_time = datetime.utcnow()
+        start = time.monotonic()
         context = context or {}
         
         try:
             # Step 1: Extract and interpret the goal
             logger.info(f"Interpreting goal from command: {user_command}")
-            goal = goal_interpreter.extract_goal(user_command)
+            goal = get_goal_interpreter().extract_goal(user_command)
             logger.info(f"Goal extracted: {goal.goal_statement}")
             
-            # Step 2: Decompose goal into subgoals
-            logger.info("Decomposing goal into subgoals...")
-            subgoals = subgoal_decomposer.decompose_goal(goal)
+            # Step 2: Decompose goal into subgoals (or reuse a cached plan)
+            subgoals = self._get_cached_plan(goal)
+            if subgoals is None:
+                logger.info("Decomposing goal into subgoals...")
+                subgoals = get_subgoal_decomposer().decompose_goal(goal)
+            else:
+                logger.info("Reusing cached plan for goal")
             
             # Limit subgoals if too many
             if len(subgoals) > self.max_subgoals:
@@ -60,7 +95,7 @@ class AutonomousEngine:
             logger.info(f"Created task graph with {len(subgoals)} subgoals")
             
             # Step 4: Execute autonomous loop
-            execution_state = await self._run_autonomous_loop(goal, task_graph, context, start_time)
+            execution_state = await self._run_autonomous_loop(goal, task_graph, context, start)
             
             # Step 5: Check goal completion
             completion_check = goal_checker.check_goal_completion(goal, task_graph, execution_state)
@@ -69,15 +104,18 @@ class AutonomousEngine:
             final_output = self._generate_final_output(goal, completion_check, execution_state)
             
             # Record execution
-            execution_record = {
-                "goal": goal.goal_statement,
-                "timestamp": start_time.isoformat(),
-                "duration": (datetime.utcnow() - start_time).total_seconds(),
-                "completed": completion_check["completed"],
-                "subgoals_completed  ": len(task_graph.completed),
-                "total_subgoals": len(subgoals)
-            }
-            self.execution_history.append(execution_record)
+            execution_record = ExecutionRecord(
+                goal=goal.goal_statement,
+                timestamp=start_time.isoformat(),
+                duration=time.monotonic() - start,
+                completed=completion_check["completed"],
+                subgoals_completed=len(task_graph.completed),
+                total_subgoals=len(subgoals)
+            )
+            self._record_execution(execution_record)
+            
+            if completion_check["completed"]:
+                self._cache_plan(goal, subgoals)
             
             return final_output
             
@@ -91,8 +129,9 @@ class AutonomousEngine:
             }
     
     async def _run_autonomous_loop(self, goal: Goal, task_graph: TaskGraph, 
-                             context: Dict[str, Any], start_time: datetime) -> Dict[str, Any]:
-        """Run the main autonomous execution loop."""
+                             context: Dict[str, Any], start: float) -> Dict[str, Any]:
+        """Run the main autonomous execution loop; `start` is a time.monotonic() reading."""
+        deadline = start + self.max_execution_time.total_seconds()
         execution_state = {
             "collected_data": [],
             "results": [],
@@ -105,57 +144,65 @@ class AutonomousEngine:
         
         while not task_graph.is_complete():
             # Check timeout
-            if datetime.utcnow() - start_time > self.max_execution_time:
+            if time.monotonic() >= deadline:
                 logger.warning("Execution timeout reached")
                 break
             
-            # Get next subgoal to execute
-            current_subgoal = task_graph.get_next_subgoal()
-            if not current_subgoal:
+            # Get every subgoal whose dependencies are satisfied
+            ready_subgoals = task_graph.get_ready_subgoals()
+            if not ready_subgoals:
                 logger.warning("No more subgoals to execute")
                 break
             
-            logger.info(f"Executing subgoal: {current_subgoal.description}")
-            
-            # Execute subgoal
-            subgoal_result = await self._execute_subgoal(
-                current_subgoal, 
-                goal, 
-                context, 
-                execution_state
-            )
+            for subgoal in ready_subgoals:
+                logger.info(f"Executing subgoal: {subgoal.description}")
             
-            # Store subgoal result
-            execution_state["subgoal_results"][current_subgoal.id] = subgoal_result
+            # Independent subgoals run concurrently. State updates in
+            # _execute_subgoal contain no awaits, so they cannot interleave, and
+            # the executor keeps each goal's deadline and DOM-ready events per
+            # call, so the subgoals can share it
+            subgoal_results = await asyncio.gather(*(
+                self._execute_subgoal(subgoal, goal, context, execution_state)
+                for subgoal in ready_subgoals
+            ))
             
-            # Check if subgoal was completed successfully
-            subgoal_completion = goal_checker.check_subgoal_completion(
-                current_subgoal, 
-                execution_state
-            )
-            
-            if subgoal_completion["completed"]:
-                task_graph.mark_completed(current_subgoal.id)
-                logger.info(f"Subgoal {current_subgoal.id} completed successfully")
+            aborted = False
+            for current_subgoal, subgoal_result in zip(ready_subgoals, subgoal_results):
+                # Store subgoal result
+                execution_state["subgoal_results"][current_subgoal.id] = subgoal_result
                 
-                # Collect any data from this subgoal
-                if "data" in subgoal_result:
-                    execution_state["collected_data"].extend(subgoal_result["data"])
-            else:
-                task_graph.mark_failed(current_subgoal.id)
-                logger.warning(f"Subgoal {current_subgoal.id} failed: {subgoal_completion['reason']}")
+                # Check if subgoal was completed successfully
+                subgoal_completion = goal_checker.check_subgoal_completion(
+                    current_subgoal, 
+                    execution_state
+                )
                 
-                # Decide whether to continue or abort
-                if not self._should_continue_on_failure(current_subgoal, task_graph):
-                    logger.error("Critical subgoal failed, aborting execution")
-                    break
+                if subgoal_completion["completed"]:
+                    task_graph.mark_completed(current_subgoal.id)
+                    logger.info(f"Subgoal {current_subgoal.id} completed successfully")
+                    
+                    # Collect any data from this subgoal
+                    if "data" in subgoal_result:
+                        execution_state["collected_data"].extend(subgoal_result["data"])
+                else:
+                    task_graph.mark_failed(current_subgoal.id)
+                    logger.warning(f"Subgoal {current_subgoal.id} failed: {subgoal_completion['reason']}")
+                    
+                    # Decide whether to continue or abort
+                    if not self._should_continue_on_failure(current_subgoal, task_graph):
+                        logger.error("Critical subgoal failed, aborting execution")
+                        aborted = True
+                        break
+            
+            if aborted:
+                break
             
             # Update progress
             progress = task_graph.get_progress()
             logger.info(f"Progress: {progress['progress_percentage']:.1f}% ({progress['completed']}/{progress['total_subgoals']})")
         
         # Calculate execution time
-        execution_state["execution_time"] = (datetime.utcnow() - start_time).total_seconds()
+        execution_state["execution_time"] = time.monotonic() - start
         
         return execution_state
     
@@ -190,15 +237,40 @@ class AutonomousEngine:
         
         return result
     
-    def _should_continue_on_failure(self, failed_subgoal: Subgoal, task_graph: TaskGraph) -> bool:
-        """Determine if execution should continue after a subgoal failure."""
-        # Critical subgoals that should abort execution
-        critical_patterns = ["navigate", "search", "access"]
+    def _plan_cache_key(self, goal: Goal) -> Tuple[str, str, str]:
+        """Build the plan cache key; decomposition depends only on these fields."""
+        return (goal.goal_type.value, goal.domain, goal.goal_statement.strip().lower())
+    
+    def _get_cached_plan(self, goal: Goal) -> Optional[List[Subgoal]]:
+        """Return fresh copies of a cached subgoal plan, or None on a miss."""
+        if not self.plan_cache_enabled:
+            return None
+        
+        template = self.plan_cache.get(self._plan_cache_key(goal))
+        if template is None:
+            return None
+        
+        return [replace(sg, dependencies=list(sg.dependencies)) for sg in template]
+    
+    def _cache_plan(self, goal: Goal, subgoals: List[Subgoal]):
+        """Store a successful subgoal plan as a template for equivalent goals."""
+        if not self.plan_cache_enabled:
+            return
         
-        failed_description = failed_subgoal.description.lower()
+        key = self._plan_cache_key(goal)
+        if key not in self.plan_cache and len(self.plan_cache) >= self.plan_cache_size:
+            # Evict the oldest template
+            self.plan_cache.pop(next(iter(self.plan_cache)))
         
+        self.plan_cache[key] = [
+            replace(sg, dependencies=list(sg.dependencies), status="pending")
+            for sg in subgoals
+        ]
+    
+    def _should_continue_on_failure(self, failed_subgoal: Subgoal, task_graph: TaskGraph) -> bool:
+        """Determine if execution should continue after a subgoal failure."""
         # If critical subgoal failed, don't continue
-        if any(pattern in failed_description for pattern in critical_patterns):
+        if self._CRITICAL_PATTERNS.search(failed_subgoal.description):
             return False
         
         # If more than 50% of subgoals have failed, don't continue
@@ -249,16 +321,36 @@ class AutonomousEngine:
         
         return base_output
     
+    def _record_execution(self, record: ExecutionRecord):
+        """Append an execution record, keeping the running totals in sync."""
+        if len(self.execution_history) == self.execution_history.maxlen:
+            self._update_totals(self.execution_history[0], -1)
+        self.execution_history.append(record)
+        self._update_totals(record, 1)
+    
+    def _update_totals(self, record: ExecutionRecord, sign: int):
+        """Add (sign=1) or remove (sign=-1) a record from the running totals."""
+        self._successful_executions += sign * record.completed
+        self._total_duration += sign * record.duration
+        self._total_subgoals += sign * record.total_subgoals
+    
+    def dump_execution_history(self) -> str:
+        """Serialize the execution history to JSON."""
+        return orjson.dumps(list(self.execution_history)).decode()
+    
     def get_execution_statistics(self) -> Dict[str, Any]:
-        """Get statistics about all executions."""
+        """Get statistics about recent executions."""
         if not self.execution_history:
             return {"total_executions": 0}
         
         total_executions = len(self.execution_history)
-        successful_executions = sum(1 for record in self.execution_history if record["completed"])
+        successful_executions = self._successful_executions
+        
+        avg_duration = self._total_duration / total_executions
+        avg_subgoals = self._total_subgoals / total_executions
         
-        avg_duration = sum(record["duration"] for record in self.execution_history) / total_executions
-        avg_subgoals = sum(record["total_subgoals"] for record in self.execution_history) / total_executions
+        # Last 5 executions, oldest first
+        recent_executions = [asdict(record) for record in islice(reversed(self.execution_history), 5)][::-1]
         
         return {
             "total_executions": total_executions,
@@ -266,7 +358,7 @@ class AutonomousEngine:
             "success_rate": (successful_executions / total_executions) * 100,
             "average_duration": avg_duration,
             "average_subgoals": avg_subgoals,
-            "recent_executions": self.execution_history[-5:]  # Last 5 executions
+            "recent_executions": recent_executions
         }
 
 # Global instance
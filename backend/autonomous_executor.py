@@ -3,9 +3,13 @@ Autonomous Task Executor
 
 Handles the execution loop for autonomous task completion.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Callable, Awaitable
 import logging
 import asyncio
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
@@ -13,62 +17,107 @@ logger = logging.getLogger(__name__)
 class AutonomousExecutor:
     """Manages the autonomous execution loop."""
     
-    def __init__(self, max_steps: int = 20, timeout_seconds: int = 300):
+    def __init__(self, max_steps: int = 20, timeout_seconds: int = 300,
+                 dom_settle_timeout: float = 1.0, dom_request_timeout: float = 2.0):
         self.max_steps = max_steps
         self.timeout = timedelta(seconds=timeout_seconds)
-        self.start_time = None
+        self._timeout_secs = self.timeout.total_seconds()
+        
+        # Set by the extension's "dom-idle" message; tabs that never send it
+        # fall back to waiting dom_settle_timeout seconds. Each executing action
+        # registers its own event, and a task's entry goes once none is waiting
+        self.dom_settle_timeout = dom_settle_timeout
+        self._dom_waiters: Dict[str, List[asyncio.Event]] = {}
+        
+        # Sends a {"type": "dom_snapshot", ...} request to the extension (e.g. over a
+        # WebSocket); replies come back through resolve_dom_observation by req_id
+        self.dom_request_sender: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+        self.dom_request_timeout = dom_request_timeout
+        self._pending: Dict[str, asyncio.Future] = {}
         
     async def execute_goal(self, command: str, context: Dict = None) -> Dict[str, Any]:
         """Execute a command with autonomous planning and execution."""
-        from .llm_planner import plan_actions
+        from .llm_planner import plan_actions, observation_fingerprint
+        from .context_manager import context_manager
         
-        self.start_time = datetime.now()
+        # Per call, so concurrent goals on one executor keep their own deadline
+        deadline = time.monotonic() + self._timeout_secs
         context = context or {}
-        context.setdefault("execution_history", [])
+        # Bounded history; its last entry is the latest action and result
+        history = context.setdefault("execution_history", deque(maxlen=self.max_steps))
+        # DOM snapshots by fingerprint; history entries refer to them by observation_hash
+        snapshots = context.setdefault("snapshots", {})
         
-        while not self._should_stop(context):
-            # Get next action from planner
-            plan_result = plan_actions(command, context)
-            
-            if plan_result["status"] == "completed":
+        # The planner returns the command's whole plan (cached per command, and
+        # each call gets its own copies); the loop runs it one action per step
+        try:
+            plan = iter(plan_actions(command))
+        except ValueError as e:
+            return {
+                "status": "error",
+                "context": context,
+                "message": str(e)
+            }
+        
+        # Loop-invariant lookups, bound once
+        session_id = context.get("session_id")
+        should_stop = self._should_stop
+        execute_action = self._execute_action
+        
+        while not should_stop(context, deadline):
+            action = next(plan, None)
+            if action is None:
                 return {
                     "status": "completed",
                     "context": context,
                     "message": "Goal completed successfully"
                 }
                 
-            if plan_result["status"] == "error":
-                return {
-                    "status": "error",
-                    "context": context,
-                    "message": plan_result.get("message", "Unknown error")
-                }
-                
-            # Execute the next action
-            action = plan_result["next_action"]
-            execution_result = await self._execute_action(action, context)
+            # Execute the next action, persisting the session from the previous
+            # step while it runs
+            if session_id and history:
+                execution_result, _ = await asyncio.gather(
+                    execute_action(action, context), context_manager.save_context(session_id)
+                )
+            else:
+                execution_result = await execute_action(action, context)
+            
+            # Store each distinct DOM snapshot once
+            observation = execution_result.pop("observation", None)
+            if observation is not None:
+                observation_hash = observation_fingerprint(observation)
+                snapshots.setdefault(observation_hash, observation)
+                execution_result["observation_hash"] = observation_hash
             
             # Update context with execution result
-            context["last_action"] = action
-            context["last_result"] = execution_result
-            context["last_observation"] = execution_result.get("observation", {})
-            context["execution_history"].append({
+            history.append({
                 "action": action,
                 "result": execution_result,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": execution_result["timestamp"]
             })
             
+            # Drop snapshots whose entries have left the bounded history
+            referenced = {entry["result"].get("observation_hash") for entry in history}
+            for observation_hash in [h for h in snapshots if h not in referenced]:
+                del snapshots[observation_hash]
+            
             # Update step counter
             context["current_step"] = context.get("current_step", 0) + 1
             
         return {
-            "status": "timeout" if self._is_timed_out() else "max_steps_reached",
+            "status": "timeout" if self._is_timed_out(deadline) else "max_steps_reached",
             "context": context,
             "message": "Execution stopped"
         }
         
     async def _execute_action(self, action: Dict, context: Dict) -> Dict[str, Any]:
         """Execute a single action and return the result."""
+        # Only a DOM-idle signal sent after this action starts counts
+        with self._dom_signal(context.get("task_id")) as dom_ready:
+            return await self._run_action(action, context, dom_ready)
+    
+    async def _run_action(self, action: Dict, context: Dict, dom_ready: asyncio.Event) -> Dict[str, Any]:
+        """Execute an action with retries and observe the page once it settles."""
         from .task_executor import task_executor
         from .retry_manager import retry_manager
         
@@ -91,11 +140,16 @@ class AutonomousExecutor:
                 if "url" in result and result["url"] != context.get("current_url"):
                     context["current_url"] = result["url"]
                     
-                # Wait for DOM observation
-                await asyncio.sleep(1)  # Give time for DOM to update
+                # Wait for the DOM to settle before observing it
+                try:
+                    await asyncio.wait_for(dom_ready.wait(), timeout=self.dom_settle_timeout)
+                except asyncio.TimeoutError:
+                    pass
                 
                 # Get DOM observation
-                dom_observation = await self._get_dom_observation(context.get("task_id"))
+                dom_observation = await self._get_dom_observation(
+                    context.get("task_id"), context.get("current_url", "")
+                )
                 
                 return {
                     "success": True,
@@ -131,13 +185,47 @@ class AutonomousExecutor:
                 "timestamp": datetime.utcnow().isoformat()
             }
     
-    async def _get_dom_observation(self, task_id: str) -> Dict:
+    @contextmanager
+    def _dom_signal(self, task_id: str):
+        """Register an event for the next DOM-idle signal of a task, for one action."""
+        event = asyncio.Event()
+        waiters = self._dom_waiters.setdefault(task_id, [])
+        waiters.append(event)
+        try:
+            yield event
+        finally:
+            waiters.remove(event)
+            if not waiters:
+                del self._dom_waiters[task_id]
+    
+    def notify_dom_ready(self, task_id: str):
+        """Signal that the extension reported a settled DOM for a task; ignored if no action is waiting."""
+        for event in self._dom_waiters.get(task_id, ()):
+            event.set()
+    
+    def resolve_dom_observation(self, req_id: str, observation: Dict[str, Any]):
+        """Deliver the extension's reply to a pending DOM snapshot request."""
+        future = self._pending.pop(req_id, None)
+        if future is not None and not future.done():
+            future.set_result(observation)
+    
+    async def _get_dom_observation(self, task_id: str, current_url: str = "") -> Dict:
         """Get DOM observation from the browser extension."""
-        # This would send a message to the extension to get DOM snapshot
-        # For now, return a placeholder
-        # In a real implementation, you'd use websockets or another communication method
+        if self.dom_request_sender is not None:
+            req_id = uuid.uuid4().hex
+            future = asyncio.get_running_loop().create_future()
+            self._pending[req_id] = future
+            try:
+                await self.dom_request_sender({"type": "dom_snapshot", "task_id": task_id, "req_id": req_id})
+                return await asyncio.wait_for(future, timeout=self.dom_request_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"DOM snapshot request {req_id} for task {task_id} timed out")
+            finally:
+                self._pending.pop(req_id, None)
+        
+        # No extension connected (or it didn't answer): return a placeholder
         return {
-            "url": context.get("current_url", ""),
+            "url": current_url,
             "title": "Page Title",
             "text": "",
             "buttons": [],
@@ -147,19 +235,17 @@ class AutonomousExecutor:
             "timestamp": datetime.utcnow().isoformat()
         }
     
-    def _should_stop(self, context: Dict) -> bool:
+    def _should_stop(self, context: Dict, deadline: float) -> bool:
         """Determine if execution should stop."""
         if context.get("status") in ["completed", "error"]:
             return True
             
-        if self._is_timed_out():
+        if self._is_timed_out(deadline):
             return True
             
         current_step = context.get("current_step", 0)
         return current_step >= self.max_steps
     
-    def _is_timed_out(self) -> bool:
-        """Check if execution has timed out."""
-        if not self.start_time:
-            return False
-        return (datetime.now() - self.start_time) > self.timeout
+    def _is_timed_out(self, deadline: float) -> bool:
+        """Check if execution has passed its time.monotonic() deadline."""
+        return time.monotonic() > deadline
@@ -0,0 +1,22 @@
+"""
+Retry backoff for AutoPilot AI
+
+Exponential backoff with jitter, shared by the task executors and the retry manager.
+"""
+
+import random
+from typing import Optional
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: Optional[float] = None,
+                  jitter: float = 0.0) -> float:
+    """
+    Delay before retrying after the given (1-based) failed attempt.
+    
+    The delay doubles from base_delay with each attempt, capped at max_delay
+    when given, plus up to `jitter` of itself at random.
+    """
+    delay = base_delay * (1 << (attempt - 1))
+    if max_delay is not None:
+        delay = min(max_delay, delay)
+    return delay + random.uniform(0, delay * jitter)
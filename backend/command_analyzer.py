@@ -4,12 +4,57 @@ Command Analyzer for AutoPilot AI
 Analyzes and breaks down complex commands into simpler sub-tasks.
 """
 from typing import List, Dict, Any, Tuple, Optional
+from bisect import bisect_left
 from enum import Enum, auto
+from functools import lru_cache
 import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _keyword_pattern(keywords: List[str]) -> str:
+    """Build a regex matching any keyword, factored into a trie of shared prefixes."""
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword.lower():
+            node = node.setdefault(char, {})
+        node[""] = {}  # a keyword ends here
+    return _trie_pattern(trie)
+
+def _trie_pattern(node: Dict[str, Any]) -> str:
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if "" in node:
+        return "(?:" + "|".join(branches) + ")?" if branches else ""
+    return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+_SUBTASK_PROMPT = """You are a command analysis assistant. Break down the following command into atomic, executable sub-tasks.
+
+Current Context:
+- Current URL: {current_url}
+- Previous Actions: {n_actions} actions performed
+
+Command to analyze: "{command}"
+
+Please provide the sub-tasks in the following JSON format:
+[
+  {{
+    "command": "The first sub-command to execute",
+    "description": "What this sub-command aims to accomplish",
+    "depends_on": []  // Any previous sub-task indices this depends on
+  }}
+]
+
+Return only the JSON array, nothing else."""
+
+@lru_cache(maxsize=256)
+def _render_subtask_prompt(command: str, current_url: Any, n_actions: int) -> str:
+    return _SUBTASK_PROMPT.format_map({
+        "current_url": current_url,
+        "n_actions": n_actions,
+        "command": command
+    })
+
 class CommandComplexity(Enum):
     SIMPLE = auto()
     MEDIUM = auto()
@@ -27,24 +72,46 @@ class CommandAnalyzer:
         "search", "find", "look up", "khojo", "dhundho"
     ]
     
+    # Single-pass matchers for the keyword lists (substring match, like `in`)
+    _SEP_RE = re.compile(_keyword_pattern(SEPARATORS), re.IGNORECASE)
+    _COMPLEX_RE = re.compile(_keyword_pattern(COMPLEX_KEYWORDS), re.IGNORECASE)
+    
+    # Splits on whitespace-delimited separators, keeping the separator as a part
+    _SPLIT_RE = re.compile(r'\s+(' + '|'.join(map(re.escape, SEPARATORS)) + r')\s+', re.IGNORECASE)
+    _SEP_SET = frozenset(sep.lower() for sep in SEPARATORS)
+    
+    # Whitespace-delimited conjunctions that make natural breakpoints
+    _BREAK_RE = re.compile(r'(?<!\S)(?:and|or|then|after)(?!\S)', re.IGNORECASE)
+    _WORD_RE = re.compile(r'\S+')
+    
     def __init__(self, min_words_for_complex: int = 8):
         self.min_words_for_complex = min_words_for_complex
     
     def analyze_complexity(self, command: str) -> CommandComplexity:
         """Analyze the complexity of a command."""
-        words = command.lower().split()
-        word_count = len(words)
-        
+        return self._classify(command, self.min_words_for_complex)
+    
+    def analyze_batch(self, commands: List[str]) -> List[CommandComplexity]:
+        """Analyze the complexity of many commands, e.g. when replaying a log."""
+        classify = self._classify
+        min_words = self.min_words_for_complex
+        return [classify(command, min_words) for command in commands]
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _classify(command: str, min_words_for_complex: int) -> CommandComplexity:
+        """Classify a command; pure, so repeated commands hit the cache."""
         # Check for explicit complexity indicators
-        if any(sep in command.lower() for sep in self.SEPARATORS):
+        if CommandAnalyzer._SEP_RE.search(command):
             return CommandComplexity.COMPLEX
             
         # Check for complex keywords
-        if any(keyword in command.lower() for keyword in self.COMPLEX_KEYWORDS):
+        if CommandAnalyzer._COMPLEX_RE.search(command):
             return CommandComplexity.MEDIUM
             
         # Use word count as a fallback
-        if word_count >= self.min_words_for_complex:
+        word_count = len(command.split())
+        if word_count >= min_words_for_complex:
             return CommandComplexity.COMPLEX
         elif word_count > 4:
             return CommandComplexity.MEDIUM
@@ -64,11 +131,8 @@ class CommandAnalyzer:
     
     def _split_by_separators(self, command: str) -> List[Dict[str, Any]]:
         """Split command by common separators."""
-        # Create a regex pattern that matches any of the separators
-        pattern = r'\s+(' + '|'.join(re.escape(sep) for sep in self.SEPARATORS) + r')\s+'
-        
         # Split and clean up the results
-        parts = re.split(pattern, command, flags=re.IGNORECASE)
+        parts = self._SPLIT_RE.split(command)
         
         # Recombine the separators with their following commands
         subtasks = []
@@ -80,7 +144,7 @@ class CommandAnalyzer:
                 continue
                 
             # If this part is a separator, combine it with the next part
-            if part.lower() in self.SEPARATORS and i + 1 < len(parts):
+            if part.lower() in self._SEP_SET and i + 1 < len(parts):
                 next_part = parts[i + 1].strip()
                 if next_part:
                     subtasks.append({"command": next_part, "connector": part})
@@ -88,7 +152,7 @@ class CommandAnalyzer:
                     continue
             
             # Otherwise, add as a standalone command
-            if part.lower() not in self.SEPARATORS:
+            if part.lower() not in self._SEP_SET:
                 subtasks.append({"command": part})
             i += 1
         
@@ -100,14 +164,18 @@ class CommandAnalyzer:
         # to break down the command more intelligently
         
         # For now, we'll just split long commands into logical chunks
-        words = command.split()
+        word_matches = list(self._WORD_RE.finditer(command))
+        words = [m.group() for m in word_matches]
         if len(words) <= 6:
             return [{"command": command}]
         
-        # Try to find natural breakpoints (commas, conjunctions, etc.)
+        # Try to find natural breakpoints (commas, conjunctions, etc.),
+        # mapping each match offset back to its word index
+        word_starts = [m.start() for m in word_matches]
         breakpoints = []
-        for i, word in enumerate(words):
-            if word.lower() in ["and", "or", "then", "after"] and i > 0 and i < len(words) - 1:
+        for match in self._BREAK_RE.finditer(command):
+            i = bisect_left(word_starts, match.start())
+            if 0 < i < len(words) - 1:
                 breakpoints.append(i)
         
         # If no natural breakpoints, split in half
@@ -129,24 +197,11 @@ class CommandAnalyzer:
     
     def generate_subtask_prompt(self, command: str, context: Dict[str, Any]) -> str:
         """Generate a prompt for an LLM to break down a complex command."""
-        return f"""You are a command analysis assistant. Break down the following command into atomic, executable sub-tasks.
-
-Current Context:
-- Current URL: {context.get('current_url', 'N/A')}
-- Previous Actions: {len(context.get('previous_actions', []))} actions performed
-
-Command to analyze: "{command}"
-
-Please provide the sub-tasks in the following JSON format:
-[
-  {{
-    "command": "The first sub-command to execute",
-    "description": "What this sub-command aims to accomplish",
-    "depends_on": []  // Any previous sub-task indices this depends on
-  }}
-]
-
-Return only the JSON array, nothing else."""
+        return _render_subtask_prompt(
+            command,
+            context.get('current_url', 'N/A'),
+            len(context.get('previous_actions', []))
+        )
 
 # Global analyzer instance
 command_analyzer = CommandAnalyzer()
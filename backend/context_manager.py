@@ -4,12 +4,18 @@ Context Manager for AutoPilot AI
 Handles state management and context preservation between commands.
 """
 from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from datetime import datetime
-import json
+from functools import lru_cache
+import asyncio
 import os
 
-@dataclass
+import orjson
+from pydantic import TypeAdapter
+
+@dataclass(slots=True)
 class BrowserTabState:
     """Represents the state of a browser tab."""
     url: str
@@ -17,7 +23,7 @@ class BrowserTabState:
     dom_snapshot: Optional[Dict[str, Any]] = None
     last_updated: datetime = field(default_factory=datetime.utcnow)
 
-@dataclass
+@dataclass(slots=True)
 class CommandContext:
     """Context for the current command execution."""
     current_tab: Optional[BrowserTabState] = None
@@ -25,17 +31,50 @@ class CommandContext:
     variables: Dict[str, Any] = field(default_factory=dict)
     last_updated: datetime = field(default_factory=datetime.utcnow)
 
+# Typed decoder for saved contexts; validates fields and parses datetimes
+_CONTEXT_ADAPTER = TypeAdapter(CommandContext)
+
+def _atomic_write(file_path: str, payload: bytes):
+    """Write payload to file_path via a temp file so readers never see a partial file."""
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, file_path)
+
+@lru_cache(maxsize=256)
+def _read_context_file(file_path: str, mtime_ns: int) -> bytes:
+    """Read a saved context; keyed by mtime so rewritten files are re-read."""
+    with open(file_path, 'rb') as f:
+        return f.read()
+
 class ContextManager:
     """Manages context and state for command execution."""
     
     def __init__(self, storage_path: str = "./context"):
         self.storage_path = storage_path
         self.contexts: Dict[str, CommandContext] = {}
-        self.current_session_id: Optional[str] = None
+        # Active session per asyncio task, so concurrent requests don't switch each other's session
+        self._current_session: ContextVar[Optional[str]] = ContextVar(
+            f"current_session_id_{id(self)}", default=None
+        )
+        # last_updated of each session as of its last save/load; unchanged sessions aren't rewritten
+        self._saved_versions: Dict[str, datetime] = {}
+        # Single writer thread: files are written in the order saves were serialized,
+        # so overlapping saves can't leave an older snapshot on disk
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="context-writer")
         
         # Ensure storage directory exists
         os.makedirs(self.storage_path, exist_ok=True)
     
+    @property
+    def current_session_id(self) -> Optional[str]:
+        """The active session of the current request/task."""
+        return self._current_session.get()
+    
+    @current_session_id.setter
+    def current_session_id(self, session_id: Optional[str]):
+        self._current_session.set(session_id)
+    
     def create_session(self, session_id: str) -> CommandContext:
         """Create a new session context."""
         self.contexts[session_id] = CommandContext()
@@ -69,6 +108,16 @@ class ContextManager:
         context.previous_actions.append(action_record)
         context.last_updated = datetime.utcnow()
     
+    def add_actions(self, actions: List[Dict[str, Any]]):
+        """Add several actions to the context in one update."""
+        context = self.get_current_context()
+        now = datetime.utcnow()
+        timestamp = now.isoformat()
+        context.previous_actions.extend(
+            {"action": action, "result": None, "timestamp": timestamp} for action in actions
+        )
+        context.last_updated = now
+    
     def get_variable(self, name: str, default: Any = None) -> Any:
         """Get a variable from the context."""
         return self.get_current_context().variables.get(name, default)
@@ -78,30 +127,23 @@ class ContextManager:
         self.get_current_context().variables[name] = value
         self.get_current_context().last_updated = datetime.utcnow()
     
-    def save_context(self, session_id: Optional[str] = None):
+    async def save_context(self, session_id: Optional[str] = None):
         """Save the current context to disk."""
         session_id = session_id or self.current_session_id
         if not session_id:
             raise ValueError("No session ID provided")
             
         context = self.contexts.get(session_id)
-        if not context:
+        if not context or self._saved_versions.get(session_id) == context.last_updated:
             return
             
         file_path = os.path.join(self.storage_path, f"{session_id}.json")
-        with open(file_path, 'w') as f:
-            # Convert dataclass to dict for JSON serialization
-            context_dict = {
-                "current_tab": {
-                    "url": context.current_tab.url if context.current_tab else None,
-                    "title": context.current_tab.title if context.current_tab else None,
-                    "last_updated": context.current_tab.last_updated.isoformat() if context.current_tab else None
-                },
-                "previous_actions": context.previous_actions,
-                "variables": context.variables,
-                "last_updated": context.last_updated.isoformat()
-            }
-            json.dump(context_dict, f, indent=2)
+        version = context.last_updated
+        # orjson encodes the dataclasses directly, with datetimes as ISO-8601. Serialize
+        # here so the snapshot can't change mid-write; only the disk I/O leaves the loop
+        payload = orjson.dumps(context, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        await asyncio.get_running_loop().run_in_executor(self._writer, _atomic_write, file_path, payload)
+        self._saved_versions[session_id] = version
     
     def load_context(self, session_id: str) -> CommandContext:
         """Load a context from disk."""
@@ -109,20 +151,16 @@ class ContextManager:
         if not os.path.exists(file_path):
             return self.create_session(session_id)
             
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-            
-        context = CommandContext()
-        if data["current_tab"] and data["current_tab"]["url"]:
-            context.current_tab = BrowserTabState(
-                url=data["current_tab"]["url"],
-                title=data["current_tab"]["title"],
-                last_updated=datetime.fromisoformat(data["current_tab"]["last_updated"])
-            )
+        # Only the bytes are cached: each load parses its own copy, since
+        # validation keeps nested dicts (actions, variables) by reference
+        data = orjson.loads(_read_context_file(file_path, os.stat(file_path).st_mtime_ns))
+        
+        # Older files store a missing tab as a tab with null fields
+        if data.get("current_tab") and not data["current_tab"].get("url"):
+            data["current_tab"] = None
         
-        context.previous_actions = data.get("previous_actions", [])
-        context.variables = data.get("variables", {})
-        context.last_updated = datetime.fromisoformat(data["last_updated"])
+        context = _CONTEXT_ADAPTER.validate_python(data)
+        self._saved_versions[session_id] = context.last_updated
         
         self.contexts[session_id] = context
         self.current_session_id = session_id
@@ -132,6 +170,7 @@ class ContextManager:
         """Clear a session's context."""
         if session_id in self.contexts:
             del self.contexts[session_id]
+        self._saved_versions.pop(session_id, None)
         
         file_path = os.path.join(self.storage_path, f"{session_id}.json")
         if os.path.exists(file_path):
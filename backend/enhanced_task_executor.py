@@ -5,13 +5,15 @@ Handles execution of tasks with context management and command analysis.
 """
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional, Callable, Awaitable, Union
+import time
+from typing import Dict, List, Any, Optional, Callable, Awaitable, Tuple, Union
 from enum import Enum
-from dataclasses import dataclass, field
-from datetime import datetime
+from dataclasses import dataclass
 import json
 
-from .action_schema import Action, ActionType
+from .action_schema import Action, ActionType, ACTIONS_ADAPTER, construct_actions
+from .backoff import backoff_delay
+from .task_executor import run_sequence
 from .context_manager import context_manager, CommandContext, BrowserTabState
 from .command_analyzer import command_analyzer, CommandComplexity
 
@@ -24,7 +26,7 @@ class TaskStatus(str, Enum):
     FAILED = "failed"
     RETRYING = "retrying"
 
-@dataclass
+@dataclass(slots=True)
 class TaskStep:
     """Represents a single step in a task."""
     action: Action
@@ -32,9 +34,12 @@ class TaskStep:
     attempt: int = 0
     error: Optional[str] = None
     result: Optional[Dict[str, Any]] = None
-    depends_on: List[int] = field(default_factory=list)
+    # Indices of steps that must complete first; None means the previous step
+    depends_on: Optional[List[int]] = None
+    # Handler for the action, bound once when the task is planned
+    handler: Optional[Callable[[Action, CommandContext], Awaitable[Dict]]] = None
 
-@dataclass
+@dataclass(slots=True)
 class TaskResult:
     """Result of a completed task."""
     task_id: str
@@ -44,47 +49,90 @@ class TaskResult:
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+@dataclass
+class RetryPolicy:
+    """How often to retry a failed step and how long to back off between attempts."""
+    max_retries: int = 3
+    base_delay: float = 1.0
+    jitter: float = 0.1  # up to this fraction of the delay is added at random
+    
+    def delay_for(self, attempt: int) -> float:
+        """Backoff before retrying after the given (1-based) failed attempt."""
+        return backoff_delay(attempt, self.base_delay, jitter=self.jitter)
+
+def _dump_step(step: TaskStep) -> Dict[str, Any]:
+    """Serialize a task step once for the task result."""
+    return {
+        "action": step.action.dict(),
+        "status": step.status.value,
+        "attempt": step.attempt,
+        "error": step.error,
+        "result": step.result
+    }
+
 class EnhancedTaskExecutor:
     """Executes tasks with context management and command analysis."""
     
-    def __init__(self, max_retries: int = 3, retry_delay: float = 1.0):
+    def __init__(self, max_retries: int = 3, retry_delay: float = 1.0, save_debounce: float = 0.25,
+                 trust_planner_output: bool = True):
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.default_retry_policy = RetryPolicy(max_retries=max_retries, base_delay=retry_delay)
+        self.retry_policies: Dict[ActionType, RetryPolicy] = {}
+        # The in-process planner emits schema-shaped dicts; skip re-validating them
+        self.trust_planner_output = trust_planner_output
         self.tasks: Dict[str, List[TaskStep]] = {}
-        self.execution_hooks: Dict[str, Callable[[Action, CommandContext], Awaitable[Dict]]] = {}
+        # Keyed by ActionType; members hash and compare like their string values,
+        # so lookups by a validated action's string tag hit directly
+        self.execution_hooks: Dict[ActionType, Callable[[Action, CommandContext], Awaitable[Dict]]] = {}
+        
+        # Context saves after each step are coalesced per session and flushed when a task ends
+        self.save_debounce = save_debounce
+        self._pending_saves: Dict[str, asyncio.Task] = {}
         
         # Register default action handlers
         self._register_default_handlers()
     
-    def _register_default_handlers(self):
-        """Register default handlers for common action types."""
+    # Default handler method for each action type
+    _DEFAULT_HANDLERS: Tuple[Tuple[ActionType, str], ...] = (
         # Basic actions
-        self.register_handler(ActionType.OPEN_URL, self._handle_open_url)
-        self.register_handler(ActionType.TYPE_TEXT, self._handle_type_text)
-        self.register_handler(ActionType.CLICK_ELEMENT, self._handle_click_element)
-        self.register_handler(ActionType.KEY_PRESS, self._handle_key_press)
-        self.register_handler(ActionType.WAIT_FOR_ELEMENT, self._handle_wait_for_element)
+        (ActionType.OPEN_URL, "_handle_open_url"),
+        (ActionType.TYPE_TEXT, "_handle_type_text"),
+        (ActionType.CLICK_ELEMENT, "_handle_click_element"),
+        (ActionType.KEY_PRESS, "_handle_key_press"),
+        (ActionType.WAIT_FOR_ELEMENT, "_handle_wait_for_element"),
+        (ActionType.SCROLL_PAGE, "_handle_scroll_page"),
         
         # Phase 4 action handlers
-        self.register_handler(ActionType.PLAY_VIDEO, self._handle_play_video)
-        self.register_handler(ActionType.PAUSE_VIDEO, self._handle_pause_video)
-        self.register_handler(ActionType.OPEN_SETTINGS_MENU, self._handle_open_settings_menu)
-        self.register_handler(ActionType.SET_QUALITY, self._handle_set_quality)
-        self.register_handler(ActionType.CREATE_PLAYLIST, self._handle_create_playlist)
-        self.register_handler(ActionType.ADD_TO_PLAYLIST, self._handle_add_to_playlist)
-        self.register_handler(ActionType.SAVE_PLAYLIST, self._handle_save_playlist)
-        self.register_handler(ActionType.OPEN_PLAYLIST, self._handle_open_playlist)
-        self.register_handler(ActionType.PLAY_PLAYLIST, self._handle_play_playlist)
-        self.register_handler(ActionType.WAIT_FOR_NAVIGATION, self._handle_wait_for_navigation)
-        self.register_handler(ActionType.RETRY_ACTION, self._handle_retry_action)
-        self.register_handler(ActionType.SCROLL_UNTIL_FOUND, self._handle_scroll_until_found)
+        (ActionType.PLAY_VIDEO, "_handle_play_video"),
+        (ActionType.PAUSE_VIDEO, "_handle_pause_video"),
+        (ActionType.OPEN_SETTINGS_MENU, "_handle_open_settings_menu"),
+        (ActionType.SET_QUALITY, "_handle_set_quality"),
+        (ActionType.CREATE_PLAYLIST, "_handle_create_playlist"),
+        (ActionType.ADD_TO_PLAYLIST, "_handle_add_to_playlist"),
+        (ActionType.SAVE_PLAYLIST, "_handle_save_playlist"),
+        (ActionType.OPEN_PLAYLIST, "_handle_open_playlist"),
+        (ActionType.PLAY_PLAYLIST, "_handle_play_playlist"),
+        (ActionType.WAIT_FOR_NAVIGATION, "_handle_wait_for_navigation"),
+        (ActionType.RETRY_ACTION, "_handle_retry_action"),
+        (ActionType.SCROLL_UNTIL_FOUND, "_handle_scroll_until_found"),
+        (ActionType.SEQUENCE, "_handle_sequence")
+    )
+    
+    def _register_default_handlers(self):
+        """Register default handlers for common action types."""
+        self.execution_hooks.update(
+            (action_type, getattr(self, name)) for action_type, name in self._DEFAULT_HANDLERS
+        )
     
     def register_handler(self, action_type: Union[str, ActionType], 
                         handler: Callable[[Action, CommandContext], Awaitable[Dict]]):
         """Register a handler for a specific action type."""
-        if isinstance(action_type, ActionType):
-            action_type = action_type.value
-        self.execution_hooks[action_type] = handler
+        self.execution_hooks[ActionType(action_type)] = handler
+    
+    def set_retry_policy(self, action_type: Union[str, ActionType], policy: RetryPolicy):
+        """Override the retry policy for a specific action type."""
+        self.retry_policies[ActionType(action_type)] = policy
     
     async def execute_command(self, session_id: str, command: str) -> TaskResult:
         """
@@ -100,165 +148,259 @@ class EnhancedTaskExecutor:
         try:
             context = context_manager.load_context(session_id)
         except Exception as e:
-            logger.error(f"Error loading context for session {session_id}: {e}")
+            logger.error("Error loading context for session %s: %s", session_id, e)
             context = context_manager.create_session(session_id)
         
         # Analyze command complexity
         complexity = command_analyzer.analyze_complexity(command)
-        logger.info(f"Command complexity: {complexity}")
+        logger.info("Command complexity: %s", complexity)
         
         # Create a task ID
-        task_id = f"{session_id}_{int(datetime.utcnow().timestamp())}"
+        # Nanosecond suffix: unique even for commands issued within the same second
+        task_id = f"{session_id}_{time.time_ns()}"
         
         if complexity == CommandComplexity.SIMPLE:
             # For simple commands, execute directly
-            actions = await self._plan_actions(command, context)
-            return await self._execute_task(task_id, actions, context)
+            all_actions = await self._plan_actions(command, context)
         else:
             # For complex commands, break them down
             subtasks = command_analyzer.split_into_subtasks(command)
-            logger.info(f"Command broken down into {len(subtasks)} sub-tasks")
+            logger.info("Command broken down into %d sub-tasks", len(subtasks))
             
             all_actions = []
             for i, subtask in enumerate(subtasks, 1):
-                logger.info(f"Planning sub-task {i}/{len(subtasks)}: {subtask['command']}")
+                logger.info("Planning sub-task %d/%d: %s", i, len(subtasks), subtask['command'])
                 actions = await self._plan_actions(subtask["command"], context)
                 all_actions.extend(actions)
                 
                 # Update context with the planned actions
-                for action in actions:
-                    context_manager.add_action(action.dict())
-            
-            # Execute all actions as a single task
-            return await self._execute_task(task_id, all_actions, context)
+                context_manager.add_actions([action.dict() for action in actions])
+        
+        # Execute all actions as a single task
+        return await self._execute_task(task_id, all_actions, context)
     
     async def _plan_actions(self, command: str, context: CommandContext) -> List[Action]:
         """Convert a command into a list of actions."""
         # TODO: Integrate with your existing LLM planner
         # For now, return a simple action
         from .llm_planner import plan_actions  # Import here to avoid circular imports
-        return [Action(**action) for action in plan_actions(command)]
+        if self.trust_planner_output:
+            return construct_actions(plan_actions(command))
+        return ACTIONS_ADAPTER.validate_python(plan_actions(command))
     
     async def _execute_task(self, task_id: str, actions: List[Action], 
                           context: CommandContext) -> TaskResult:
-        """Execute a list of actions as a task."""
+        """Execute a list of actions as a task, starting each step once its dependencies complete."""
         task_steps = [TaskStep(action=action) for action in actions]
+        
+        # Bind handlers up front so an unsupported action fails the task before any step runs
+        for step in task_steps:
+            step.handler = self.execution_hooks.get(step.action.action)
+            if step.handler is None:
+                error_msg = f"No handler registered for action type: {step.action.action}"
+                logger.error(error_msg)
+                return TaskResult(
+                    task_id=task_id,
+                    status=TaskStatus.FAILED,
+                    steps_completed=0,
+                    total_steps=len(task_steps),
+                    error=error_msg
+                )
+        
+        # Only in-flight tasks are kept; results carry their own serialized steps
         self.tasks[task_id] = task_steps
+        try:
+            return await self._run_task_steps(task_id, task_steps, context)
+        finally:
+            del self.tasks[task_id]
+    
+    async def _run_task_steps(self, task_id: str, task_steps: List[TaskStep],
+                              context: CommandContext) -> TaskResult:
+        """Run the steps of a task in dependency order."""
+        # A step without explicit dependencies follows the previous one
+        step_deps = [
+            step.depends_on if step.depends_on is not None else ([i - 1] if i else [])
+            for i, step in enumerate(task_steps)
+        ]
+        errors: List[str] = []
         
-        results = []
+        async def run_step(i: int):
+            try:
+                await self._run_step(i, task_steps, context)
+            except Exception as e:
+                errors.append(f"Step {i + 1} failed: {e}")
+                raise
         
-        for i, step in enumerate(task_steps, 1):
-            step.status = TaskStatus.RUNNING
-            
-            # Check dependencies
-            for dep_idx in step.depends_on:
-                if dep_idx >= 0 and dep_idx < len(task_steps):
-                    dep_step = task_steps[dep_idx]
-                    if dep_step.status != TaskStatus.COMPLETED:
-                        error_msg = f"Dependency {dep_idx} not completed for step {i}"
-                        logger.error(error_msg)
-                        step.status = TaskStatus.FAILED
-                        step.error = error_msg
-                        
-                        return TaskResult(
-                            task_id=task_id,
-                            status=TaskStatus.FAILED,
-                            steps_completed=i-1,
-                            total_steps=len(task_steps),
-                            error=error_msg
-                        )
+        try:
+            if all(deps == ([i - 1] if i else []) for i, deps in enumerate(step_deps)):
+                # Pure chain (the usual planner output): run the steps in order
+                for i in range(len(task_steps)):
+                    await run_step(i)
+            elif not any(step_deps):
+                # No dependencies at all: start every step at once
+                async with asyncio.TaskGroup() as tg:
+                    for i in range(len(task_steps)):
+                        tg.create_task(run_step(i))
+            else:
+                await self._run_dependency_graph(step_deps, run_step)
+        except Exception:
+            # A step ran out of retries; any steps still running have been cancelled
+            await self._flush_save(context_manager.current_session_id)
             
-            # Execute the step with retries
-            while step.attempt < self.max_retries:
-                try:
-                    logger.info(f"Executing step {i}/{len(task_steps)}: {step.action.action}")
-                    
-                    # Get the appropriate handler
-                    action_type = step.action.action
-                    handler = self.execution_hooks.get(action_type.value)
-                    
-                    if not handler:
-                        raise ValueError(f"No handler registered for action type: {action_type}")
-                    
-                    # Execute the handler with context
-                    result = await handler(step.action, context)
-                    
-                    # Update step status and context
-                    step.status = TaskStatus.COMPLETED
-                    step.result = result
-                    results.append(result)
-                    
-                    # Update context with the completed action
-                    context_manager.add_action(step.action.dict(), result)
-                    
-                    # Save context after successful step
-                    context_manager.save_context()
-                    
-                    break
-                    
-                except Exception as e:
-                    step.attempt += 1
-                    step.error = str(e)
-                    
-                    if step.attempt >= self.max_retries:
-                        step.status = TaskStatus.FAILED
-                        logger.error(f"Step {i} failed after {self.max_retries} attempts: {e}")
-                        
-                        # Save context before failing
-                        context_manager.save_context()
-                        
-                        return TaskResult(
-                            task_id=task_id,
-                            status=TaskStatus.FAILED,
-                            steps_completed=i-1,
-                            total_steps=len(task_steps),
-                            error=f"Step {i} failed: {e}",
-                            result={"steps": [s.__dict__ for s in task_steps]}
-                        )
-                    
-                    # Wait before retrying
-                    step.status = TaskStatus.RETRYING
-                    logger.warning(f"Step {i} failed (attempt {step.attempt}/{self.max_retries}), retrying...")
-                    await asyncio.sleep(self.retry_delay)
+            return TaskResult(
+                task_id=task_id,
+                status=TaskStatus.FAILED,
+                steps_completed=sum(s.status == TaskStatus.COMPLETED for s in task_steps),
+                total_steps=len(task_steps),
+                error=errors[0],
+                result={"steps": [_dump_step(s) for s in task_steps]}
+            )
+        
+        # Steps left over were waiting on a dependency cycle
+        blocked = [i + 1 for i, s in enumerate(task_steps) if s.status != TaskStatus.COMPLETED]
+        if blocked:
+            error_msg = f"Dependencies not completed for steps {blocked}"
+            logger.error(error_msg)
+            return TaskResult(
+                task_id=task_id,
+                status=TaskStatus.FAILED,
+                steps_completed=len(task_steps) - len(blocked),
+                total_steps=len(task_steps),
+                error=error_msg
+            )
         
         # All steps completed successfully
-        context_manager.save_context()
+        await self._flush_save(context_manager.current_session_id)
         return TaskResult(
             task_id=task_id,
             status=TaskStatus.COMPLETED,
             steps_completed=len(task_steps),
             total_steps=len(task_steps),
-            result={"steps": [s.__dict__ for s in task_steps]}
+            result={"steps": [_dump_step(s) for s in task_steps]}
         )
     
+    async def _run_dependency_graph(self, step_deps: List[List[int]],
+                                    run_step: Callable[[int], Awaitable[None]]):
+        """Start each step as soon as its last dependency completes."""
+        dependents: List[List[int]] = [[] for _ in step_deps]
+        indegree = [0] * len(step_deps)
+        for i, depends_on in enumerate(step_deps):
+            for dep_idx in set(depends_on):
+                if 0 <= dep_idx < len(step_deps) and dep_idx != i:
+                    dependents[dep_idx].append(i)
+                    indegree[i] += 1
+        
+        async def run(i: int, tg: asyncio.TaskGroup):
+            await run_step(i)
+            
+            # Release dependents whose last dependency just completed
+            for j in dependents[i]:
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    tg.create_task(run(j, tg))
+        
+        async with asyncio.TaskGroup() as tg:
+            for i in range(len(step_deps)):
+                if indegree[i] == 0:
+                    tg.create_task(run(i, tg))
+    
+    async def _run_step(self, index: int, task_steps: List[TaskStep], context: CommandContext):
+        """Run one step with retries; raises the last error once retries are exhausted."""
+        step = task_steps[index]
+        i = index + 1
+        step.status = TaskStatus.RUNNING
+        policy = self.retry_policies.get(step.action.action, self.default_retry_policy)
+        
+        # Execute the step with retries
+        while True:
+            try:
+                logger.info("Executing step %d/%d: %s", i, len(task_steps), step.action.action)
+                
+                # Execute the handler with context
+                result = await step.handler(step.action, context)
+                
+                # Update step status and context
+                step.status = TaskStatus.COMPLETED
+                step.result = result
+                
+                # Update context with the completed action
+                context_manager.add_action(step.action.dict(), result)
+                
+                # Save context after successful step (debounced)
+                self._schedule_save(context_manager.current_session_id)
+                return
+                
+            except Exception as e:
+                step.attempt += 1
+                step.error = str(e)
+                
+                if step.attempt >= policy.max_retries:
+                    step.status = TaskStatus.FAILED
+                    logger.error("Step %d failed after %d attempts: %s", i, policy.max_retries, e)
+                    raise
+                
+                # Back off exponentially with jitter before retrying. This must stay an
+                # awaited sleep: time.sleep here would stall every step on the event loop
+                step.status = TaskStatus.RETRYING
+                logger.warning("Step %d failed (attempt %d/%d), retrying...", i, step.attempt, policy.max_retries)
+                await asyncio.sleep(policy.delay_for(step.attempt))
+    
+    def _schedule_save(self, session_id: str):
+        """Save the session's context shortly, coalescing saves from steps that finish close together."""
+        if session_id not in self._pending_saves:
+            self._pending_saves[session_id] = asyncio.create_task(self._delayed_save(session_id))
+    
+    async def _delayed_save(self, session_id: str):
+        await asyncio.sleep(self.save_debounce)
+        self._pending_saves.pop(session_id, None)
+        try:
+            await context_manager.save_context(session_id)
+        except Exception as e:
+            logger.error("Error saving context for session %s: %s", session_id, e)
+    
+    async def _flush_save(self, session_id: str):
+        """Save the session's context now, replacing any pending delayed save."""
+        pending = self._pending_saves.pop(session_id, None)
+        if pending is not None:
+            pending.cancel()
+        await context_manager.save_context(session_id)
+    
     # Handler implementations
     async def _handle_open_url(self, action: Action, context: CommandContext) -> Dict:
-        logger.info(f"Opening URL: {action.url}")
+        logger.info("Opening URL: %s", action.url)
         # TODO: Implement actual URL opening logic
         context_manager.update_tab_state(action.url, "Loading...")
         return {"status": "success", "url": action.url}
     
     async def _handle_type_text(self, action: Action, context: CommandContext) -> Dict:
-        logger.info(f"Typing text: {action.text}")
+        logger.info("Typing text: %s", action.text)
         # TODO: Implement actual text typing logic
         return {"status": "success", "text_entered": action.text}
     
     async def _handle_click_element(self, action: Action, context: CommandContext) -> Dict:
-        logger.info(f"Clicking element: {action.selector}")
+        logger.info("Clicking element: %s", action.selector)
         # TODO: Implement actual element clicking logic
         return {"status": "success", "element_clicked": action.selector}
     
     async def _handle_key_press(self, action: Action, context: CommandContext) -> Dict:
-        logger.info(f"Pressing key: {action.key}")
+        logger.info("Pressing key: %s", action.key)
         # TODO: Implement actual key press logic
         return {"status": "success", "key_pressed": action.key}
     
     async def _handle_wait_for_element(self, action: Action, context: CommandContext) -> Dict:
-        logger.info(f"Waiting for element: {action.selector}")
+        logger.info("Waiting for element: %s", action.selector)
         # TODO: Implement actual wait logic
         await asyncio.sleep(action.timeout_ms / 1000)
         return {"status": "success", "element_found": True}
     
+    async def _handle_scroll_page(self, action: Action, context: CommandContext) -> Dict:
+        logger.info("Scrolling %s by %s", action.direction, action.amount)
+        # TODO: Implement actual scrolling logic
+        return {"status": "success", "action": "scroll_page", "direction": action.direction, "amount": action.amount}
+    
+    async def _handle_sequence(self, action: Action, context: CommandContext) -> Dict:
+        return await run_sequence(action, self.execution_hooks.get, context)
+    
     # Phase 4 action handlers - implement these with actual logic
     async def _handle_play_video(self, action: Action, context: CommandContext) -> Dict:
         logger.info("Playing video")
@@ -273,15 +415,15 @@ class EnhancedTaskExecutor:
         return {"status": "success", "action": "open_settings_menu"}
     
     async def _handle_set_quality(self, action: Action, context: CommandContext) -> Dict:
-        logger.info(f"Setting video quality to: {action.quality}")
+        logger.info("Setting video quality to: %s", action.quality)
         return {"status": "success", "action": "set_quality", "quality": action.quality}
     
     async def _handle_create_playlist(self, action: Action, context: CommandContext) -> Dict:
-        logger.info(f"Creating playlist: {action.playlist_name}")
+        logger.info("Creating playlist: %s", action.playlist_name)
         return {"status": "success", "action": "create_playlist", "name": action.playlist_name}
     
     async def _handle_add_to_playlist(self, action: Action, context: CommandContext) -> Dict:
-        logger.info(f"Adding to playlist: {action.playlist_name}")
+        logger.info("Adding to playlist: %s", action.playlist_name)
         return {"status": "success", "action": "add_to_playlist", "item": action.playlist_item}
     
     async def _handle_save_playlist(self, action: Action, context: CommandContext) -> Dict:
@@ -289,11 +431,11 @@ class EnhancedTaskExecutor:
         return {"status": "success", "action": "save_playlist"}
     
     async def _handle_open_playlist(self, action: Action, context: CommandContext) -> Dict:
-        logger.info(f"Opening playlist: {action.playlist_name}")
+        logger.info("Opening playlist: %s", action.playlist_name)
         return {"status": "success", "action": "open_playlist", "name": action.playlist_name}
     
     async def _handle_play_playlist(self, action: Action, context: CommandContext) -> Dict:
-        logger.info(f"Playing playlist: {action.playlist_name}")
+        logger.info("Playing playlist: %s", action.playlist_name)
         return {"status": "success", "action": "play_playlist", "name": action.playlist_name}
     
     async def _handle_wait_for_navigation(self, action: Action, context: CommandContext) -> Dict:
@@ -306,7 +448,7 @@ class EnhancedTaskExecutor:
         return {"status": "success", "action": "retry_action"}
     
     async def _handle_scroll_until_found(self, action: Action, context: CommandContext) -> Dict:
-        logger.info(f"Scrolling until element is found: {action.selector}")
+        logger.info("Scrolling until element is found: %s", action.selector)
         return {"status": "success", "action": "scroll_until_found", "selector": action.selector}
 
 # Global task executor instance
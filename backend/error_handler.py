@@ -5,7 +5,10 @@ Provides intelligent error detection, analysis, and recovery strategies.
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+import re
+from collections import Counter, deque
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 from enum import Enum
 
 logger = logging.getLogger(__name__)
@@ -28,9 +31,9 @@ class RecoveryStrategy(str, Enum):
     REPLAN = "replan"
     ABORT = "abort"
 
-# Alternative selectors for common elements
+# Alternative selectors for common elements, as tuples so they can be shared and sliced cheaply
 ALTERNATIVE_SELECTORS = {
-    "search": [
+    "search": (
         "input[type='search']",
         "input[type='text']",
         "input[name='q']",
@@ -41,8 +44,8 @@ ALTERNATIVE_SELECTORS = {
         "textarea[name='q']",
         "input[placeholder*='search' i]",
         "input[aria-label*='search' i]"
-    ],
-    "submit": [
+    ),
+    "submit": (
         "button[type='submit']",
         "input[type='submit']",
         "button[type='button']",
@@ -54,8 +57,8 @@ ALTERNATIVE_SELECTORS = {
         "button[id*='search']",
         "[role='button'][class*='submit']",
         "[role='button'][class*='search']"
-    ],
-    "login": [
+    ),
+    "login": (
         "button[type='submit']",
         "input[type='submit']",
         "button:has([class*='login'])",
@@ -66,8 +69,8 @@ ALTERNATIVE_SELECTORS = {
         "a[class*='signin']",
         "button[id*='login']",
         "button[id*='signin']"
-    ],
-    "play": [
+    ),
+    "play": (
         "button[aria-label*='play' i]",
         "button[class*='play']",
         "button[id*='play']",
@@ -75,8 +78,8 @@ ALTERNATIVE_SELECTORS = {
         "button:has([class*='play'])",
         ".play-button",
         ".ytp-play-button"
-    ],
-    "accept": [
+    ),
+    "accept": (
         "button:has([class*='accept'])",
         "button:has([class*='agree'])",
         "button[class*='accept']",
@@ -85,36 +88,69 @@ ALTERNATIVE_SELECTORS = {
         "button[id*='agree']",
         "button[aria-label*='accept' i]",
         "button[aria-label*='agree' i]"
-    ]
+    )
 }
 
+# Strategies that mean recovery failed
+_UNSUCCESSFUL = frozenset({RecoveryStrategy.REPLAN, RecoveryStrategy.ABORT})
+
+# Finds every category name in a selector in one scan (the names never overlap)
+_CATEGORY_RE = re.compile("|".join(map(re.escape, ALTERNATIVE_SELECTORS)))
+# Earlier categories win when a selector names several
+_CATEGORY_RANK = {category: rank for rank, category in enumerate(ALTERNATIVE_SELECTORS)}
+
+# Every keyword that points at a category, including synonyms of its name
+_CATEGORY_KEYWORDS = {
+    "search": ("search",),
+    "submit": ("submit",),
+    "login": ("login", "signin"),
+    "play": ("play",),
+    "accept": ("accept", "agree")
+}
+KEYWORD_INDEX: Dict[str, Tuple[str, ...]] = {
+    keyword: ALTERNATIVE_SELECTORS[category]
+    for category, keywords in _CATEGORY_KEYWORDS.items() for keyword in keywords
+}
+_KEYWORD_RE = re.compile("|".join(map(re.escape, KEYWORD_INDEX)))
+_KEYWORD_RANK = {
+    keyword: _CATEGORY_RANK[category]
+    for category, keywords in _CATEGORY_KEYWORDS.items() for keyword in keywords
+}
+
+@lru_cache(maxsize=512)
+def _classify_error_message(error_msg: str) -> "ErrorType":
+    """Classify a lowercased error message; messages repeat a lot, so results are cached."""
+    if "not found" in error_msg or "element not found" in error_msg:
+        return ErrorType.ELEMENT_NOT_FOUND
+    elif "not visible" in error_msg or "element not visible" in error_msg:
+        return ErrorType.ELEMENT_NOT_VISIBLE
+    elif "disabled" in error_msg or "element is disabled" in error_msg:
+        return ErrorType.ELEMENT_DISABLED
+    elif "timeout" in error_msg or "timed out" in error_msg:
+        return ErrorType.TIMEOUT
+    elif "page not loaded" in error_msg or "loading" in error_msg:
+        return ErrorType.PAGE_NOT_LOADED
+    elif "invalid selector" in error_msg or "selector" in error_msg and "invalid" in error_msg:
+        return ErrorType.SELECTOR_INVALID
+    elif "network" in error_msg or "connection" in error_msg:
+        return ErrorType.NETWORK_ERROR
+    else:
+        return ErrorType.UNKNOWN_ERROR
+
 class ErrorHandler:
     """Handles error detection and recovery strategies."""
     
-    def __init__(self):
-        self.error_history = []
+    def __init__(self, history_size: int = 1000):
+        # Bounded history; summary counters are kept in step with it as entries come and go
+        self.error_history = deque(maxlen=history_size)
+        self._error_counts = Counter()
+        self._strategy_counts = Counter()
+        self._successful_recoveries = 0
         self.max_retries = 3
         
     def classify_error(self, error_result: Dict[str, Any]) -> ErrorType:
         """Classify the type of error from the result."""
-        error_msg = error_result.get("error", "").lower()
-        
-        if "not found" in error_msg or "element not found" in error_msg:
-            return ErrorType.ELEMENT_NOT_FOUND
-        elif "not visible" in error_msg or "element not visible" in error_msg:
-            return ErrorType.ELEMENT_NOT_VISIBLE
-        elif "disabled" in error_msg or "element is disabled" in error_msg:
-            return ErrorType.ELEMENT_DISABLED
-        elif "timeout" in error_msg or "timed out" in error_msg:
-            return ErrorType.TIMEOUT
-        elif "page not loaded" in error_msg or "loading" in error_msg:
-            return ErrorType.PAGE_NOT_LOADED
-        elif "invalid selector" in error_msg or "selector" in error_msg and "invalid" in error_msg:
-            return ErrorType.SELECTOR_INVALID
-        elif "network" in error_msg or "connection" in error_msg:
-            return ErrorType.NETWORK_ERROR
-        else:
-            return ErrorType.UNKNOWN_ERROR
+        return _classify_error_message(error_result.get("error", "").lower())
     
     def get_recovery_strategy(self, error_type: ErrorType, action: Dict[str, Any], 
                             attempt_count: int = 0) -> RecoveryStrategy:
@@ -171,9 +207,8 @@ class ErrorHandler:
         selector_lower = selector.lower()
         
         # Check if selector matches any of our known patterns
-        for category, alternatives in ALTERNATIVE_SELECTORS.items():
-            if any(keyword in selector_lower for keyword in [category, "search", "submit", "login", "play", "accept"]):
-                return True
+        if _CATEGORY_RE.search(selector_lower):
+            return True
         
         # Check action-specific alternatives
         if action_type == "typeText" and ("input" in selector_lower or "textarea" in selector_lower):
@@ -193,7 +228,7 @@ class ErrorHandler:
         logger.info(f"Error: {error_type}, Strategy: {strategy}, Attempt: {attempt_count}")
         
         # Record error for learning
-        self.error_history.append({
+        self._record_error({
             "error_type": error_type,
             "strategy": strategy,
             "action": action,
@@ -215,6 +250,29 @@ class ErrorHandler:
         else:
             return action  # Return original action as fallback
     
+    def _record_error(self, error: Dict[str, Any]):
+        """Append an error to the history, evicting the oldest one once it is full."""
+        if len(self.error_history) == self.error_history.maxlen:
+            self._update_counts(self.error_history.popleft(), -1)
+        self.error_history.append(error)
+        self._update_counts(error, 1)
+    
+    def _update_counts(self, error: Dict[str, Any], sign: int):
+        """Add (sign=1) or remove (sign=-1) an error from the summary counters."""
+        error_type = error["error_type"]
+        strategy = error["strategy"]
+        
+        self._error_counts[error_type] += sign
+        if not self._error_counts[error_type]:
+            del self._error_counts[error_type]
+        self._strategy_counts[strategy] += sign
+        if not self._strategy_counts[strategy]:
+            del self._strategy_counts[strategy]
+        
+        # Successful recoveries are errors that didn't lead to abort/replan
+        if strategy not in _UNSUCCESSFUL:
+            self._successful_recoveries += sign
+    
     def _apply_fallback_selector(self, action: Dict[str, Any]) -> Dict[str, Any]:
         """Apply alternative selector to the action."""
         original_selector = action.get("selector", "")
@@ -235,24 +293,38 @@ class ErrorHandler:
         return action
     
     def _apply_scroll_and_retry(self, action: Dict[str, Any]) -> Dict[str, Any]:
-        """Add scroll action before retrying the original action."""
+        """Scroll, then retry the action, as a single sequence action."""
         return {
-            "action": "scrollPage",
-            "direction": "down",
-            "amount": 500,
-            "recovery_reason": "Scrolling to find element",
-            "followed_by": action
+            "action": "sequence",
+            "steps": [
+                {"action": "scrollPage", "direction": "down", "amount": 500},
+                self.retry_with_longer_timeout(action)
+            ],
+            "recovery_reason": "Scrolling to find element"
         }
     
     def _apply_wait_and_retry(self, action: Dict[str, Any]) -> Dict[str, Any]:
-        """Add wait action before retrying the original action."""
+        """Wait, then retry the action, as a single sequence action."""
+        # Wait up to 2 seconds for the action's element, or for the page without one
+        if action.get("selector"):
+            wait = {"action": "waitForElement", "selector": action["selector"], "timeout_ms": 2000}
+        else:
+            wait = {"action": "waitForNavigation", "timeout_ms": 2000}
         return {
-            "action": "wait",
-            "duration": 2000,  # 2 seconds
-            "recovery_reason": "Waiting for element to load",
-            "followed_by": action
+            "action": "sequence",
+            "steps": [
+                wait,
+                self.retry_with_longer_timeout(action)
+            ],
+            "recovery_reason": "Waiting for element to load"
         }
     
+    def retry_with_longer_timeout(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of the action with its timeout increased by 50% for the retry."""
+        retry_action = action.copy()
+        retry_action["timeout"] = action.get("timeout", 10000) * 1.5
+        return retry_action
+    
     def _apply_retry_with_alternatives(self, action: Dict[str, Any]) -> Dict[str, Any]:
         """Retry the action with enhanced timeout and fallback options."""
         new_action = action.copy()
@@ -270,30 +342,25 @@ class ErrorHandler:
             "requires_llm": True
         }
     
-    def _get_alternative_selectors(self, selector: str, action_type: str) -> List[str]:
+    def _get_alternative_selectors(self, selector: str, action_type: str) -> Tuple[str, ...]:
         """Get alternative selectors for a given selector and action type."""
         selector_lower = selector.lower()
         
         # Check against known patterns
-        for category, alternatives in ALTERNATIVE_SELECTORS.items():
-            if category in selector_lower:
-                return alternatives
+        categories = _CATEGORY_RE.findall(selector_lower)
+        if categories:
+            return KEYWORD_INDEX[min(categories, key=_CATEGORY_RANK.__getitem__)]
         
         # Action-specific alternatives
         if action_type == "typeText":
-            return ALTERNATIVE_SELECTORS.get("search", [])
+            return ALTERNATIVE_SELECTORS["search"]
         elif action_type == "clickElement":
-            # Determine which category based on selector content
-            if "submit" in selector_lower:
-                return ALTERNATIVE_SELECTORS.get("submit", [])
-            elif "login" in selector_lower or "signin" in selector_lower:
-                return ALTERNATIVE_SELECTORS.get("login", [])
-            elif "play" in selector_lower:
-                return ALTERNATIVE_SELECTORS.get("play", [])
-            elif "accept" in selector_lower or "agree" in selector_lower:
-                return ALTERNATIVE_SELECTORS.get("accept", [])
+            # Determine which category based on selector content, synonyms included
+            keywords = _KEYWORD_RE.findall(selector_lower)
+            if keywords:
+                return KEYWORD_INDEX[min(keywords, key=_KEYWORD_RANK.__getitem__)]
         
-        return []
+        return ()
     
     def should_abort(self, error_result: Dict[str, Any], attempt_count: int) -> bool:
         """Determine if the task should be aborted due to persistent errors."""
@@ -315,20 +382,10 @@ class ErrorHandler:
         if not self.error_history:
             return {"total_errors": 0}
         
-        error_counts = {}
-        strategy_counts = {}
-        
-        for error in self.error_history:
-            error_type = error["error_type"]
-            strategy = error["strategy"]
-            
-            error_counts[error_type] = error_counts.get(error_type, 0) + 1
-            strategy_counts[strategy] = strategy_counts.get(strategy, 0) + 1
-        
         return {
             "total_errors": len(self.error_history),
-            "error_types": error_counts,
-            "strategies_used": strategy_counts,
+            "error_types": dict(self._error_counts),
+            "strategies_used": dict(self._strategy_counts),
             "success_rate": self._calculate_success_rate()
         }
     
@@ -337,13 +394,7 @@ class ErrorHandler:
         if not self.error_history:
             return 0.0
         
-        # Count successful recoveries (errors that didn't lead to abort/replan)
-        successful_recoveries = 0
-        for error in self.error_history:
-            if error["strategy"] not in [RecoveryStrategy.REPLAN, RecoveryStrategy.ABORT]:
-                successful_recoveries += 1
-        
-        return (successful_recoveries / len(self.error_history)) * 100
+        return (self._successful_recoveries / len(self.error_history)) * 100
 
 # Global error handler instance
 error_handler = ErrorHandler()
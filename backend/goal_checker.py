@@ -6,13 +6,119 @@ Provides intelligent assessment of task completion.
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 from goal_engine import Goal, TaskGraph, Subgoal
 import re
 import json
+from types import MappingProxyType
 
 logger = logging.getLogger(__name__)
 
+# Numerical requirements in success conditions, found in a single scan. Group 1
+# is "top N"; groups 2-6 are count phrasings, where earlier phrasings take
+# precedence. "top"/"at least"/"minimum" only look ahead at the number so it can
+# still match a following "N items"
+_REQUIREMENTS_RE = re.compile(
+    r'top\s+(?=(\d+))'
+    r'|(\d+)\s+items?'
+    r'|(\d+)\s+results?'
+    r'|(\d+)\s+listings?'
+    r'|at\s+least\s+(?=(\d+))'
+    r'|minimum\s+(?=(\d+))',
+    re.IGNORECASE
+)
+
+# Keywords the criteria/condition checks branch on. The lookahead matches at every
+# position, so keywords sharing letters (e.g. "navigatextract") are all found
+_KEYWORD_RE = re.compile(
+    r'(?=(navigate|search|extract|relevant|complete|comprehensive))', re.IGNORECASE
+)
+
+# Words for goal alignment; punctuation (e.g. from str() of a dict result) is not
+# part of a word
+_WORD_RE = re.compile(r'\w+')
+
+# Shared stand-in for missing sub-dicts of the execution state
+_EMPTY = MappingProxyType({})
+
+# Fixed check results, shared read-only instead of rebuilt on every call
+_MET_NAVIGATION = MappingProxyType({"met": True, "reason": "Navigation successful"})
+_MET_SEARCH = MappingProxyType({"met": True, "reason": "Search functionality found"})
+_MET_SUBGOAL = MappingProxyType({"met": True, "reason": "Subgoal completed successfully"})
+_MET_CONDITIONS = MappingProxyType({"met": True, "reason": "All success conditions met"})
+_MET_QUALITATIVE = MappingProxyType({"met": True, "reason": "Qualitative requirements met"})
+
+def _find_keywords(text: str) -> set:
+    """Return the lowercased keywords present in text, in one scan."""
+    return {match.lower() for match in _KEYWORD_RE.findall(text)}
+
+@lru_cache(maxsize=512)
+def _parse_numerical_requirements(condition: str) -> Tuple[Tuple[str, int], ...]:
+    """Parse numerical requirements; conditions are re-checked every step, so results are cached."""
+    requirements = []
+    
+    # The first "top N" wins; for counts, the leftmost match of the
+    # highest-precedence phrasing wins
+    top = None
+    count = None
+    for match in _REQUIREMENTS_RE.finditer(condition):
+        if match.lastindex == 1:
+            if top is None:
+                top = match
+        elif count is None or match.lastindex < count.lastindex:
+            count = match
+    
+    if top:
+        requirements.append(("top", int(top.group(1))))
+    if count:
+        requirements.append(("count", int(count.group(count.lastindex))))
+    
+    return tuple(requirements)
+
+def _check_navigation(execution_state: Dict[str, Any]) -> Dict[str, Any]:
+    """Criteria check for navigation subgoals."""
+    dom_state = execution_state.get("dom_state") or _EMPTY
+    if dom_state.get("url") and dom_state["url"] != "about:blank":
+        return _MET_NAVIGATION
+    return {
+        "met": False,
+        "reason": "Navigation not completed",
+        "suggestions": ["Wait for page to load", "Check network connection"]
+    }
+
+def _check_search(execution_state: Dict[str, Any]) -> Dict[str, Any]:
+    """Criteria check for search subgoals."""
+    dom_state = execution_state.get("dom_state") or _EMPTY
+    if (dom_state.get("specialElements") or _EMPTY).get("searchInputs"):
+        return _MET_SEARCH
+    return {
+        "met": False,
+        "reason": "Search functionality not found",
+        "suggestions": ["Try alternative search selectors", "Scroll to find search bar"]
+    }
+
+def _check_extraction(execution_state: Dict[str, Any]) -> Dict[str, Any]:
+    """Criteria check for extraction subgoals."""
+    extracted_data = execution_state.get("extracted_data", [])
+    if extracted_data:
+        return {
+            "met": True,
+            "reason": f"Extracted {len(extracted_data)} items"
+        }
+    return {
+        "met": False,
+        "reason": "No data extracted",
+        "suggestions": ["Check element selectors", "Wait for content to load"]
+    }
+
+# Criteria checks by keyword; when criteria mention several, the first listed wins
+_CRITERIA_CHECKS = {
+    "navigate": _check_navigation,
+    "search": _check_search,
+    "extract": _check_extraction
+}
+
 class GoalCompletionChecker:
     """Checks if goals and subgoals have been completed successfully."""
     
@@ -43,6 +149,11 @@ class GoalCompletionChecker:
                 r"section\s+accessed"
             ]
         }
+        # Compile once; matching is case-insensitive
+        self.completion_patterns = {
+            category: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+            for category, patterns in self.completion_patterns.items()
+        }
     
     def check_goal_completion(self, goal: Goal, task_graph: TaskGraph, 
                             execution_state: Dict[str, Any]) -> Dict[str, Any]:
@@ -57,12 +168,14 @@ class GoalCompletionChecker:
         Returns:
             Dict containing completion status and details
         """
+        progress = task_graph.get_progress()
+        
         # Check if all subgoals are completed
         if not task_graph.is_complete():
             return {
                 "completed": False,
                 "reason": "Not all subgoals completed",
-                "progress": task_graph.get_progress()
+                "progress": progress
             }
         
         # Check success condition
@@ -75,7 +188,7 @@ class GoalCompletionChecker:
             return {
                 "completed": False,
                 "reason": f"Success condition not met: {success_check['reason']}",
-                "progress": task_graph.get_progress()
+                "progress": progress
             }
         
         # Validate result quality
@@ -86,8 +199,8 @@ class GoalCompletionChecker:
             "reason": "Goal completed successfully",
             "quality_score": quality_check["score"],
             "quality_details": quality_check["details"],
-            "progress": task_graph.get_progress(),
-            "execution_summary": self._generate_execution_summary(task_graph, execution_state)
+            "progress": progress,
+            "execution_summary": self._generate_execution_summary(progress, execution_state)
         }
     
     def check_subgoal_completion(self, subgoal: Subgoal, 
@@ -156,17 +269,13 @@ class GoalCompletionChecker:
         if not qualitative_check["met"]:
             return qualitative_check
         
-        return {
-            "met": True,
-            "reason": "All success conditions met"
-        }
+        return _MET_CONDITIONS
     
     def _evaluate_success_criteria(self, criteria: str, 
                                  execution_state: Dict[str, Any]) -> Dict[str, Any]:
         """Evaluate success criteria for a subgoal."""
         # Similar to success condition evaluation but more specific
-        dom_state = execution_state.get("dom_state", {})
-        last_action_result = execution_state.get("last_action_result", {})
+        last_action_result = execution_state.get("last_action_result") or _EMPTY
         
         # Check if the action was successful
         if not last_action_result.get("ok", False):
@@ -177,85 +286,25 @@ class GoalCompletionChecker:
             }
         
         # Check for expected elements in DOM
-        if "navigate" in criteria.lower():
-            if dom_state.get("url") and dom_state["url"] != "about:blank":
-                return {
-                    "met": True,
-                    "reason": "Navigation successful"
-                }
-            else:
-                return {
-                    "met": False,
-                    "reason": "Navigation not completed",
-                    "suggestions": ["Wait for page to load", "Check network connection"]
-                }
-        
-        elif "search" in criteria.lower():
-            if dom_state.get("specialElements", {}).get("searchInputs"):
-                return {
-                    "met": True,
-                    "reason": "Search functionality found"
-                }
-            else:
-                return {
-                    "met": False,
-                    "reason": "Search functionality not found",
-                    "suggestions": ["Try alternative search selectors", "Scroll to find search bar"]
-                }
-        
-        elif "extract" in criteria.lower():
-            extracted_data = execution_state.get("extracted_data", [])
-            if extracted_data:
-                return {
-                    "met": True,
-                    "reason": f"Extracted {len(extracted_data)} items"
-                }
-            else:
-                return {
-                    "met": False,
-                    "reason": "No data extracted",
-                    "suggestions": ["Check element selectors", "Wait for content to load"]
-                }
+        keywords = _find_keywords(criteria)
+        for keyword, check in _CRITERIA_CHECKS.items():
+            if keyword in keywords:
+                return check(execution_state)
         
         # Default success
-        return {
-            "met": True,
-            "reason": "Subgoal completed successfully"
-        }
+        return _MET_SUBGOAL
     
     def _extract_numerical_requirements(self, condition: str) -> Dict[str, int]:
         """Extract numerical requirements from success condition."""
-        requirements = {}
-        
-        # Extract "top N" patterns
-        top_match = re.search(r'top\s+(\d+)', condition.lower())
-        if top_match:
-            requirements["top"] = int(top_match.group(1))
-        
-        # Extract count patterns
-        count_patterns = [
-            r'(\d+)\s+items?',
-            r'(\d+)\s+results?',
-            r'(\d+)\s+listings?',
-            r'at\s+least\s+(\d+)',
-            r'minimum\s+(\d+)'
-        ]
-        
-        for pattern in count_patterns:
-            match = re.search(pattern, condition.lower())
-            if match:
-                requirements["count"] = int(match.group(1))
-                break
-        
-        return requirements
+        return dict(_parse_numerical_requirements(condition))
     
     def _check_qualitative_requirements(self, condition: str, 
                                      execution_state: Dict[str, Any]) -> Dict[str, Any]:
         """Check qualitative requirements in success condition."""
-        condition_lower = condition.lower()
+        keywords = _find_keywords(condition)
         
         # Check for relevance
-        if "relevant" in condition_lower:
+        if "relevant" in keywords:
             # Simple relevance check based on content length and keywords
             collected_data = execution_state.get("collected_data", [])
             if not collected_data or all(len(str(data)) < 10 for data in collected_data):
@@ -265,7 +314,7 @@ class GoalCompletionChecker:
                 }
         
         # Check for completeness
-        if "complete" in condition_lower or "comprehensive" in condition_lower:
+        if "complete" in keywords or "comprehensive" in keywords:
             # Basic completeness check
             results = execution_state.get("results", [])
             if len(results) < 3:  # Arbitrary threshold for completeness
@@ -274,10 +323,7 @@ class GoalCompletionChecker:
                     "reason": "Results may not be comprehensive enough"
                 }
         
-        return {
-            "met": True,
-            "reason": "Qualitative requirements met"
-        }
+        return _MET_QUALITATIVE
     
     def _validate_result_quality(self, goal: Goal, 
                               execution_state: Dict[str, Any]) -> Dict[str, Any]:
@@ -299,9 +345,12 @@ class GoalCompletionChecker:
         else:
             details.append("Low data volume")
         
-        # Check data richness
+        # Check data richness; strings (the usual case) are measured without converting
         if collected_data:
-            rich_data = sum(1 for item in collected_data if len(str(item)) > 50)
+            rich_data = 0
+            for item in collected_data:
+                if (len(item) if isinstance(item, str) else len(str(item))) > 50:
+                    rich_data += 1
             if rich_data >= len(collected_data) * 0.7:
                 quality_score += 25
                 details.append("Rich data content")
@@ -309,9 +358,10 @@ class GoalCompletionChecker:
                 quality_score += 10
                 details.append("Moderate data content")
         
-        # Check goal alignment
-        goal_keywords = set(goal.goal_statement.lower().split())
-        if goal_keywords.intersection(set(str(results).lower())):
+        # Check goal alignment: some result shares a word with the goal statement.
+        # Stops at the first aligned result
+        goal_keywords = frozenset(_WORD_RE.findall(goal.goal_statement.lower()))
+        if any(not goal_keywords.isdisjoint(_WORD_RE.findall(str(result).lower())) for result in results):
             quality_score += 25
             details.append("Good goal alignment")
         else:
@@ -334,9 +384,10 @@ class GoalCompletionChecker:
     def _validate_subgoal_data(self, subgoal: Subgoal, 
                              execution_state: Dict[str, Any]) -> Dict[str, Any]:
         """Validate data for a specific subgoal."""
-        last_action_result = execution_state.get("last_action_result", {})
+        last_action_result = execution_state.get("last_action_result") or _EMPTY
+        keywords = _find_keywords(subgoal.description)
         
-        if "extract" in subgoal.description.lower():
+        if "extract" in keywords:
             extracted_data = last_action_result.get("data", [])
             if extracted_data:
                 return {
@@ -349,8 +400,8 @@ class GoalCompletionChecker:
                     "details": "No data extracted"
                 }
         
-        elif "navigate" in subgoal.description.lower():
-            dom_state = execution_state.get("dom_state", {})
+        elif "navigate" in keywords:
+            dom_state = execution_state.get("dom_state") or _EMPTY
             if dom_state.get("url"):
                 return {
                     "valid": True,
@@ -363,16 +414,15 @@ class GoalCompletionChecker:
                 }
         
         # Default validation
+        ok = last_action_result.get("ok", False)
         return {
-            "valid": last_action_result.get("ok", False),
-            "details": "Action completed successfully" if last_action_result.get("ok") else "Action failed"
+            "valid": ok,
+            "details": "Action completed successfully" if ok else "Action failed"
         }
     
-    def _generate_execution_summary(self, task_graph: TaskGraph, 
+    def _generate_execution_summary(self, progress: Dict[str, Any], 
                                   execution_state: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate a summary of the execution."""
-        progress = task_graph.get_progress()
-        
+        """Generate a summary of the execution from the task graph's progress."""
         return {
             "total_subgoals": progress["total_subgoals"],
             "completed_subgoals": progress["completed"],
@@ -6,14 +6,90 @@ This is the core of Update 4 - making AutoPilot AI a true autonomous agent.
 """
 
 import logging
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+from array import array
+from collections import deque
+from dataclasses import dataclass, replace
 from enum import Enum
+from functools import lru_cache
+import heapq
 import json
 import re
 
 logger = logging.getLogger(__name__)
 
+# Patterns used on every goal, compiled once
+_CONVERSATIONAL_RE = re.compile(r'\b(?:please|can you|could you|i want to|help me)\b', re.IGNORECASE)
+_TOP_RE = re.compile(r'top\s+(\d+)', re.IGNORECASE)
+# Domain aliases; the first domain with an alias in the command wins
+_DOMAINS = {
+    "youtube": ["youtube", "yt"],
+    "linkedin": ["linkedin"],
+    "amazon": ["amazon"],
+    "google": ["google"],
+    "github": ["github"],
+    "twitter": ["twitter", "x.com"],
+    "facebook": ["facebook", "fb"],
+    "instagram": ["instagram", "ig"]
+}
+_DOMAIN_BY_KEYWORD = {keyword: domain for domain, keywords in _DOMAINS.items() for keyword in keywords}
+_DOMAIN_RANK = {domain: rank for rank, domain in enumerate(_DOMAINS)}
+
+# Words that make a goal take more steps, and how many
+_COMPLEXITY_INDICATORS = {
+    "compare": +2,
+    "analyze": +2,
+    "summarize": +1,
+    "list": +1,
+    "multiple": +2,
+    "all": +1,
+    "detailed": +1
+}
+
+def _substring_re(keywords) -> re.Pattern:
+    """Case-insensitive regex reporting every occurrence of the keywords, overlapping ones included."""
+    return re.compile("(?=(" + "|".join(map(re.escape, keywords)) + "))", re.IGNORECASE)
+
+_DOMAIN_KEYWORD_RE = _substring_re(_DOMAIN_BY_KEYWORD)
+_COMPLEXITY_RE = _substring_re(_COMPLEXITY_INDICATORS)
+
+_SEARCH_TERM_RES = [
+    re.compile(pattern) for pattern in (
+        r"search\s+(?:for\s+)?(.+?)(?:\s+on|\s+in|$)",
+        r"find\s+(.+?)(?:\s+on|\s+in|$)",
+        r"look\s+for\s+(.+?)(?:\s+on|\s+in|$)"
+    )
+]
+
+# Subgoal success criteria by description keyword; the first keyword found wins
+_SUBGOAL_CRITERIA = (
+    ("navigate", "Target page loaded successfully"),
+    ("search", "Search executed and results displayed"),
+    ("extract", "Required data extracted successfully"),
+    ("format", "Data properly formatted and structured")
+)
+
+def _subgoal_criteria(description: str) -> str:
+    """Success criteria for a subgoal description."""
+    description_lower = description.lower()
+    for keyword, criteria in _SUBGOAL_CRITERIA:
+        if keyword in description_lower:
+            return criteria
+    
+    return "Subgoal completed successfully"
+
+@lru_cache(maxsize=512)
+def _search_term(goal_statement: str) -> str:
+    """Extract the search term from a goal statement; cached since a goal asks more than once."""
+    # Look for patterns like "Search for X" or "Find X"
+    goal_lower = goal_statement.lower()
+    for pattern in _SEARCH_TERM_RES:
+        match = pattern.search(goal_lower)
+        if match:
+            return match.group(1).strip()
+    
+    return goal_statement
+
 class GoalType(str, Enum):
     SEARCH = "search"
     EXTRACTION = "extraction"
@@ -23,7 +99,7 @@ class GoalType(str, Enum):
     INTERACTION = "interaction"
     MONITORING = "monitoring"
 
-@dataclass
+@dataclass(slots=True)
 class Goal:
     """Represents a high-level user goal."""
     original_command: str
@@ -34,7 +110,7 @@ class Goal:
     estimated_steps: int = 5
     domain: str = "general"
 
-@dataclass
+@dataclass(slots=True)
 class Subgoal:
     """Represents a subgoal in the execution plan."""
     id: str
@@ -51,58 +127,111 @@ class TaskGraph:
         self.subgoals = {sg.id: sg for sg in subgoals}
         self.completed = []
         self.current = None
+        self._validate_dependencies()
         self.execution_order = self._calculate_execution_order()
         
+        # Incremental scheduler state as parallel arrays indexed by execution-order
+        # position: completed flags, unmet dependency counts, and dependents. _ready is
+        # a heap of positions whose dependencies are all completed
+        n = len(self.execution_order)
+        self._position = {subgoal_id: i for i, subgoal_id in enumerate(self.execution_order)}
+        self._done = bytearray(n)
+        self._remaining_deps = array('i', [0]) * n
+        self._children: List[List[int]] = [[] for _ in range(n)]
+        for i, subgoal_id in enumerate(self.execution_order):
+            for dep_id in set(self.subgoals[subgoal_id].dependencies):
+                self._remaining_deps[i] += 1
+                self._children[self._position[dep_id]].append(i)
+        # Ascending, so already a valid heap
+        self._ready = [i for i in range(n) if not self._remaining_deps[i]]
+        # Running counts for get_progress; completed is len(self.completed)
+        self._n_failed = sum(sg.status == "failed" for sg in self.subgoals.values())
+        
+    def _validate_dependencies(self):
+        """Reject dependencies on subgoals that are not part of the graph."""
+        for subgoal_id, subgoal in self.subgoals.items():
+            missing = [dep_id for dep_id in subgoal.dependencies if dep_id not in self.subgoals]
+            if missing:
+                raise ValueError(f"Subgoal {subgoal_id} depends on unknown subgoals: {missing}")
+    
     def _calculate_execution_order(self) -> List[str]:
-        """Calculate the optimal execution order based on dependencies."""
-        order = []
-        visited = set()
+        """Calculate the optimal execution order based on dependencies (Kahn's algorithm)."""
+        ids = list(self.subgoals)
+        idx = {subgoal_id: i for i, subgoal_id in enumerate(ids)}
+        n = len(ids)
+        in_degree = [0] * n
+        children: List[List[int]] = [[] for _ in range(n)]
+        for i, subgoal_id in enumerate(ids):
+            # Repeated dependencies count once
+            for dep_id in set(self.subgoals[subgoal_id].dependencies):
+                in_degree[i] += 1
+                children[idx[dep_id]].append(i)
         
-        def visit(subgoal_id: str):
-            if subgoal_id in visited:
-                return
-            visited.add(subgoal_id)
-            
-            # Visit dependencies first
-            for dep_id in self.subgoals[subgoal_id].dependencies:
-                if dep_id in self.subgoals:
-                    visit(dep_id)
-            
-            order.append(subgoal_id)
+        order = []
+        emitted = bytearray(n)
+        queue = deque(i for i in range(n) if not in_degree[i])
+        while queue:
+            i = queue.popleft()
+            emitted[i] = 1
+            order.append(ids[i])
+            for child in children[i]:
+                in_degree[child] -= 1
+                if not in_degree[child]:
+                    queue.append(child)
         
-        for subgoal_id in self.subgoals:
-            visit(subgoal_id)
+        if len(order) < n:
+            cycle = [ids[i] for i in range(n) if not emitted[i]]
+            raise ValueError(f"Subgoal dependencies contain a cycle: {cycle}")
         
         return order
     
     def get_next_subgoal(self) -> Optional[Subgoal]:
         """Get the next subgoal to execute."""
-        for subgoal_id in self.execution_order:
-            if subgoal_id not in self.completed:
-                subgoal = self.subgoals[subgoal_id]
-                
-                # Check if all dependencies are completed
-                deps_completed = all(
-                    dep_id in self.completed 
-                    for dep_id in subgoal.dependencies
-                )
-                
-                if deps_completed:
-                    self.current = subgoal_id
-                    return subgoal
+        if not self._ready:
+            return None
         
-        return None
+        # Completed subgoals are popped from the heap in mark_completed
+        subgoal_id = self.execution_order[self._ready[0]]
+        self.current = subgoal_id
+        return self.subgoals[subgoal_id]
+    
+    def get_ready_subgoals(self) -> List[Subgoal]:
+        """Get all unfinished subgoals whose dependencies are completed."""
+        order = self.execution_order
+        ready = [self.subgoals[order[i]] for i in sorted(self._ready)]
+        
+        if ready:
+            self.current = ready[0].id
+        return ready
     
     def mark_completed(self, subgoal_id: str):
         """Mark a subgoal as completed."""
-        if subgoal_id in self.subgoals:
+        i = self._position.get(subgoal_id)
+        if i is not None and not self._done[i]:
+            if self.subgoals[subgoal_id].status == "failed":
+                self._n_failed -= 1
             self.subgoals[subgoal_id].status = "completed"
             self.completed.append(subgoal_id)
+            self._done[i] = 1
+            
+            # Drop it from the ready heap (usually the head), then release its children
+            ready = self._ready
+            if ready and ready[0] == i:
+                heapq.heappop(ready)
+            elif not self._remaining_deps[i]:
+                ready.remove(i)
+                heapq.heapify(ready)
+            remaining = self._remaining_deps
+            for child in self._children[i]:
+                remaining[child] -= 1
+                if not remaining[child] and not self._done[child]:
+                    heapq.heappush(ready, child)
     
     def mark_failed(self, subgoal_id: str):
         """Mark a subgoal as failed."""
-        if subgoal_id in self.subgoals:
+        if subgoal_id in self.subgoals and self.subgoals[subgoal_id].status != "failed":
             self.subgoals[subgoal_id].status = "failed"
+            self._n_failed += 1
     
     def is_complete(self) -> bool:
         """Check if all subgoals are completed."""
@@ -112,7 +241,7 @@ class TaskGraph:
         """Get current progress status."""
         total = len(self.subgoals)
         completed = len(self.completed)
-        failed = len([sg for sg in self.subgoals.values() if sg.status == "failed"])
+        failed = self._n_failed
         
         return {
             "total_subgoals": total,
@@ -154,16 +283,40 @@ class GoalInterpreter:
                 r"review\s+(.+)"
             ]
         }
+        # One case-insensitive scan finds both the conversational words to strip and every
+        # goal-type pattern; type patterns are lookaheads so they can't hide later matches
+        type_alternatives = "|".join(
+            f"(?P<{goal_type.name}>" + "|".join(f"(?:{pattern})" for pattern in patterns) + ")"
+            for goal_type, patterns in self.goal_patterns.items()
+        )
+        self.command_re = re.compile(
+            f"(?P<filler>{_CONVERSATIONAL_RE.pattern})|(?=(?:{type_alternatives}))", re.IGNORECASE
+        )
+        # Earlier goal types win when several match
+        self._type_rank = {goal_type.name: rank for rank, goal_type in enumerate(self.goal_patterns)}
+        # Leading verbs that settle the type on their own: they belong to the highest-priority
+        # type, so no later match can override them. Verbs of other types still need the scan
+        self.first_token_types = {
+            "search": GoalType.SEARCH,
+            "find": GoalType.SEARCH,
+            "khojo": GoalType.SEARCH,
+            "dhundho": GoalType.SEARCH
+        }
+        # Interpretation depends only on the command text; repeated commands skip it
+        self._interpret_cached = lru_cache(maxsize=1024)(self._interpret)
     
     def extract_goal(self, user_command: str) -> Goal:
         """Extract a structured goal from user command."""
-        command_lower = user_command.lower()
-        
-        # Detect goal type
-        goal_type = self._detect_goal_type(command_lower)
+        # Callers get their own copy, so the cached Goal can't be mutated
+        return replace(self._interpret_cached(user_command))
+    
+    def _interpret(self, user_command: str) -> Goal:
+        """Build the Goal for a command."""
+        # Detect goal type and strip conversational words
+        goal_type, cleaned = self._scan_command(user_command)
         
         # Extract goal statement
-        goal_statement = self._extract_goal_statement(user_command, goal_type)
+        goal_statement = self._extract_goal_statement(cleaned, goal_type)
         
         # Generate success condition
         success_condition = self._generate_success_condition(goal_statement, goal_type)
@@ -183,19 +336,36 @@ class GoalInterpreter:
             estimated_steps=estimated_steps
         )
     
+    def _scan_command(self, command: str) -> Tuple[GoalType, str]:
+        """Detect the goal type and remove conversational words in a single pass."""
+        # Fast path: "<verb> <something>" with a verb from the first-token table
+        parts = command.split(None, 1)
+        if len(parts) == 2:
+            goal_type = self.first_token_types.get(parts[0].lower())
+            if goal_type is not None:
+                return goal_type, _CONVERSATIONAL_RE.sub('', command)
+        
+        best = None
+        pieces = []
+        last = 0
+        for match in self.command_re.finditer(command):
+            kind = match.lastgroup
+            if kind == "filler":
+                pieces.append(command[last:match.start()])
+                last = match.end()
+            elif best is None or self._type_rank[kind] < self._type_rank[best]:
+                best = kind
+        pieces.append(command[last:])
+        
+        goal_type = GoalType[best] if best else GoalType.NAVIGATION  # Default
+        return goal_type, "".join(pieces)
+    
     def _detect_goal_type(self, command: str) -> GoalType:
         """Detect the type of goal from the command."""
-        for goal_type, patterns in self.goal_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, command, re.IGNORECASE):
-                    return goal_type
-        
-        return GoalType.NAVIGATION  # Default
+        return self._scan_command(command)[0]
     
-    def _extract_goal_statement(self, command: str, goal_type: GoalType) -> str:
-        """Extract a clean goal statement."""
-        # Remove conversational words and extract core intent
-        cleaned = re.sub(r'\b(?:please|can you|could you|i want to|help me)\b', '', command, flags=re.IGNORECASE)
+    def _extract_goal_statement(self, cleaned: str, goal_type: GoalType) -> str:
+        """Extract a clean goal statement from a command with conversational words removed."""
         cleaned = cleaned.strip().capitalize()
         
         # Add context based on goal type
@@ -223,30 +393,18 @@ class GoalInterpreter:
         base_condition = success_templates.get(goal_type, "Goal completed successfully")
         
         # Add specific metrics if possible
-        if "top" in goal_statement.lower():
-            number = re.search(r'top\s+(\d+)', goal_statement.lower())
-            if number:
-                base_condition += f" (top {number.group(1)} results obtained)"
+        number = _TOP_RE.search(goal_statement)
+        if number:
+            base_condition += f" (top {number.group(1)} results obtained)"
         
         return base_condition
     
     def _detect_domain(self, command: str) -> str:
         """Detect the website/domain context."""
-        domains = {
-            "youtube": ["youtube", "yt"],
-            "linkedin": ["linkedin"],
-            "amazon": ["amazon"],
-            "google": ["google"],
-            "github": ["github"],
-            "twitter": ["twitter", "x.com"],
-            "facebook": ["facebook", "fb"],
-            "instagram": ["instagram", "ig"]
-        }
-        
-        command_lower = command.lower()
-        for domain, keywords in domains.items():
-            if any(keyword in command_lower for keyword in keywords):
-                return domain
+        # Matches keep the command's casing; only the short matched keywords are lowercased
+        found = {_DOMAIN_BY_KEYWORD[keyword.lower()] for keyword in _DOMAIN_KEYWORD_RE.findall(command)}
+        if found:
+            return min(found, key=_DOMAIN_RANK.__getitem__)
         
         return "general"
     
@@ -264,26 +422,37 @@ class GoalInterpreter:
         
         base = base_complexity.get(goal_type, 3)
         
-        # Increase complexity for specific indicators
-        complexity_indicators = {
-            "compare": +2,
-            "analyze": +2,
-            "summarize": +1,
-            "list": +1,
-            "multiple": +2,
-            "all": +1,
-            "detailed": +1
-        }
-        
-        for indicator, increase in complexity_indicators.items():
-            if indicator in goal_statement.lower():
-                base += increase
+        # Increase complexity for specific indicators (each counts once)
+        for indicator in {match.lower() for match in _COMPLEXITY_RE.findall(goal_statement)}:
+            base += _COMPLEXITY_INDICATORS[indicator]
         
         return min(base, 10)  # Cap at 10 steps
 
 class SubgoalDecomposer:
     """Breaks down high-level goals into executable subgoals."""
     
+    # Domain-specific wording for generic templates; {search_term} is filled in per goal
+    _DOMAIN_TEMPLATES = {
+        "youtube": {
+            "Navigate to target website": "Open YouTube and navigate to relevant section",
+            "Locate search functionality": "Find YouTube search bar",
+            "Execute search query": "Search for: {search_term}",
+            "Extract search results": "Extract video results from search page"
+        },
+        "amazon": {
+            "Navigate to target website": "Open Amazon homepage",
+            "Locate search functionality": "Find Amazon search bar",
+            "Execute search query": "Search for: {search_term}",
+            "Extract search results": "Extract product listings with prices"
+        },
+        "linkedin": {
+            "Navigate to target website": "Open LinkedIn and navigate to jobs section",
+            "Locate search functionality": "Find LinkedIn job search bar",
+            "Execute search query": "Search for jobs: {search_term}",
+            "Extract search results": "Extract job listings with details"
+        }
+    }
+    
     def __init__(self):
         self.decomposition_templates = {
             GoalType.SEARCH: [
@@ -316,32 +485,46 @@ class SubgoalDecomposer:
                 "Create summary"
             ]
         }
-    
-    def decompose_goal(self, goal: Goal) -> List[Subgoal]:
-        """Decompose a goal into subgoals."""
-        base_template = self.decomposition_templates.get(goal.goal_type, [
+        self.default_template = [
             "Navigate to target location",
             "Perform primary action",
             "Extract results",
             "Format output"
-        ])
+        ]
+        # Per template: (id, predecessor id, template text, criteria for the uncustomized text)
+        self._plans = {
+            goal_type: self._precompute_plan(template)
+            for goal_type, template in self.decomposition_templates.items()
+        }
+        self._default_plan = self._precompute_plan(self.default_template)
+    
+    @staticmethod
+    def _precompute_plan(base_template: List[str]) -> Tuple[Tuple[str, Optional[str], str, str], ...]:
+        """Fix ids, sequential dependencies and default criteria for a template."""
+        ids = [f"subgoal_{i+1}" for i in range(len(base_template))]
+        return tuple(
+            (ids[i], ids[i-1] if i > 0 else None, template, _subgoal_criteria(template))
+            for i, template in enumerate(base_template)
+        )
+    
+    def decompose_goal(self, goal: Goal) -> List[Subgoal]:
+        """Decompose a goal into subgoals."""
+        plan = self._plans.get(goal.goal_type, self._default_plan)
         
         # Customize subgoals based on the specific goal
         subgoals = []
-        for i, template in enumerate(base_template):
-            subgoal_id = f"subgoal_{i+1}"
+        for subgoal_id, predecessor, template, success_criteria in plan:
             description = self._customize_subgoal(template, goal)
             
-            # Determine dependencies (usually sequential)
-            dependencies = [f"subgoal_{i}" for j in range(1, i+1)] if i > 0 else []
-            
-            # Generate success criteria
-            success_criteria = self._generate_subgoal_success_criteria(description, goal)
+            # Criteria follow the wording, so customized subgoals are re-checked
+            if description != template:
+                success_criteria = self._generate_subgoal_success_criteria(description, goal)
             
             subgoals.append(Subgoal(
                 id=subgoal_id,
                 description=description,
-                dependencies=dependencies,
+                # Sequential: each subgoal depends on the one before it
+                dependencies=[predecessor] if predecessor else [],
                 success_criteria=success_criteria,
                 estimated_actions=3
             ))
@@ -350,59 +533,42 @@ class SubgoalDecomposer:
     
     def _customize_subgoal(self, template: str, goal: Goal) -> str:
         """Customize a subgoal template based on the specific goal."""
-        domain_specific = {
-            "youtube": {
-                "Navigate to target website": "Open YouTube and navigate to relevant section",
-                "Locate search functionality": "Find YouTube search bar",
-                "Execute search query": f"Search for: {self._extract_search_term(goal.goal_statement)}",
-                "Extract search results": "Extract video results from search page"
-            },
-            "amazon": {
-                "Navigate to target website": "Open Amazon homepage",
-                "Locate search functionality": "Find Amazon search bar",
-                "Execute search query": f"Search for: {self._extract_search_term(goal.goal_statement)}",
-                "Extract search results": "Extract product listings with prices"
-            },
-            "linkedin": {
-                "Navigate to target website": "Open LinkedIn and navigate to jobs section",
-                "Locate search functionality": "Find LinkedIn job search bar",
-                "Execute search query": f"Search for jobs: {self._extract_search_term(goal.goal_statement)}",
-                "Extract search results": "Extract job listings with details"
-            }
-        }
+        domain_templates = self._DOMAIN_TEMPLATES.get(goal.domain)
+        if domain_templates is None or template not in domain_templates:
+            return template
         
-        domain_templates = domain_specific.get(goal.domain, {})
-        return domain_templates.get(template, template)
+        customized = domain_templates[template]
+        if "{search_term}" in customized:
+            customized = customized.format(search_term=self._extract_search_term(goal.goal_statement))
+        return customized
     
     def _extract_search_term(self, goal_statement: str) -> str:
         """Extract the search term from a goal statement."""
-        # Look for patterns like "Search for X" or "Find X"
-        patterns = [
-            r"search\s+(?:for\s+)?(.+?)(?:\s+on|\s+in|$)",
-            r"find\s+(.+?)(?:\s+on|\s+in|$)",
-            r"look\s+for\s+(.+?)(?:\s+on|\s+in|$)"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, goal_statement.lower())
-            if match:
-                return match.group(1).strip()
-        
-        return goal_statement
+        return _search_term(goal_statement)
     
     def _generate_subgoal_success_criteria(self, description: str, goal: Goal) -> str:
         """Generate success criteria for a subgoal."""
-        if "navigate" in description.lower():
-            return "Target page loaded successfully"
-        elif "search" in description.lower():
-            return "Search executed and results displayed"
-        elif "extract" in description.lower():
-            return "Required data extracted successfully"
-        elif "format" in description.lower():
-            return "Data properly formatted and structured"
-        else:
-            return "Subgoal completed successfully"
+        return _subgoal_criteria(description)
+
+# Global instances, built on first use so importing the dataclasses stays cheap
+@lru_cache(maxsize=None)
+def get_goal_interpreter() -> GoalInterpreter:
+    """Return the shared GoalInterpreter, creating it on first call."""
+    return GoalInterpreter()
+
+@lru_cache(maxsize=None)
+def get_subgoal_decomposer() -> SubgoalDecomposer:
+    """Return the shared SubgoalDecomposer, creating it on first call."""
+    return SubgoalDecomposer()
+
+_LAZY_INSTANCES = {
+    "goal_interpreter": get_goal_interpreter,
+    "subgoal_decomposer": get_subgoal_decomposer
+}
 
-# Global instances
-goal_interpreter = GoalInterpreter()
-subgoal_decomposer = SubgoalDecomposer()
+def __getattr__(name: str):
+    """Keep goal_interpreter/subgoal_decomposer importable as module attributes."""
+    factory = _LAZY_INSTANCES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
@@ -14,13 +14,16 @@ Enhanced Features:
 import re
 import logging
 import random
-import json
 import asyncio
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Tuple, Literal, Union, Callable, Awaitable
 from urllib.parse import quote_plus
 from enum import Enum
 
-from action_schema import Action, ActionType, SelectorStrategy, create_action
+import orjson
+from action_schema import Action, ActionType, SelectorStrategy, create_action, create_action_dict
 from dataclasses import dataclass
 from typing import List, Dict, Any, Optional, Tuple, Literal, Union, Callable, Awaitable
 
@@ -36,9 +39,102 @@ COMPOUND_INDICATORS = [
     "and", "then", "after that", "also", "aur", "phir", "and then", "after"
 ]
 
+# Observation fields that change on every snapshot without affecting planning
+VOLATILE_OBSERVATION_KEYS = frozenset({"timestamp", "mousePosition", "scrollPosition"})
+
 # Video quality options
 VIDEO_QUALITIES = ["144p", "240p", "360p", "480p", "720p", "1080p", "1440p", "2160p", "4k", "auto"]
 
+# Keywords the planner checks commands for
+COMPLEX_KEYWORDS = [
+    "playlist", "quality", "settings", "next video",
+    "previous video", "fullscreen", "theater mode"
+]
+SEARCH_VERBS = ["search", "find", "khojo", "dhundho"]
+OPEN_VERBS = ["open", "kholo", "go to", "chalo"]
+
+def _keyword_re(keywords: List[str]) -> re.Pattern:
+    """Regex finding any of the keywords as a substring in a single scan."""
+    return re.compile("|".join(map(re.escape, keywords)))
+
+def _trigger_re(triggers) -> re.Pattern:
+    """Regex whose findall reports every trigger occurrence, overlapping ones included."""
+    return re.compile("(?=(" + "|".join(map(re.escape, triggers)) + "))")
+
+_UNSAFE_RE = _keyword_re(UNSAFE_KEYWORDS)
+_SEARCH_VERB_RE = _keyword_re(SEARCH_VERBS)
+_OPEN_VERB_RE = _keyword_re(OPEN_VERBS)
+_ADD_VIDEO_RE = _keyword_re(["add", "this video", "current video"])
+_PRIMARY_BUTTON_RE = _keyword_re(["continue", "next", "submit", "get started"])
+# Button-text keywords of interpret_dom's rules, by the rule they serve
+_BUTTON_RULES = {
+    "accept": "accept",
+    "sign in": "login",
+    "login": "login",
+    "search": "search"
+}
+_BUTTON_RULE_RE = _trigger_re(_BUTTON_RULES)
+# Selectors of inputs that are search boxes without further checks
+_SEARCH_INPUT_SELECTORS = frozenset({
+    "input#search",
+    "input[name='q']",
+    "input[type='search']",
+    "input[placeholder*='search']",
+    "input[aria-label*='search']"
+})
+# Compound indicators and complex keywords in one scan; lookahead so overlapping
+# keywords are all seen, with compound indicators tried first at each position
+_COMPLEXITY_RE = re.compile(
+    "(?=(?P<compound>" + "|".join(map(re.escape, COMPOUND_INDICATORS)) + ")"
+    "|(?P<complex>" + "|".join(map(re.escape, COMPLEX_KEYWORDS)) + "))"
+)
+
+# Patterns used on every command, compiled once
+_PUNCT_RE = re.compile(r'[.,!?;:]')
+_SEARCH_QUERY_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"search\s+(?:for\s+)?(?:a\s+)?(?:the\s+)?(.+?)(?:\s+on\s+.+)?$",
+    r"find\s+(?:me\s+)?(?:a\s+)?(?:the\s+)?(.+?)(?:\s+on\s+.+)?$",
+    r"look up\s+(?:a\s+)?(?:the\s+)?(.+?)(?:\s+on\s+.+)?$",
+    r"khojo\s+(.+)$",
+    r"dhundho\s+(.+)$"
+))
+_URL_PREFIX_RE = re.compile(r'^https?://', re.IGNORECASE)
+_COMPOUND_SPLIT_RE = re.compile(
+    r'\s+(?:' + '|'.join(re.escape(sep) for sep in COMPOUND_INDICATORS) + r')\s+', re.IGNORECASE
+)
+# The split needs an indicator with whitespace on both sides
+_COMPOUND_MARKERS = tuple(f" {sep} " for sep in COMPOUND_INDICATORS)
+# Sub-command verbs, classified with one anchored match of the lowercased sub-command
+_ROUTER_RE = re.compile(
+    r'(?P<open>open |kholo |chalo |go to )'
+    r'|(?P<click>click |press )'
+    r'|(?P<scroll>scroll down|scroll up|scroll to)'
+    r'|(?P<wait>wait for|wait until)'
+)
+# Matched against the lowercased command; the prefix is ASCII, so its length
+# is the same in the original command
+_OPEN_PREFIX_RE = re.compile(r'^(open|kholo|chalo|go to)\s+')
+_CLICK_PREFIX_RE = re.compile(r'^(click|press)\s+', re.IGNORECASE)
+_WAIT_TIMEOUT_RE = re.compile(r'wait (?:for|until) (\d+) (seconds|second|sec|s)')
+_QUALITY_RE = re.compile(r'(\d+p|hd|full hd|4k|auto)')
+_SET_QUALITY_RE = re.compile(r'set (?:quality|resolution) (?:to )?(\d+p|hd|full hd|4k|auto)')
+_CREATE_PLAYLIST_NAME_RE = re.compile(r'create playlist (?:named|called)?[\s"\']*(.+?)["\']?(?:\s|$)')
+_ADD_PLAYLIST_NAME_RE = re.compile(r'add (?:to )?playlist (?:named|called)?[\s"\']*(.+?)["\']?(?:\s|$)')
+_PLAY_PLAYLIST_NAME_RE = re.compile(r'(?:play|open) playlist (?:named|called)?[\s"\']*(.+?)["\']?(?:\s|$)')
+_GOAL_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:please |can you |i want to |help me )?(.+)$",
+    r"(?:karo |kholo |search |find |dhundho |khojo )?(.+)$",
+))
+_GOAL_FILLER_RE = re.compile(r'^(?:please |can you |i want to |help me )', re.IGNORECASE)
+_GOAL_QUERY_RES = tuple(re.compile(pattern) for pattern in (
+    r"search for (.+)$",
+    r"find (.+)$",
+    r"khojo (.+)$",
+    r"dhundho (.+)$",
+    r"(?:youtube|google) (.+)$"
+))
+_URL_RE = re.compile(r'https?://[^\s]+')
+
 class TaskComplexity(str, Enum):
     SIMPLE = "simple"  # Single action
     COMPOUND = "compound"  # Multiple actions with "and" or "then"
@@ -74,6 +170,31 @@ WEBSITES = {
     }
 }
 
+# Site detection: one scan finds every site name (none is a prefix or suffix of
+# another, so matches can't hide each other); earlier WEBSITES entries win
+_SITE_RE = re.compile("|".join(map(re.escape, WEBSITES)))
+_SITE_RANK = {site: rank for rank, site in enumerate(WEBSITES)}
+_SITES = tuple(WEBSITES)
+# WEBSITES fields as parallel tuples indexed by site rank: readers that already
+# have the rank index once instead of looking up the site and then the field
+_SITE_URLS = tuple(info["url"] for info in WEBSITES.values())
+_SITE_SEARCH_URLS = tuple(info["search_url"] for info in WEBSITES.values())
+
+def _find_site(text: str) -> Optional[str]:
+    """Return the first WEBSITES key (in table order) contained in lowercase text."""
+    found = _SITE_RE.findall(text)
+    if not found:
+        return None
+    # The table's own key object, so later comparisons against it are identity checks
+    return _SITES[min(map(_SITE_RANK.__getitem__, found))]
+
+def _find_site_rank(text: str) -> Optional[int]:
+    """Like _find_site, but return the site's rank (its index in the _SITE_* tuples)."""
+    found = _SITE_RE.findall(text)
+    if not found:
+        return None
+    return min(map(_SITE_RANK.__getitem__, found))
+
 def create_wait_action(selector: str, timeout_ms: int = 5000) -> Action:
     """Create a waitForElement action with fallback selectors."""
     return create_action(
@@ -87,39 +208,34 @@ def create_wait_action(selector: str, timeout_ms: int = 5000) -> Action:
 
 def is_unsafe(command: str) -> bool:
     """Check if command contains potentially harmful operations."""
-    cmd = command.lower()
-    return any(word in cmd for word in UNSAFE_KEYWORDS)
+    return _UNSAFE_RE.search(command.lower()) is not None
 
+# Commands recur (voice patterns like "open youtube"), and a compound command
+# normalizes each sub-command; results are immutable strings/tuples
+@lru_cache(maxsize=2048)
 def normalize_text(text: str) -> str:
     """Normalize text for better matching."""
     # Convert to lowercase and remove extra whitespace
     text = ' '.join(text.lower().split())
     # Remove common punctuation except @ and /
-    text = re.sub(r'[.,!?;:]', '', text)
+    text = _PUNCT_RE.sub('', text)
     return text
 
+@lru_cache(maxsize=2048)
 def extract_website(command: str) -> Tuple[Optional[str], str]:
     """Extract website name from command if specified."""
     command = normalize_text(command)
-    for site in WEBSITES:
-        if site in command:
-            # Remove the site name from the command
-            clean_cmd = command.replace(site, '').strip()
-            return site, clean_cmd
+    site = _find_site(command)
+    if site:
+        # Remove the site name from the command
+        clean_cmd = command.replace(site, '').strip()
+        return site, clean_cmd
     return None, command
 
 def extract_search_query(command: str) -> str:
     """Extract search query from command."""
-    patterns = [
-        r"search\s+(?:for\s+)?(?:a\s+)?(?:the\s+)?(.+?)(?:\s+on\s+.+)?$",
-        r"find\s+(?:me\s+)?(?:a\s+)?(?:the\s+)?(.+?)(?:\s+on\s+.+)?$",
-        r"look up\s+(?:a\s+)?(?:the\s+)?(.+?)(?:\s+on\s+.+)?$",
-        r"khojo\s+(.+)$",
-        r"dhundho\s+(.+)$"
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, command, re.IGNORECASE)
+    for pattern in _SEARCH_QUERY_RES:
+        match = pattern.search(command)
         if match:
             return match.group(1).strip()
     
@@ -156,13 +272,13 @@ def create_web_search_actions(query: str, site: Optional[str] = None, open_first
 def create_open_actions(target: str) -> List[Action]:
     """Create actions for opening a URL or searching for a term."""
     # Check if it's a URL
-    if re.match(r'^https?://', target, re.IGNORECASE):
+    if _URL_PREFIX_RE.match(target):
         return [create_action(ActionType.OPEN_URL, url=target)]
     
     # Check if it's a known website
-    for site, data in WEBSITES.items():
-        if site in target.lower():
-            return [create_action(ActionType.OPEN_URL, url=data["url"])]
+    site = _find_site(target.lower())
+    if site:
+        return [create_action(ActionType.OPEN_URL, url=WEBSITES[site]["url"])]
     
     # If it's a single word, assume it's a website
     if ' ' not in target and '.' not in target:
@@ -171,6 +287,56 @@ def create_open_actions(target: str) -> List[Action]:
     # Otherwise, treat it as a search query
     return create_web_search_actions(target)
 
+# Dict variants of the builders above, for planner paths that return serialized
+# actions: they skip building a model per action only to call .dict() on it
+
+# Per-site search actions, built once: (open site, type query, press Enter).
+# Callers get copies with the query filled in and a metadata dict of their own
+_SEARCH_TEMPLATES = {
+    site: (
+        create_action_dict(ActionType.OPEN_URL, url=info["url"]),
+        create_action_dict(ActionType.TYPE_TEXT, selector=info["search_selector"], text=""),
+        create_action_dict(ActionType.KEY_PRESS, key="Enter"),
+    )
+    for site, info in WEBSITES.items() if info.get("search_selector")
+}
+
+def create_youtube_action_dicts(query: str) -> List[Dict[str, Any]]:
+    """Serialized create_youtube_actions."""
+    return create_web_search_action_dicts(query, "youtube", open_first=True)
+
+def create_web_search_action_dicts(query: str, site: Optional[str] = None, open_first: bool = False) -> List[Dict[str, Any]]:
+    """Serialized create_web_search_actions."""
+    templates = _SEARCH_TEMPLATES.get(site)
+    if templates:
+        open_url, type_text, key_press = templates
+        actions = [{**open_url, "metadata": {}}] if open_first else []
+        actions.append({**type_text, "text": query, "metadata": {}})
+        actions.append({**key_press, "metadata": {}})
+        return actions
+    
+    site_rank = _SITE_RANK.get(site)
+    if site_rank is not None:
+        # Fallback to search URL if no selector known
+        url = _SITE_SEARCH_URLS[site_rank].format(query=quote_plus(query))
+        return [create_action_dict(ActionType.OPEN_URL, url=url)]
+
+    return [create_action_dict(ActionType.OPEN_URL, url=f"https://www.google.com/search?q={quote_plus(query)}")]
+
+def create_open_action_dicts(target: str) -> List[Dict[str, Any]]:
+    """Serialized create_open_actions."""
+    if _URL_PREFIX_RE.match(target):
+        return [create_action_dict(ActionType.OPEN_URL, url=target)]
+    
+    site_rank = _find_site_rank(target.lower())
+    if site_rank is not None:
+        return [create_action_dict(ActionType.OPEN_URL, url=_SITE_URLS[site_rank])]
+    
+    if ' ' not in target and '.' not in target:
+        return [create_action_dict(ActionType.OPEN_URL, url=f"https://www.{target}.com")]
+    
+    return create_web_search_action_dicts(target)
+
 def handle_compound_command(command: str, default_site: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Handle compound commands with 'and', 'then', etc., preserving site context.
@@ -179,8 +345,13 @@ def handle_compound_command(command: str, default_site: Optional[str] = None) ->
     actions: List[Dict[str, Any]] = []
     
     # Split the command into sub-commands using compound indicators
-    pattern = r'\s+(?:' + '|'.join(re.escape(sep) for sep in COMPOUND_INDICATORS) + r')\s+'
-    sub_commands = re.split(pattern, command, flags=re.IGNORECASE)
+    # Cheap prematch first: once an ASCII command is single-spaced, no
+    # " <indicator> " means there is nothing to split on
+    padded = f" {' '.join(command.lower().split())} " if command.isascii() else None
+    if padded is not None and not any(marker in padded for marker in _COMPOUND_MARKERS):
+        sub_commands = [command]
+    else:
+        sub_commands = _COMPOUND_SPLIT_RE.split(command)
     
     current_site = default_site
     
@@ -195,96 +366,91 @@ def handle_compound_command(command: str, default_site: Optional[str] = None) ->
             # Check for site context
             site_in_cmd, clean_cmd = extract_website(cmd)
             site_to_use = site_in_cmd or current_site
-            cmd_lower = clean_cmd.lower()
+            # extract_website normalizes, so the clean sub-command is already lowercase
+            cmd_lower = clean_cmd
             
             # Handle video controls
-            video_action = handle_video_controls(cmd_lower)
+            video_action = _video_control_action(cmd_lower)
             if video_action:
                 actions.append(video_action)
                 continue
             
             # Handle playlist operations
-            playlist_actions = create_playlist_actions(cmd_lower)
+            playlist_actions = _playlist_actions(cmd_lower)
             if playlist_actions:
                 actions.extend(playlist_actions)
                 continue
             
+            # Search verbs count anywhere; the other verbs must lead the sub-command
+            if _SEARCH_VERB_RE.search(cmd_lower):
+                route = "search"
+            else:
+                match = _ROUTER_RE.match(cmd_lower)
+                route = match.lastgroup if match else None
+            
             # Handle search commands
-            if any(word in cmd_lower for word in ["search", "find", "khojo", "dhundho"]):
+            if route == "search":
                 query = extract_search_query(clean_cmd)
                 
                 if site_to_use == "youtube":
                     if current_site == "youtube":
-                        actions.extend([
-                            create_action(
-                                ActionType.TYPE_TEXT, 
-                                selector="input#search", 
-                                text=query
-                            ).dict(),
-                            create_action(
-                                ActionType.KEY_PRESS, 
-                                key="Enter"
-                            ).dict(),
-                        ])
+                        actions.extend(create_web_search_action_dicts(query, "youtube"))
                     else:
-                        actions.extend([a.dict() for a in create_youtube_actions(query)])
+                        actions.extend(create_youtube_action_dicts(query))
                         current_site = "youtube"
                 elif site_to_use and site_to_use in WEBSITES:
                     open_first = current_site != site_to_use
-                    actions.extend([a.dict() for a in create_web_search_actions(query, site_to_use, open_first=open_first)])
+                    actions.extend(create_web_search_action_dicts(query, site_to_use, open_first=open_first))
                     if open_first:
                         current_site = site_to_use
                 else:
-                    actions.extend([a.dict() for a in create_web_search_actions(query)])
+                    actions.extend(create_web_search_action_dicts(query))
             
             # Handle open commands
-            elif cmd_lower.startswith(('open ', 'kholo ', 'chalo ', 'go to ')):
-                target = re.sub(r'^(open|kholo|chalo|go to)\s+', '', cmd, flags=re.IGNORECASE)
-                actions.extend([a.dict() for a in create_open_actions(target)])
+            elif route == "open":
+                target = _strip_open_prefix(cmd, cmd.lower())
+                actions.extend(create_open_action_dicts(target))
                 
                 # Update current site if a known site is mentioned
-                for site in WEBSITES:
-                    if site in target.lower():
-                        current_site = site
-                        break
+                current_site = _find_site(target.lower()) or current_site
             
             # Handle click commands
-            elif cmd_lower.startswith(('click ', 'press ')):
-                target = re.sub(r'^(click|press)\s+', '', cmd, flags=re.IGNORECASE)
-                actions.append(create_action(
+            elif route == "click":
+                target = _CLICK_PREFIX_RE.sub('', cmd)
+                actions.append(create_action_dict(
                     ActionType.CLICK_ELEMENT,
                     selector=target,
                     fallback_selectors={
                         SelectorStrategy.XPATH: f"//*[contains(text(), '{target}')]"
                     }
-                ).dict())
+                ))
             
             # Handle scroll commands
-            elif cmd_lower.startswith(('scroll down', 'scroll up', 'scroll to')):
+            elif route == "scroll":
                 direction = "down"
                 if "up" in cmd_lower:
                     direction = "up"
-                actions.append(create_action(
+                actions.append(create_action_dict(
                     ActionType.SCROLL_PAGE, 
                     direction=direction
-                ).dict())
+                ))
             
             # Handle wait commands
-            elif cmd_lower.startswith(('wait for', 'wait until')):
+            elif route == "wait":
                 # Extract timeout if specified
-                timeout_match = re.search(r'wait (?:for|until) (\d+) (seconds|second|sec|s)', cmd_lower)
+                timeout_match = _WAIT_TIMEOUT_RE.search(cmd_lower)
                 timeout_ms = 5000  # default 5 seconds
                 if timeout_match:
                     timeout_ms = int(timeout_match.group(1)) * 1000
                 
-                actions.append(create_action(
+                actions.append(create_action_dict(
                     ActionType.WAIT_FOR_NAVIGATION,
                     timeout_ms=timeout_ms
-                ).dict())
+                ))
             
             # Handle quality settings
             elif "quality" in cmd_lower or "resolution" in cmd_lower:
-                quality_match = re.search(r'(\d+p|hd|full hd|4k|auto)', cmd_lower)
+                quality_match = _QUALITY_RE.search(cmd_lower)
                 if quality_match:
                     quality = quality_match.group(1)
                     actions.append(create_quality_action(quality))
@@ -293,41 +459,38 @@ def handle_compound_command(command: str, default_site: Optional[str] = None) ->
             else:
                 query = extract_search_query(clean_cmd)
                 if site_to_use == "youtube":
-                    actions.extend([a.dict() for a in create_youtube_actions(query)])
+                    actions.extend(create_youtube_action_dicts(query))
                     current_site = "youtube"
                 else:
-                    actions.extend([a.dict() for a in create_web_search_actions(query, site_to_use)])
+                    actions.extend(create_web_search_action_dicts(query, site_to_use))
         
         except Exception as e:
             logger.error(f"Error processing sub-command '{cmd}': {e}")
             # Add a retry action for the failed command
-            actions.append(create_action(
+            actions.append(create_action_dict(
                 ActionType.RETRY_ACTION,
                 error_message=str(e),
                 command=cmd,
                 max_retries=3
-            ).dict())
+            ))
     
     return actions
 
 def analyze_task_complexity(command: str) -> TaskComplexity:
     """Analyze the complexity of the task."""
-    command_lower = command.lower()
-    
-    # Check for compound commands
-    if any(sep in command_lower for sep in COMPOUND_INDICATORS):
-        return TaskComplexity.COMPOUND
-    
-    # Check for complex tasks that might need multi-step planning
-    complex_keywords = [
-        "playlist", "quality", "settings", "next video", 
-        "previous video", "fullscreen", "theater mode"
-    ]
-    
-    if any(keyword in command_lower for keyword in complex_keywords):
-        return TaskComplexity.COMPLEX
+    return _complexity(command.lower())
+
+def _complexity(command_lower: str) -> TaskComplexity:
+    """analyze_task_complexity for an already lowercased command."""
+    # Compound indicators win over keywords of complex tasks that might need
+    # multi-step planning, wherever they appear
+    complexity = TaskComplexity.SIMPLE
+    for match in _COMPLEXITY_RE.finditer(command_lower):
+        if match.lastgroup == "compound":
+            return TaskComplexity.COMPOUND
+        complexity = TaskComplexity.COMPLEX
     
-    return TaskComplexity.SIMPLE
+    return complexity
 
 def create_quality_action(quality: str) -> Dict[str, Any]:
     """Create an action to set video quality."""
@@ -336,82 +499,129 @@ def create_quality_action(quality: str) -> Dict[str, Any]:
     if quality not in VIDEO_QUALITIES:
         quality = 'auto'
     
-    return create_action(
+    return create_action_dict(
         action_type=ActionType.SET_QUALITY,
         quality=quality
-    ).dict()
+    )
 
-def create_playlist_actions(command: str) -> List[Dict[str, Any]]:
-    """Handle playlist-related commands."""
-    command_lower = command.lower()
-    actions = []
-    
-    if "create playlist" in command_lower:
-        # Extract playlist name if provided
-        playlist_name = "My Playlist"
-        name_match = re.search(r'create playlist (?:named|called)?[\s"\']*(.+?)["\']?(?:\s|$)', command_lower)
-        if name_match:
-            playlist_name = name_match.group(1).strip()
-        
-        actions.append(create_action(
-            action_type=ActionType.CREATE_PLAYLIST,
-            playlist_name=playlist_name
-        ).dict())
-        
-        # If the command mentions adding current video to the new playlist
-        if any(word in command_lower for word in ["add", "this video", "current video"]):
-            actions.append(create_action(
-                action_type=ActionType.ADD_TO_PLAYLIST,
-                playlist_name=playlist_name,
-                playlist_item="current_video"
-            ).dict())
-    
-    elif "add to playlist" in command_lower:
-        # Extract playlist name if provided
-        playlist_name = "default"
-        name_match = re.search(r'add (?:to )?playlist (?:named|called)?[\s"\']*(.+?)["\']?(?:\s|$)', command_lower)
-        if name_match:
-            playlist_name = name_match.group(1).strip()
-        
-        actions.append(create_action(
+def _create_playlist(command_lower: str) -> List[Dict[str, Any]]:
+    """Actions for "create playlist ..." commands."""
+    # Extract playlist name if provided; the name patterns need text after
+    # "playlist ", so a bare "create playlist" skips the regex
+    playlist_name = "My Playlist"
+    name_match = "playlist " in command_lower and _CREATE_PLAYLIST_NAME_RE.search(command_lower)
+    if name_match:
+        playlist_name = name_match.group(1).strip()
+    
+    actions = [create_action_dict(
+        action_type=ActionType.CREATE_PLAYLIST,
+        playlist_name=playlist_name
+    )]
+    
+    # If the command mentions adding current video to the new playlist
+    if _ADD_VIDEO_RE.search(command_lower):
+        actions.append(create_action_dict(
             action_type=ActionType.ADD_TO_PLAYLIST,
             playlist_name=playlist_name,
             playlist_item="current_video"
-        ).dict())
-    
-    elif "play playlist" in command_lower or "open playlist" in command_lower:
-        # Extract playlist name if provided
-        playlist_name = "default"
-        name_match = re.search(r'(?:play|open) playlist (?:named|called)?[\s"\']*(.+?)["\']?(?:\s|$)', command_lower)
-        if name_match:
-            playlist_name = name_match.group(1).strip()
-        
-        actions.append(create_action(
-            action_type=ActionType.PLAY_PLAYLIST if "play" in command_lower else ActionType.OPEN_PLAYLIST,
-            playlist_name=playlist_name
-        ).dict())
+        ))
     
     return actions
 
-def handle_video_controls(command: str) -> Optional[Dict[str, Any]]:
-    """Handle video control commands like play, pause, etc."""
-    command_lower = command.lower()
+def _add_to_playlist(command_lower: str) -> List[Dict[str, Any]]:
+    """Actions for "add to playlist ..." commands."""
+    # Extract playlist name if provided
+    playlist_name = "default"
+    name_match = "playlist " in command_lower and _ADD_PLAYLIST_NAME_RE.search(command_lower)
+    if name_match:
+        playlist_name = name_match.group(1).strip()
     
-    if any(word in command_lower for word in ["play video", "resume video", "play the video"]):
-        return create_action(action_type=ActionType.PLAY_VIDEO).dict()
+    return [create_action_dict(
+        action_type=ActionType.ADD_TO_PLAYLIST,
+        playlist_name=playlist_name,
+        playlist_item="current_video"
+    )]
+
+def _play_playlist(command_lower: str) -> List[Dict[str, Any]]:
+    """Actions for "play playlist ..." and "open playlist ..." commands."""
+    # Extract playlist name if provided
+    playlist_name = "default"
+    name_match = "playlist " in command_lower and _PLAY_PLAYLIST_NAME_RE.search(command_lower)
+    if name_match:
+        playlist_name = name_match.group(1).strip()
     
-    if any(word in command_lower for word in ["pause video", "pause the video"]):
-        return create_action(action_type=ActionType.PAUSE_VIDEO).dict()
+    return [create_action_dict(
+        action_type=ActionType.PLAY_PLAYLIST if "play" in command_lower else ActionType.OPEN_PLAYLIST,
+        playlist_name=playlist_name
+    )]
+
+# Playlist handlers by trigger phrase; earlier triggers win when several appear
+_PLAYLIST_TRIGGERS = {
+    "create playlist": _create_playlist,
+    "add to playlist": _add_to_playlist,
+    "play playlist": _play_playlist,
+    "open playlist": _play_playlist
+}
+_PLAYLIST_TRIGGER_RE = _trigger_re(_PLAYLIST_TRIGGERS)
+_PLAYLIST_TRIGGER_RANK = {trigger: rank for rank, trigger in enumerate(_PLAYLIST_TRIGGERS)}
+
+def create_playlist_actions(command: str) -> List[Dict[str, Any]]:
+    """Handle playlist-related commands."""
+    return _playlist_actions(command.lower())
+
+def _playlist_actions(command_lower: str) -> List[Dict[str, Any]]:
+    """create_playlist_actions for an already lowercased command."""
+    triggers = _PLAYLIST_TRIGGER_RE.findall(command_lower)
+    if not triggers:
+        return []
+    
+    trigger = min(triggers, key=_PLAYLIST_TRIGGER_RANK.__getitem__)
+    return _PLAYLIST_TRIGGERS[trigger](command_lower)
+
+# Video control actions by trigger phrase. Play and pause take precedence over a
+# "set quality" request, which takes precedence over opening the settings menu
+_VIDEO_TRIGGERS = {
+    "play video": ActionType.PLAY_VIDEO,
+    "resume video": ActionType.PLAY_VIDEO,
+    "play the video": ActionType.PLAY_VIDEO,
+    "pause video": ActionType.PAUSE_VIDEO,
+    "pause the video": ActionType.PAUSE_VIDEO,
+    "open settings": ActionType.OPEN_SETTINGS_MENU,
+    "settings menu": ActionType.OPEN_SETTINGS_MENU,
+    "video settings": ActionType.OPEN_SETTINGS_MENU
+}
+_VIDEO_TRIGGER_RE = _trigger_re(_VIDEO_TRIGGERS)
+_VIDEO_ACTION_RANK = {
+    ActionType.PLAY_VIDEO: 0,
+    ActionType.PAUSE_VIDEO: 1,
+    ActionType.OPEN_SETTINGS_MENU: 2
+}
+
+def _strip_open_prefix(command: str, command_lower: str) -> str:
+    """Drop a leading open verb from command, keeping the target's case."""
+    match = _OPEN_PREFIX_RE.match(command_lower)
+    return command[match.end():] if match else command
+
+def handle_video_controls(command: str) -> Optional[Dict[str, Any]]:
+    """Handle video control commands like play, pause, etc."""
+    return _video_control_action(command.lower())
+
+def _video_control_action(command_lower: str) -> Optional[Dict[str, Any]]:
+    """handle_video_controls for an already lowercased command."""
+    action_types = {_VIDEO_TRIGGERS[trigger] for trigger in _VIDEO_TRIGGER_RE.findall(command_lower)}
+    action_type = min(action_types, key=_VIDEO_ACTION_RANK.__getitem__, default=None)
+    if action_type in (ActionType.PLAY_VIDEO, ActionType.PAUSE_VIDEO):
+        return create_action_dict(action_type=action_type)
     
     # Handle video quality settings
-    quality_match = re.search(r'set (?:quality|resolution) (?:to )?(\d+p|hd|full hd|4k|auto)', command_lower)
+    quality_match = _SET_QUALITY_RE.search(command_lower)
     if quality_match:
         quality = quality_match.group(1)
         return create_quality_action(quality)
     
     # Handle settings menu
-    if any(word in command_lower for word in ["open settings", "settings menu", "video settings"]):
-        return create_action(action_type=ActionType.OPEN_SETTINGS_MENU).dict()
+    if action_type is not None:
+        return create_action_dict(action_type=action_type)
     
     return None
 
@@ -429,25 +639,47 @@ class GoalState:
         if self.observations is None:
             self.observations = []
 
+def observation_fingerprint(observation: Optional[Dict[str, Any]]) -> str:
+    """Hash an observation, ignoring volatile fields like timestamps."""
+    if not observation:
+        return ""
+    canonical = {k: v for k, v in observation.items() if k not in VOLATILE_OBSERVATION_KEYS}
+    payload = orjson.dumps(canonical, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def _match_buttons(buttons: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """First button (in page order) matching each interpret_dom button rule."""
+    hits: Dict[str, Dict[str, Any]] = {}
+    for btn in buttons:
+        btn_text = btn['text'].lower()
+        for keyword in _BUTTON_RULE_RE.findall(btn_text):
+            hits.setdefault(_BUTTON_RULES[keyword], btn)
+        if "primary" not in hits and _PRIMARY_BUTTON_RE.search(btn_text):
+            hits["primary"] = btn
+    return hits
+
 class AutonomousPlanner:
-    def __init__(self):
+    def __init__(self, decision_cache_size: int = 256):
         self.current_goal_state: Optional[GoalState] = None
         self.action_history: List[Dict[str, Any]] = []
+        # (goal, step, observation fingerprint) -> planned actions
+        self.decision_cache: "OrderedDict[Tuple[str, int, str], List[Action]]" = OrderedDict()
+        self.decision_cache_size = decision_cache_size
+        # Last observation fingerprint and step answered by /autonomous/next-action,
+        # and the actions returned, so an unchanged re-post skips planning entirely
+        self._last_obs_hash: Optional[str] = None
+        self._last_step: Optional[int] = None
+        self._last_actions: Optional[List[Action]] = None
     
     def extract_goal(self, user_input: str) -> str:
         """Extract high-level goal from user input."""
         # Remove conversational fluff and extract core goal
-        patterns = [
-            r"(?:please |can you |i want to |help me )?(.+)$",
-            r"(?:karo |kholo |search |find |dhundho |khojo )?(.+)$",
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, user_input.strip(), re.IGNORECASE)
+        for pattern in _GOAL_RES:
+            match = pattern.search(user_input.strip())
             if match:
                 goal = match.group(1).strip()
                 # Clean up the goal
-                goal = re.sub(r'^(?:please |can you |i want to |help me )', '', goal, flags=re.IGNORECASE)
+                goal = _GOAL_FILLER_RE.sub('', goal)
                 return goal
         
         return user_input.strip()
@@ -467,11 +699,11 @@ class AutonomousPlanner:
                 subtasks = ["Open YouTube", "Navigate to content"]
         
         # Web search patterns
-        elif any(word in goal_lower for word in ["search", "find", "khojo", "dhundho"]):
+        elif _SEARCH_VERB_RE.search(goal_lower):
             subtasks = ["Open search engine", "Enter search query", "View results"]
         
         # Website navigation patterns
-        elif any(word in goal_lower for word in ["open", "kholo", "go to", "chalo"]):
+        elif _OPEN_VERB_RE.search(goal_lower):
             subtasks = ["Navigate to website", "Wait for page load"]
         
         # Generic pattern
@@ -510,16 +742,8 @@ class AutonomousPlanner:
     def _extract_query_from_goal(self, goal: str) -> str:
         """Extract search query from goal."""
         # Look for content after search-related keywords
-        patterns = [
-            r"search for (.+)$",
-            r"find (.+)$", 
-            r"khojo (.+)$",
-            r"dhundho (.+)$",
-            r"(?:youtube|google) (.+)$"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, goal.lower())
+        for pattern in _GOAL_QUERY_RES:
+            match = pattern.search(goal.lower())
             if match:
                 return match.group(1).strip()
         
@@ -527,19 +751,24 @@ class AutonomousPlanner:
     
     def _extract_url_from_goal(self, goal: str) -> Optional[str]:
         """Extract URL from goal if present."""
-        url_match = re.search(r'https?://[^\s]+', goal)
+        url_match = _URL_RE.search(goal)
         if url_match:
             return url_match.group(0)
         
         # Check for known websites
-        for site, data in WEBSITES.items():
-            if site in goal.lower():
-                return data["url"]
+        site_rank = _find_site_rank(goal.lower())
+        if site_rank is not None:
+            return _SITE_URLS[site_rank]
         
         return None
     
-    def decide_next_step(self, observation: Dict[str, Any] = None) -> Optional[List[Action]]:
-        """Decide next action based on current state and observation with DOM interpretation."""
+    def decide_next_step(self, observation: Dict[str, Any] = None,
+                         fingerprint: Optional[str] = None) -> Optional[List[Action]]:
+        """
+        Decide next action based on current state and observation with DOM interpretation.
+        
+        fingerprint is the observation's observation_fingerprint, when the caller has it already.
+        """
         if not self.current_goal_state:
             return None
         
@@ -551,6 +780,25 @@ class AutonomousPlanner:
         if self.current_goal_state.current_step >= len(self.current_goal_state.subtasks):
             return None  # Goal completed
         
+        # Identical goal/step/observation always yields the same plan
+        if fingerprint is None:
+            fingerprint = observation_fingerprint(observation)
+        cache_key = (self.current_goal_state.goal, self.current_goal_state.current_step, fingerprint)
+        cached = self.decision_cache.get(cache_key)
+        if cached is not None:
+            self.decision_cache.move_to_end(cache_key)
+            return [action.model_copy(deep=True) for action in cached]
+        
+        actions = self._plan_next_actions(observation)
+        if actions:
+            self.decision_cache[cache_key] = [action.model_copy(deep=True) for action in actions]
+            if len(self.decision_cache) > self.decision_cache_size:
+                self.decision_cache.popitem(last=False)
+        
+        return actions
+    
+    def _plan_next_actions(self, observation: Optional[Dict[str, Any]]) -> Optional[List[Action]]:
+        """Plan actions for the current step from the observation or the subtask."""
         # Update 2: Use DOM interpretation first (SEE → THINK → ACT)
         if observation and not observation.get('error'):
             dom_action = self.interpret_dom(observation)
@@ -623,6 +871,7 @@ class AutonomousPlanner:
             goal=goal,
             subtasks=subtasks
         )
+        self._last_obs_hash = self._last_step = self._last_actions = None
         
         return self.current_goal_state
 
@@ -639,30 +888,38 @@ class AutonomousPlanner:
         
         # Content-aware decision rules
         
+        # First button per rule, matched in one pass over the buttons the first
+        # time a rule needs them
+        button_hits = None
+        
         # Rule 1: Handle cookie consent
         if 'accept' in text and 'cookies' in text:
-            for btn in buttons:
-                if 'accept' in btn['text'].lower():
-                    return create_action(
-                        ActionType.CLICK_ELEMENT,
-                        selector=btn['selector'],
-                        fallback_selectors={
-                            SelectorStrategy.XPATH: f"//*[contains(text(), 'Accept')]"
-                        }
-                    ).dict()
+            button_hits = _match_buttons(buttons)
+            btn = button_hits.get("accept")
+            if btn:
+                return create_action(
+                    ActionType.CLICK_ELEMENT,
+                    selector=btn['selector'],
+                    fallback_selectors={
+                        SelectorStrategy.XPATH: f"//*[contains(text(), 'Accept')]"
+                    }
+                ).dict()
         
         # Rule 2: Handle login/sign in
         if 'sign in' in text or 'login' in text:
-            for btn in buttons:
-                if 'sign in' in btn['text'].lower() or 'login' in btn['text'].lower():
-                    return create_action(
-                        ActionType.CLICK_ELEMENT,
-                        selector=btn['selector']
-                    ).dict()
+            if button_hits is None:
+                button_hits = _match_buttons(buttons)
+            btn = button_hits.get("login")
+            if btn:
+                return create_action(
+                    ActionType.CLICK_ELEMENT,
+                    selector=btn['selector']
+                ).dict()
             
             # Look for login links
             for link in links:
-                if 'login' in link['text'].lower() or 'sign in' in link['text'].lower():
+                link_text = link['text'].lower()
+                if 'login' in link_text or 'sign in' in link_text:
                     return create_action(
                         ActionType.CLICK_ELEMENT,
                         selector=link['selector']
@@ -682,12 +939,14 @@ class AutonomousPlanner:
                     ).dict()
             
             # Look for search buttons
-            for btn in buttons:
-                if 'search' in btn['text'].lower():
-                    return create_action(
-                        ActionType.CLICK_ELEMENT,
-                        selector=btn['selector']
-                    ).dict()
+            if button_hits is None:
+                button_hits = _match_buttons(buttons)
+            btn = button_hits.get("search")
+            if btn:
+                return create_action(
+                    ActionType.CLICK_ELEMENT,
+                    selector=btn['selector']
+                ).dict()
         
         # Rule 4: Page-specific handling
         if page_type == 'youtube_search':
@@ -718,13 +977,14 @@ class AutonomousPlanner:
             ).dict()
         
         # Rule 6: Look for primary actions
-        for btn in buttons:
-            btn_text = btn['text'].lower()
-            if any(keyword in btn_text for keyword in ['continue', 'next', 'submit', 'get started']):
-                return create_action(
-                    ActionType.CLICK_ELEMENT,
-                    selector=btn['selector']
-                ).dict()
+        if button_hits is None:
+            button_hits = _match_buttons(buttons)
+        btn = button_hits.get("primary")
+        if btn:
+            return create_action(
+                ActionType.CLICK_ELEMENT,
+                selector=btn['selector']
+            ).dict()
         
         # Default: wait and observe
         return create_action(
@@ -734,44 +994,47 @@ class AutonomousPlanner:
     
     def _find_search_input(self, inputs: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Find the most likely search input with fallback logic."""
-        # Priority order for search inputs
-        search_selectors = [
-            "input#search",
-            "input[name='q']",
-            "input[type='search']",
-            "input[placeholder*='search']",
-            "input[aria-label*='search']"
-        ]
-        
-        # First try exact matches
+        # One pass: a visible input with a known search selector wins outright,
+        # otherwise the first visible input that looks like a search box
+        partial_match = None
         for input_elem in inputs:
             if not input_elem.get('visible', False):
                 continue
-                
-            selector = input_elem.get('selector', '')
-            for search_selector in search_selectors:
-                if selector == search_selector:
-                    return input_elem
-        
-        # Then try partial matches
-        for input_elem in inputs:
-            if not input_elem.get('visible', False):
-                continue
-                
-            placeholder = input_elem.get('placeholder', '').lower()
-            input_id = input_elem.get('id', '').lower()
-            input_type = input_elem.get('type', '').lower()
             
-            if ('search' in placeholder or 'search' in input_id or 
-                input_type == 'search' or 'q' == input_id):
+            if input_elem.get('selector', '') in _SEARCH_INPUT_SELECTORS:
                 return input_elem
+            
+            if partial_match is None:
+                placeholder = (input_elem.get('placeholder') or '').lower()
+                input_id = (input_elem.get('id') or '').lower()
+                input_type = (input_elem.get('type') or '').lower()
+                
+                if ('search' in placeholder or 'search' in input_id or 
+                    input_type == 'search' or 'q' == input_id):
+                    partial_match = input_elem
         
-        return None
+        return partial_match
 
 # Global planner instance
 autonomous_planner = AutonomousPlanner()
 
 def plan_actions(command: str) -> List[Dict[str, Any]]:
+    """
+    Plan actions for a command, reusing the plan for repeated commands.
+    
+    The cached plan is shared, so each call returns copies of its action dicts.
+    """
+    return [
+        {key: value.copy() if isinstance(value, (dict, list)) else value for key, value in action.items()}
+        for action in _plan_actions_cached(command)
+    ]
+
+@lru_cache(maxsize=1024)
+def _plan_actions_cached(command: str) -> Tuple[Dict[str, Any], ...]:
+    """Memoized planning; the key is the exact command since queries keep their case."""
+    return tuple(_plan_actions(command))
+
+def _plan_actions(command: str) -> List[Dict[str, Any]]:
     """
     Enhanced planner that can handle complex, multi-step commands with Phase 4 features.
     
@@ -785,22 +1048,22 @@ def plan_actions(command: str) -> List[Dict[str, Any]]:
     - "open settings and change quality to 4k"
     """
     # Check for unsafe commands
-    if is_unsafe(command):
+    command_lower = command.lower()
+    if _UNSAFE_RE.search(command_lower):
         raise ValueError("This command contains potentially harmful operations and cannot be executed.")
     
     # Analyze task complexity
-    complexity = analyze_task_complexity(command)
-    command_lower = command.lower()
+    complexity = _complexity(command_lower)
     
     # Handle complex tasks first (video controls, playlists, etc.)
     if complexity == TaskComplexity.COMPLEX:
         # Check for video controls
-        video_action = handle_video_controls(command_lower)
+        video_action = _video_control_action(command_lower)
         if video_action:
             return [video_action]
         
         # Check for playlist operations
-        playlist_actions = create_playlist_actions(command_lower)
+        playlist_actions = _playlist_actions(command_lower)
         if playlist_actions:
             return playlist_actions
     
@@ -809,25 +1072,25 @@ def plan_actions(command: str) -> List[Dict[str, Any]]:
         return handle_compound_command(command)
     
     # Handle search commands
-    if any(word in command_lower for word in ["search", "find", "khojo", "dhundho"]):
+    if _SEARCH_VERB_RE.search(command_lower):
         site, clean_cmd = extract_website(command)
         query = extract_search_query(clean_cmd)
         
         if site == "youtube":
-            return [a.dict() for a in create_youtube_actions(query)]
+            return create_youtube_action_dicts(query)
         elif site:
-            return [a.dict() for a in create_web_search_actions(query, site)]
+            return create_web_search_action_dicts(query, site)
         else:
-            return [a.dict() for a in create_web_search_actions(query)]
+            return create_web_search_action_dicts(query)
     
     # Handle open commands
     if command_lower.startswith(('open ', 'kholo ', 'chalo ', 'go to ')):
-        target = re.sub(r'^(open|kholo|chalo|go to)\s+', '', command, flags=re.IGNORECASE)
-        return [a.dict() for a in create_open_actions(target)]
+        target = _strip_open_prefix(command, command_lower)
+        return create_open_action_dicts(target)
     
     # Default: treat as a search query
     try:
-        return [a.dict() for a in create_web_search_actions(command)]
+        return create_web_search_action_dicts(command)
     except Exception as e:
         logger.error(f"Error in plan_actions: {str(e)}")
         # Fallback to a simple search
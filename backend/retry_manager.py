@@ -6,17 +6,31 @@ Manages the 3-attempt retry logic with intelligent error recovery.
 
 import logging
 import asyncio
+import time
+from collections import Counter, deque
 from typing import Dict, Any, List, Optional
 from error_handler import error_handler, ErrorType, RecoveryStrategy
+from backoff import backoff_delay
 
 logger = logging.getLogger(__name__)
 
 class RetryManager:
     """Manages retry logic with error recovery strategies."""
     
-    def __init__(self, max_retries: int = 3):
+    def __init__(self, max_retries: int = 3, history_size: int = 50,
+                 base_delay: float = 0.5, max_delay: float = 8.0, jitter: float = 0.5):
         self.max_retries = max_retries
-        self.retry_history = []
+        # Backoff between attempts doubles from base_delay, up to max_delay, plus
+        # up to `jitter` of itself at random so failing actions aren't hammered
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        # Only the most recent retry records are kept, to avoid memory issues;
+        # statistics counters are kept in step with it as records come and go
+        self.retry_history = deque(maxlen=history_size)
+        self._successful_retries = 0
+        self._total_attempts = 0
+        self._error_counts = Counter()
         
     async def execute_with_retry(self, action: Dict[str, Any], executor_func) -> Dict[str, Any]:
         """
@@ -35,7 +49,7 @@ class RetryManager:
         
         while attempt_count < self.max_retries:
             try:
-                logger.info(f"Executing action {action['action']} (attempt {attempt_count + 1}/{self.max_retries})")
+                logger.info("Executing action %s (attempt %d/%d)", action['action'], attempt_count + 1, self.max_retries)
                 
                 # Execute the action
                 result = await executor_func(action)
@@ -53,43 +67,27 @@ class RetryManager:
                 
                 # Failed - analyze error and apply correction
                 last_error = result
-                logger.warning(f"Action failed on attempt {attempt_count + 1}: {result.get('error', 'Unknown error')}")
+                logger.warning("Action failed on attempt %d: %s", attempt_count + 1, result.get('error', 'Unknown error'))
                 
                 # Check if we should abort
                 if error_handler.should_abort(result, attempt_count):
                     logger.error("Aborting due to persistent error")
                     break
                 
-                # Generate correction for next attempt
+                # Generate correction for next attempt. Scroll/wait recoveries come back
+                # as one "sequence" action, so the next attempt runs them together
                 if attempt_count < self.max_retries - 1:
+                    if action.get("action") == "sequence":
+                        # Correct the retried action, not the recovery wrapped around it
+                        action = action["steps"][-1]
                     action = error_handler.generate_correction(action, result, attempt_count)
+                    if action.get("action") == "sequence":
+                        # The retried step always starts over from the original action,
+                        # so repeated recoveries don't compound its timeout
+                        action["steps"][-1] = error_handler.retry_with_longer_timeout(original_action)
                     
                     # Handle special recovery actions
-                    if action.get("action") == "scrollPage":
-                        # Execute scroll first, then retry original action
-                        scroll_result = await executor_func(action)
-                        if scroll_result.get("ok", False):
-                            # Restore original action for retry
-                            action = original_action.copy()
-                            # Increase timeout for the retry
-                            action["timeout"] = action.get("timeout", 10000) * 1.5
-                        else:
-                            # Scroll failed - continue with corrected action
-                            pass
-                    
-                    elif action.get("action") == "wait":
-                        # Execute wait first, then retry original action
-                        wait_result = await executor_func(action)
-                        if wait_result.get("ok", False):
-                            # Restore original action for retry
-                            action = original_action.copy()
-                            # Increase timeout for the retry
-                            action["timeout"] = action.get("timeout", 10000) * 1.5
-                        else:
-                            # Wait failed - continue with corrected action
-                            pass
-                    
-                    elif action.get("action") == "replan":
+                    if action.get("action") == "replan":
                         # Trigger replan - this will be handled by the planner
                         self._record_retry(original_action, attempt_count, last_error, success=False)
                         return {
@@ -103,7 +101,7 @@ class RetryManager:
                         }
                 
             except Exception as e:
-                logger.error(f"Exception during execution attempt {attempt_count + 1}: {str(e)}")
+                logger.error("Exception during execution attempt %d: %s", attempt_count + 1, e)
                 last_error = {"ok": False, "error": str(e)}
                 
                 # Check if we should abort on exception
@@ -111,6 +109,8 @@ class RetryManager:
                     break
             
             attempt_count += 1
+            if attempt_count < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt_count))
         
         # All retries failed
         self._record_retry(original_action, attempt_count, last_error, success=False)
@@ -122,6 +122,10 @@ class RetryManager:
             "max_retries_exceeded": True
         }
     
+    def _backoff(self, attempt: int) -> float:
+        """Backoff before the next attempt of an action after its (1-based) failed attempt."""
+        return backoff_delay(attempt, self.base_delay, self.max_delay, self.jitter)
+    
     def _record_retry(self, action: Dict[str, Any], attempt_count: int, result: Dict[str, Any], success: bool):
         """Record retry attempt for analysis."""
         retry_record = {
@@ -129,13 +133,23 @@ class RetryManager:
             "attempts": attempt_count + 1,
             "success": success,
             "result": result,
-            "timestamp": asyncio.get_event_loop().time()
+            "timestamp": time.monotonic()
         }
+        if len(self.retry_history) == self.retry_history.maxlen:
+            self._update_counts(self.retry_history.popleft(), -1)
         self.retry_history.append(retry_record)
-        
-        # Keep only last 50 retry records to avoid memory issues
-        if len(self.retry_history) > 50:
-            self.retry_history = self.retry_history[-50:]
+        self._update_counts(retry_record, 1)
+    
+    def _update_counts(self, record: Dict[str, Any], sign: int):
+        """Add (sign=1) or remove (sign=-1) a retry record from the statistics counters."""
+        self._total_attempts += sign * record["attempts"]
+        if record["success"]:
+            self._successful_retries += sign
+        else:
+            error_msg = record["result"].get("error", "Unknown")
+            self._error_counts[error_msg] += sign
+            if not self._error_counts[error_msg]:
+                del self._error_counts[error_msg]
     
     def get_retry_statistics(self) -> Dict[str, Any]:
         """Get statistics about retry attempts."""
@@ -143,19 +157,11 @@ class RetryManager:
             return {"total_retries": 0}
         
         total_retries = len(self.retry_history)
-        successful_retries = sum(1 for r in self.retry_history if r["success"])
+        successful_retries = self._successful_retries
         failed_retries = total_retries - successful_retries
         
         # Calculate average attempts per action
-        total_attempts = sum(r["attempts"] for r in self.retry_history)
-        avg_attempts = total_attempts / total_retries if total_retries > 0 else 0
-        
-        # Most common error types
-        error_types = {}
-        for record in self.retry_history:
-            if not record["success"] and "result" in record:
-                error_msg = record["result"].get("error", "Unknown")
-                error_types[error_msg] = error_types.get(error_msg, 0) + 1
+        avg_attempts = self._total_attempts / total_retries if total_retries > 0 else 0
         
         return {
             "total_retries": total_retries,
@@ -163,12 +169,15 @@ class RetryManager:
             "failed_retries": failed_retries,
             "success_rate": (successful_retries / total_retries) * 100 if total_retries > 0 else 0,
             "average_attempts": avg_attempts,
-            "most_common_errors": sorted(error_types.items(), key=lambda x: x[1], reverse=True)[:5]
+            "most_common_errors": self._error_counts.most_common(5)
         }
     
     def reset_history(self):
         """Reset retry history."""
-        self.retry_history = []
+        self.retry_history.clear()
+        self._successful_retries = 0
+        self._total_attempts = 0
+        self._error_counts.clear()
 
 # Global retry manager instance
 retry_manager = RetryManager()
@@ -6,11 +6,13 @@ Handles execution of multi-step tasks with error recovery and retry logic.
 
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional, Callable, Awaitable
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Union
 from enum import Enum
 from pydantic import BaseModel, Field
 
-from .action_schema import Action, ActionType, SelectorStrategy, create_action
+from .action_schema import Action, ActionType, ANY_ACTION_ADAPTER, SelectorStrategy, create_action
+from .backoff import backoff_delay
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,13 +25,26 @@ class TaskStatus(str, Enum):
     FAILED = "failed"
     RETRYING = "retrying"
 
-class TaskStep(BaseModel):
+@dataclass(slots=True)
+class TaskStep:
     """Represents a single step in a task."""
     action: Action
     status: TaskStatus = TaskStatus.PENDING
     attempt: int = 0
     error: Optional[str] = None
     result: Optional[Dict[str, Any]] = None
+    # The action dict the step was created from, reused when the step is serialized
+    raw: Optional[Dict[str, Any]] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the step for the task result, dumping the action only if no dict was given."""
+        return {
+            "action": self.raw if self.raw is not None else self.action.dict(),
+            "status": self.status,
+            "attempt": self.attempt,
+            "error": self.error,
+            "result": self.result
+        }
 
 class TaskResult(BaseModel):
     """Result of a completed task."""
@@ -40,14 +55,56 @@ class TaskResult(BaseModel):
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+def _partition_into_groups(task_steps: List[TaskStep]) -> List[List[int]]:
+    """
+    Split step indices into groups that run together, in order.
+    
+    Consecutive steps whose actions set metadata["parallelizable"] form one
+    group and run concurrently; every other step is a group of its own.
+    """
+    groups: List[List[int]] = []
+    previous_parallel = False
+    for index, step in enumerate(task_steps):
+        parallel = bool((step.action.metadata or {}).get("parallelizable"))
+        if parallel and previous_parallel:
+            groups[-1].append(index)
+        else:
+            groups.append([index])
+        previous_parallel = parallel
+    return groups
+
+async def run_sequence(action: Action, find_handler: Callable[[str], Optional[Callable]], *args) -> Dict:
+    """
+    Run the steps of a compound action (e.g. scroll then retry) in one invocation.
+    
+    Each step is validated as an action and run by the handler find_handler returns
+    for its type, called with the step and any extra args (e.g. the command context).
+    """
+    logger.info("Running sequence of %d steps", len(action.steps))
+    results = []
+    for step in action.steps:
+        sub_action = ANY_ACTION_ADAPTER.validate_python(step)
+        handler = find_handler(sub_action.action)
+        if handler is None:
+            raise ValueError(f"No handler registered for action type: {sub_action.action}")
+        results.append(await handler(sub_action, *args))
+    return {"status": "success", "action": "sequence", "steps": results}
+
 class TaskExecutor:
     """Executes tasks with retry and error handling."""
     
-    def __init__(self, max_retries: int = 3, retry_delay: float = 1.0):
+    def __init__(self, max_retries: int = 3, retry_delay: float = 1.0,
+                 max_delay: float = 30.0, jitter: float = 0.5):
         self.max_retries = max_retries
+        # Backoff doubles from retry_delay per failed attempt, up to max_delay,
+        # plus up to `jitter` of itself at random so retries don't synchronize
         self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
         self.tasks: Dict[str, List[TaskStep]] = {}
         self.execution_hooks: Dict[str, Callable[[str, Dict], Awaitable[Dict]]] = {}
+        # The same handlers keyed by lowercased action type, for case-insensitive lookups
+        self._hooks_by_lower: Dict[str, Callable[[str, Dict], Awaitable[Dict]]] = {}
         
         # Register default action handlers
         self._register_default_handlers()
@@ -59,6 +116,8 @@ class TaskExecutor:
         self.register_handler(ActionType.CLICK_ELEMENT, self._handle_click_element)
         self.register_handler(ActionType.KEY_PRESS, self._handle_key_press)
         self.register_handler(ActionType.WAIT_FOR_ELEMENT, self._handle_wait_for_element)
+        self.register_handler(ActionType.SCROLL_PAGE, self._handle_scroll_page)
+        self.register_handler(ActionType.SEQUENCE, self._handle_sequence)
         
         # New Phase 4 action handlers
         self.register_handler(ActionType.PLAY_VIDEO, self._handle_play_video)
@@ -84,92 +143,81 @@ class TaskExecutor:
         if isinstance(action_type, ActionType):
             action_type = action_type.value
         self.execution_hooks[action_type] = handler
+        self._hooks_by_lower[action_type.lower()] = handler
     
-    async def execute_task(self, task_id: str, actions: List[Dict]) -> TaskResult:
-        """Execute a task with the given actions."""
+    async def execute(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a single action once, for callers that retry on their own
+        (RetryManager.execute_with_retry).
+        
+        Returns the handler's result with ok=True, or ok=False and the error.
+        """
+        try:
+            step_action = ANY_ACTION_ADAPTER.validate_python(action)
+            handler = self._find_handler(step_action.action)
+            if handler is None:
+                raise ValueError(f"No handler registered for action type: {step_action.action}")
+            return {"ok": True, **await handler(step_action)}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+    
+    async def execute_task(self, task_id: str, actions: List[Union[Dict, Action]]) -> TaskResult:
+        """Execute a task with the given actions; Action objects are taken as already validated."""
         if task_id in self.tasks:
             raise ValueError(f"Task with ID {task_id} already exists")
         
         # Convert dicts to Action objects
         task_steps = []
         for i, action_dict in enumerate(actions):
+            if isinstance(action_dict, Action):
+                task_steps.append(TaskStep(action=action_dict))
+                continue
             try:
-                action = Action(**action_dict)
-                task_steps.append(TaskStep(action=action))
-                logger.debug(f"Created action {i}: {action.action} with data: {action_dict}")
+                action = ANY_ACTION_ADAPTER.validate_python(action_dict)
+                task_steps.append(TaskStep(action=action, raw=action_dict))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Created action %d: %s with data: %s", i, action.action, action_dict)
             except Exception as e:
-                logger.error(f"Error creating action from dict: {action_dict}")
+                logger.error("Error creating action from dict: %s", action_dict)
                 raise ValueError(f"Invalid action at index {i}: {str(e)}")
                 
         self.tasks[task_id] = task_steps
-        logger.info(f"Task {task_id} created with {len(task_steps)} steps")
+        logger.info("Task %s created with %d steps", task_id, len(task_steps))
         
-        results = []
+        # A step that runs out of retries fails the task; steps still running alongside it are cancelled
+        errors: List[str] = []
         
-        for i, step in enumerate(task_steps, 1):
-            step.status = TaskStatus.RUNNING
-            
-            # Execute the step with retries
-            while step.attempt < self.max_retries:
-                try:
-                    logger.info(f"Executing step {i}/{len(task_steps)}: {step.action.action}")
-                    
-                    # Get the appropriate handler
-                    action_type = step.action.action  # This is the ActionType enum
-                    logger.debug(f"Processing action: {action_type} (type: {type(action_type).__name__})")
-                    
-                    # Log all available handlers for debugging
-                    logger.debug(f"Available handlers: {list(self.execution_hooks.keys())}")
-                    
-                    # Try to get the handler using the enum value
-                    handler = self.execution_hooks.get(action_type.value)
-                    
-                    if not handler:
-                        # Try to find a matching handler by string comparison as fallback
-                        for key, h in self.execution_hooks.items():
-                            if key.lower() == action_type.value.lower():
-                                handler = h
-                                logger.warning(f"Found case-insensitive match for handler: {key}")
-                                break
-                    
-                    if not handler:
-                        raise ValueError(
-                            f"No handler registered for action type: {action_type} (value: {action_type.value})\n                            "f"Available handlers: {list(self.execution_hooks.keys())}"
-                        )
-                        
-                    logger.debug(f"Found handler for action type {action_type}: {handler.__name__}")
-                    
-                    # Execute the handler
-                    result = await handler(step.action)
-                    
-                    # Update step status
-                    step.status = TaskStatus.COMPLETED
-                    step.result = result
-                    results.append(result)
-                    break
-                    
-                except Exception as e:
-                    step.attempt += 1
-                    step.error = str(e)
-                    
-                    if step.attempt >= self.max_retries:
-                        step.status = TaskStatus.FAILED
-                        logger.error(f"Step {i} failed after {self.max_retries} attempts: {e}")
-                        
-                        # Return partial results if some steps succeeded
-                        return TaskResult(
-                            task_id=task_id,
-                            status=TaskStatus.FAILED,
-                            steps_completed=i-1,
-                            total_steps=len(task_steps),
-                            error=f"Step {i} failed: {e}",
-                            result={"steps": [s.dict() for s in task_steps]}
-                        )
-                    
-                    # Wait before retrying
-                    step.status = TaskStatus.RETRYING
-                    logger.warning(f"Step {i} failed (attempt {step.attempt}/{self.max_retries}), retrying...")
-                    await asyncio.sleep(self.retry_delay)
+        async def run_step(index: int):
+            try:
+                await self._run_step(index, task_steps)
+            except asyncio.CancelledError:
+                # Report the cancelled sibling as failed, not as still running
+                step = task_steps[index]
+                step.status = TaskStatus.FAILED
+                step.error = "Cancelled after another step failed"
+                raise
+            except Exception as e:
+                errors.append(f"Step {index + 1} failed: {e}")
+                raise
+        
+        try:
+            for group in _partition_into_groups(task_steps):
+                if len(group) == 1:
+                    await run_step(group[0])
+                else:
+                    async with asyncio.TaskGroup() as tg:
+                        for index in group:
+                            tg.create_task(run_step(index))
+        except Exception:
+            # Return partial results if some steps succeeded
+            return TaskResult(
+                task_id=task_id,
+                status=TaskStatus.FAILED,
+                steps_completed=sum(s.status == TaskStatus.COMPLETED for s in task_steps),
+                total_steps=len(task_steps),
+                error=errors[0],
+                result={"steps": [s.to_dict() for s in task_steps]}
+            )
         
         # All steps completed successfully
         return TaskResult(
@@ -177,32 +225,106 @@ class TaskExecutor:
             status=TaskStatus.COMPLETED,
             steps_completed=len(task_steps),
             total_steps=len(task_steps),
-            result={"steps": [s.dict() for s in task_steps]}
+            result={"steps": [s.to_dict() for s in task_steps]}
         )
     
+    async def _run_step(self, index: int, task_steps: List[TaskStep]):
+        """Run one step with retries; raises the last error once retries are exhausted."""
+        step = task_steps[index]
+        i = index + 1
+        step.status = TaskStatus.RUNNING
+        
+        # Execute the step with retries
+        while step.attempt < self.max_retries:
+            try:
+                logger.info("Executing step %d/%d: %s", i, len(task_steps), step.action.action)
+                
+                # Get the appropriate handler
+                action_type = step.action.action
+                # Actions store the enum's value (use_enum_values); accept either form
+                action_key = getattr(action_type, "value", action_type)
+                debug = logger.isEnabledFor(logging.DEBUG)
+                if debug:
+                    logger.debug("Processing action: %s (type: %s)", action_type, type(action_type).__name__)
+                    
+                    # Log all available handlers for debugging
+                    logger.debug("Available handlers: %s", list(self.execution_hooks.keys()))
+                
+                handler = self._find_handler(action_key)
+                
+                if not handler:
+                    raise ValueError(
+                        f"No handler registered for action type: {action_type} (value: {action_key})\n                            "f"Available handlers: {list(self.execution_hooks.keys())}"
+                    )
+                
+                if debug:
+                    logger.debug("Found handler for action type %s: %s", action_type, handler.__name__)
+                
+                # Execute the handler
+                result = await handler(step.action)
+                
+                # Update step status
+                step.status = TaskStatus.COMPLETED
+                step.result = result
+                return
+                
+            except Exception as e:
+                step.attempt += 1
+                step.error = str(e)
+                
+                if step.attempt >= self.max_retries:
+                    step.status = TaskStatus.FAILED
+                    logger.error("Step %d failed after %d attempts: %s", i, self.max_retries, e)
+                    raise
+                
+                # Wait before retrying
+                step.status = TaskStatus.RETRYING
+                logger.warning("Step %d failed (attempt %d/%d), retrying...", i, step.attempt, self.max_retries)
+                await asyncio.sleep(self._backoff(step.attempt))
+    
+    def _find_handler(self, action_key: str) -> Optional[Callable]:
+        """Handler for an action type: exact match first, then a case-insensitive one."""
+        handler = self.execution_hooks.get(action_key)
+        if handler is None:
+            handler = self._hooks_by_lower.get(action_key.lower())
+            if handler is not None:
+                logger.warning("Found case-insensitive match for handler: %s", action_key)
+        return handler
+    
+    def _backoff(self, attempt: int) -> float:
+        """Backoff before retrying a step after its (1-based) failed attempt."""
+        return backoff_delay(attempt, self.retry_delay, self.max_delay, self.jitter)
+    
     # --- Default Action Handlers ---
     
     async def _handle_open_url(self, action: Action) -> Dict:
         # In a real implementation, this would use a browser automation library
-        logger.info(f"Opening URL: {action.url}")
+        logger.info("Opening URL: %s", action.url)
         return {"status": "success", "url": action.url}
     
     async def _handle_type_text(self, action: Action) -> Dict:
-        logger.info(f"Typing text '{action.text}' into {action.selector}")
+        logger.info("Typing text '%s' into %s", action.text, action.selector)
         return {"status": "success", "text_entered": action.text}
     
     async def _handle_click_element(self, action: Action) -> Dict:
-        logger.info(f"Clicking element: {action.selector}")
+        logger.info("Clicking element: %s", action.selector)
         return {"status": "success", "element_clicked": action.selector}
     
     async def _handle_key_press(self, action: Action) -> Dict:
-        logger.info(f"Pressing key: {action.key}")
+        logger.info("Pressing key: %s", action.key)
         return {"status": "success", "key_pressed": action.key}
     
     async def _handle_wait_for_element(self, action: Action) -> Dict:
-        logger.info(f"Waiting for element: {action.selector} (timeout: {action.timeout_ms}ms)")
+        logger.info("Waiting for element: %s (timeout: %sms)", action.selector, action.timeout_ms)
         return {"status": "success", "element_found": action.selector}
     
+    async def _handle_scroll_page(self, action: Action) -> Dict:
+        logger.info("Scrolling %s by %s", action.direction, action.amount)
+        return {"status": "success", "action": "scroll_page", "direction": action.direction, "amount": action.amount}
+    
+    async def _handle_sequence(self, action: Action) -> Dict:
+        return await run_sequence(action, self._find_handler)
+    
     # --- Phase 4 Action Handlers ---
     
     async def _handle_play_video(self, action: Action) -> Dict:
@@ -218,19 +340,18 @@ class TaskExecutor:
         return {"status": "success", "action": "open_settings_menu"}
     
     async def _handle_set_quality(self, action: Action) -> Dict:
-        quality = getattr(action, 'quality', 'auto')
-        logger.info(f"Setting video quality to: {quality}")
-        return {"status": "success", "action": "set_quality", "quality": quality}
+        logger.info("Setting video quality to: %s", action.quality)
+        return {"status": "success", "action": "set_quality", "quality": action.quality}
     
     async def _handle_create_playlist(self, action: Action) -> Dict:
-        name = getattr(action, 'name', 'New Playlist')
-        logger.info(f"Creating playlist: {name}")
+        name = action.playlist_name or "New Playlist"
+        logger.info("Creating playlist: %s", name)
         return {"status": "success", "action": "create_playlist", "name": name}
     
     async def _handle_add_to_playlist(self, action: Action) -> Dict:
-        item = getattr(action, 'item', 'current_video')
-        playlist = getattr(action, 'playlist', 'default')
-        logger.info(f"Adding {item} to playlist: {playlist}")
+        item = action.playlist_item or "current_video"
+        playlist = action.playlist_name or "default"
+        logger.info("Adding %s to playlist: %s", item, playlist)
         return {"status": "success", "action": "add_to_playlist", "item": item, "playlist": playlist}
     
     async def _handle_save_playlist(self, action: Action) -> Dict:
@@ -238,26 +359,26 @@ class TaskExecutor:
         return {"status": "success", "action": "save_playlist"}
     
     async def _handle_open_playlist(self, action: Action) -> Dict:
-        name = getattr(action, 'name', 'default')
-        logger.info(f"Opening playlist: {name}")
+        name = action.playlist_name or "default"
+        logger.info("Opening playlist: %s", name)
         return {"status": "success", "action": "open_playlist", "name": name}
     
     async def _handle_play_playlist(self, action: Action) -> Dict:
-        name = getattr(action, 'name', 'default')
-        logger.info(f"Playing playlist: {name}")
+        name = action.playlist_name or "default"
+        logger.info("Playing playlist: %s", name)
         return {"status": "success", "action": "play_playlist", "name": name}
     
     async def _handle_wait_for_navigation(self, action: Action) -> Dict:
-        timeout = getattr(action, 'timeout_ms', 10000)
-        logger.info(f"Waiting for navigation (timeout: {timeout}ms)")
-        return {"status": "success", "action": "wait_for_navigation", "timeout_ms": timeout}
+        logger.info("Waiting for navigation (timeout: %sms)", action.timeout_ms)
+        return {"status": "success", "action": "wait_for_navigation", "timeout_ms": action.timeout_ms}
     
     async def _handle_retry_action(self, action: Action) -> Dict:
-        max_retries = getattr(action, 'max_retries', 3)
-        logger.info(f"Retrying action (max_retries: {max_retries})")
-        return {"status": "success", "action": "retry_action", "max_retries": max_retries}
+        logger.info("Retrying action (max_retries: %s)", action.max_retries)
+        return {"status": "success", "action": "retry_action", "max_retries": action.max_retries}
     
     async def _handle_scroll_until_found(self, action: Action) -> Dict:
-        selector = getattr(action, 'selector', '')
-        logger.info(f"Scrolling until element is found: {selector}")
-        return {"status": "success", "action": "scroll_until_found", "selector": selector}
+        logger.info("Scrolling until element is found: %s", action.selector)
+        return {"status": "success", "action": "scroll_until_found", "selector": action.selector}
+
+# Global task executor instance
+task_executor = TaskExecutor()
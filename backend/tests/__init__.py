@@ -0,0 +1,18 @@
+"""
+Tests for the AutoPilot AI backend.
+
+Run from the repository root:
+
+    python -m unittest discover -s backend/tests -t backend
+
+Modules that import their siblings absolutely (llm_planner, retry_manager, ...)
+are imported by name; the ones using relative imports (task_executor,
+enhanced_task_executor, ...) through the backend package.
+"""
+import os
+import sys
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _path in (_BACKEND_DIR, os.path.dirname(_BACKEND_DIR)):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
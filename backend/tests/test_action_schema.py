@@ -0,0 +1,42 @@
+"""Tests for the action models."""
+import unittest
+
+from action_schema import (
+    ACTION_MODELS, ACTIONS_ADAPTER, Action, ActionType, SequenceAction, construct_actions, create_action,
+    create_action_dict,
+)
+
+
+class TypedActionTest(unittest.TestCase):
+    def test_typed_models_accept_what_action_accepts(self):
+        for action_type in ActionType:
+            if action_type == ActionType.SEQUENCE:
+                continue
+            raw = {"action": action_type.value}
+            with self.subTest(action=action_type.value):
+                typed, = ACTIONS_ADAPTER.validate_python([raw])
+                self.assertIsInstance(typed, ACTION_MODELS[action_type])
+                self.assertEqual(typed.model_dump(), Action(**raw).model_dump())
+
+    def test_typed_models_serialize_like_action(self):
+        raw = {"action": "typeText", "selector": "input#q", "text": "lofi", "timeout_ms": 100}
+        typed, = ACTIONS_ADAPTER.validate_python([raw])
+        self.assertEqual(typed.model_dump(), Action(**raw).model_dump())
+
+    def test_sequence_keeps_its_steps(self):
+        steps = [{"action": "scrollPage"}, {"action": "clickElement", "selector": "#go"}]
+        sequence, = ACTIONS_ADAPTER.validate_python([{"action": "sequence", "steps": steps}])
+        self.assertIsInstance(sequence, SequenceAction)
+        self.assertEqual(sequence.steps, steps)
+
+    def test_construct_actions_matches_validation(self):
+        raw = [{"action": "openUrl", "url": "https://example.com"}, {"action": "keyPress", "key": "Enter"}]
+        self.assertEqual(construct_actions(raw), ACTIONS_ADAPTER.validate_python(raw))
+
+    def test_create_action_dict_matches_create_action(self):
+        expected = create_action(ActionType.CLICK_ELEMENT, selector="#go").dict()
+        self.assertEqual(create_action_dict(ActionType.CLICK_ELEMENT, selector="#go"), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Tests for the planner endpoints and LLM provider clients."""
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+import app
+import llm_planner
+
+OBSERVATION = {"text": "search", "inputs": [{"visible": True, "selector": "input#search"}],
+               "buttons": [], "links": []}
+
+
+class NextActionTest(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app.app)
+        fingerprint = mock.Mock(wraps=llm_planner.observation_fingerprint)
+        for module in (app, llm_planner):
+            patcher = mock.patch.object(module, "observation_fingerprint", fingerprint)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.fingerprint = fingerprint
+        decide = mock.patch.object(app.autonomous_planner, "decide_next_step",
+                                   wraps=app.autonomous_planner.decide_next_step)
+        self.decide_next_step = decide.start()
+        self.addCleanup(decide.stop)
+
+    def next_action(self, goal, step, observation=OBSERVATION):
+        response = self.client.post("/autonomous/next-action",
+                                    json={"goal": goal, "step": step, "observation": observation})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_unchanged_observation_reuses_the_previous_actions(self):
+        first = self.next_action("search cats on youtube", 0)
+        second = self.next_action("search cats on youtube", 0)
+
+        self.assertEqual(first, second)
+        self.assertEqual(first["action"]["action"], "typeText")
+        self.assertEqual(self.decide_next_step.call_count, 1)
+        # One fingerprint per request, shared with the planner's decision cache
+        self.assertEqual(self.fingerprint.call_count, 2)
+
+    def test_new_step_or_page_plans_again(self):
+        self.next_action("search dogs on youtube", 0)
+        self.next_action("search dogs on youtube", 1)
+        self.next_action("search dogs on youtube", 1, {**OBSERVATION, "text": "other"})
+
+        self.assertEqual(self.decide_next_step.call_count, 3)
+
+    def test_new_goal_plans_again(self):
+        self.next_action("search birds on youtube", 0)
+        self.next_action("search fish on youtube", 0)
+
+        self.assertEqual(self.decide_next_step.call_count, 2)
+
+
+class ProviderRequestTest(unittest.IsolatedAsyncioTestCase):
+    async def sent_request(self, client, command="open github"):
+        with mock.patch.object(client, "send_request", new=mock.AsyncMock(return_value=[])) as send:
+            await client.generate_plan(command, timeout_ms=1000)
+        request, sent_command = send.await_args.args
+        self.assertEqual(sent_command, command)
+        return request
+
+    @mock.patch.dict("os.environ", {"OPENAI_API_KEY": "test"})
+    async def test_openai_sends_the_static_prompt_first(self):
+        request = await self.sent_request(app.OpenAIClient())
+        self.assertEqual(request["messages"], [
+            {"role": "system", "content": app.PLANNER_SYSTEM_PROMPT},
+            {"role": "user", "content": "open github"}
+        ])
+        self.assertEqual(request["prompt_cache_key"], app.PLANNER_PROMPT_CACHE_KEY)
+
+    @mock.patch.dict("os.environ", {"ANTHROPIC_API_KEY": "test"})
+    async def test_claude_marks_the_static_prompt_cacheable(self):
+        request = await self.sent_request(app.ClaudeClient())
+        self.assertEqual(request["system"], [{
+            "type": "text", "text": app.PLANNER_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}
+        }])
+        self.assertEqual(request["messages"], [{"role": "user", "content": "open github"}])
+
+    @mock.patch.dict("os.environ", {"GEMINI_API_KEY": "test", "GEMINI_CACHED_CONTENT": ""})
+    async def test_gemini_references_the_cached_prompt_when_configured(self):
+        client = app.GeminiClient()
+        request = await self.sent_request(client)
+        self.assertEqual(request, {"system_instruction": app.PLANNER_SYSTEM_PROMPT, "contents": ["open github"]})
+
+        client.cached_content = "cachedContents/planner"
+        request = await self.sent_request(client)
+        self.assertEqual(request, {"cached_content": "cachedContents/planner", "contents": ["open github"]})
+
+    @mock.patch.dict("os.environ", {"OPENAI_API_KEY": "test"})
+    async def test_unwired_transport_plans_with_the_heuristic_planner(self):
+        plan = await app.OpenAIClient().generate_plan("open github")
+        self.assertEqual(plan, app.plan_actions("open github"))
+
+
+if __name__ == "__main__":
+    unittest.main()
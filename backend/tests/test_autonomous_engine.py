@@ -0,0 +1,39 @@
+"""Tests for the autonomous engine's execution statistics."""
+import json
+import unittest
+
+from autonomous_engine import AutonomousEngine, ExecutionRecord
+
+
+def record(goal, completed, duration=1.0):
+    return ExecutionRecord(goal=goal, timestamp="2024-01-01T00:00:00", duration=duration,
+                           completed=completed, subgoals_completed=2 if completed else 1, total_subgoals=2)
+
+
+class ExecutionStatisticsTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = AutonomousEngine(history_size=3)
+
+    def test_statistics_are_plain_json(self):
+        self.engine._record_execution(record("find laptops", True))
+
+        stats = json.loads(json.dumps(self.engine.get_execution_statistics()))
+        self.assertEqual(stats["recent_executions"], [{
+            "goal": "find laptops", "timestamp": "2024-01-01T00:00:00", "duration": 1.0,
+            "completed": True, "subgoals_completed": 2, "total_subgoals": 2
+        }])
+
+    def test_totals_follow_the_bounded_history(self):
+        for i, completed in enumerate([False, True, True, False]):
+            self.engine._record_execution(record(f"goal {i}", completed, duration=i))
+
+        stats = self.engine.get_execution_statistics()
+        self.assertEqual(stats["total_executions"], 3)
+        self.assertEqual(stats["successful_executions"], 2)
+        self.assertEqual(stats["average_duration"], 2.0)
+        self.assertEqual([r["goal"] for r in stats["recent_executions"]], ["goal 1", "goal 2", "goal 3"])
+        self.assertEqual(json.loads(self.engine.dump_execution_history()), stats["recent_executions"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Tests for the autonomous execution loop."""
+import asyncio
+import unittest
+from unittest import mock
+
+from backend.autonomous_executor import AutonomousExecutor
+
+
+class ExecuteGoalTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.executor = AutonomousExecutor(dom_settle_timeout=0.01)
+
+    async def test_runs_the_plan_to_completion(self):
+        outcome = await self.executor.execute_goal("open github", {"task_id": "t1"})
+
+        self.assertEqual(outcome["status"], "completed")
+        history = outcome["context"]["execution_history"]
+        self.assertEqual([entry["action"]["action"] for entry in history], ["openUrl"])
+        self.assertTrue(history[0]["result"]["success"])
+        self.assertEqual(outcome["context"]["current_url"], "https://github.com")
+        self.assertEqual(outcome["context"]["current_step"], 1)
+
+    async def test_unsafe_command_is_an_error(self):
+        outcome = await self.executor.execute_goal("format disk", {})
+        self.assertEqual(outcome["status"], "error")
+        self.assertIn("harmful", outcome["message"])
+
+    async def test_stops_after_max_steps(self):
+        executor = AutonomousExecutor(max_steps=2, dom_settle_timeout=0.01)
+        outcome = await executor.execute_goal("open youtube and search for lofi", {"task_id": "t1"})
+
+        self.assertEqual(outcome["status"], "max_steps_reached")
+        self.assertEqual(len(outcome["context"]["execution_history"]), 2)
+
+
+class DomSignalTest(unittest.IsolatedAsyncioTestCase):
+    async def test_signal_wakes_the_waiting_action(self):
+        executor = AutonomousExecutor(dom_settle_timeout=5)
+        with executor._dom_signal("t1") as dom_ready:
+            executor.notify_dom_ready("t1")
+            await asyncio.wait_for(dom_ready.wait(), timeout=1)
+
+    async def test_signals_for_idle_tasks_are_ignored(self):
+        executor = AutonomousExecutor()
+        executor.notify_dom_ready("unknown")
+        self.assertEqual(executor._dom_waiters, {})
+
+    async def test_entries_are_dropped_after_each_action(self):
+        executor = AutonomousExecutor(dom_settle_timeout=0.01)
+        await executor.execute_goal("open youtube and search for lofi", {"task_id": "t1"})
+        self.assertEqual(executor._dom_waiters, {})
+
+    async def test_signal_before_the_action_does_not_count(self):
+        executor = AutonomousExecutor()
+        executor.notify_dom_ready("t1")
+        with executor._dom_signal("t1") as dom_ready:
+            self.assertFalse(dom_ready.is_set())
+
+
+class ConcurrentGoalsTest(unittest.IsolatedAsyncioTestCase):
+    async def test_each_goal_keeps_its_own_deadline(self):
+        clock = [0.0]
+        executor = AutonomousExecutor(timeout_seconds=10)
+
+        async def slow_action(action, context):
+            # Every action takes six seconds of the fake clock
+            clock[0] += 6
+            await asyncio.sleep(0)
+            return {"success": True, "timestamp": str(clock[0])}
+
+        executor._execute_action = slow_action
+        command = "open youtube and search for lofi"
+        with mock.patch("backend.autonomous_executor.time.monotonic", lambda: clock[0]):
+            first = asyncio.ensure_future(executor.execute_goal(command, {}))
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(executor.execute_goal(command, {}))
+            first_outcome, second_outcome = await asyncio.gather(first, second)
+
+        # The first goal's ten seconds run out after its second action, even
+        # though the second goal started later on the same executor
+        self.assertEqual(first_outcome["status"], "timeout")
+        self.assertEqual(len(first_outcome["context"]["execution_history"]), 2)
+        self.assertEqual(second_outcome["status"], "timeout")
+        self.assertEqual(len(second_outcome["context"]["execution_history"]), 2)
+
+    async def test_actions_on_one_task_get_their_own_events(self):
+        executor = AutonomousExecutor()
+        with executor._dom_signal("t1") as first:
+            executor.notify_dom_ready("t1")
+            with executor._dom_signal("t1") as second:
+                self.assertTrue(first.is_set())
+                self.assertFalse(second.is_set())
+            self.assertEqual(executor._dom_waiters, {"t1": [first]})
+        self.assertEqual(executor._dom_waiters, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+"""Tests for the shared retry backoff."""
+import unittest
+from unittest import mock
+
+from backoff import backoff_delay
+
+
+class BackoffDelayTest(unittest.TestCase):
+    def test_doubles_from_the_base_delay(self):
+        self.assertEqual([backoff_delay(attempt, 0.5) for attempt in range(1, 5)], [0.5, 1.0, 2.0, 4.0])
+
+    def test_caps_at_max_delay(self):
+        self.assertEqual(backoff_delay(10, 0.5, max_delay=8.0), 8.0)
+
+    def test_jitter_adds_up_to_its_fraction_of_the_delay(self):
+        with mock.patch("random.uniform", side_effect=lambda low, high: high) as uniform:
+            self.assertEqual(backoff_delay(3, 1.0, max_delay=3.0, jitter=0.5), 4.5)
+        uniform.assert_called_once_with(0, 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
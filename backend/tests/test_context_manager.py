@@ -0,0 +1,76 @@
+"""Tests for saving and loading session contexts."""
+import json
+import os
+import tempfile
+import unittest
+
+from context_manager import ContextManager
+
+
+class LoadContextTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.manager = ContextManager(storage_path=self._tmp.name)
+
+    def tearDown(self):
+        self.manager._writer.shutdown(wait=True)
+        self._tmp.cleanup()
+
+    async def test_loads_do_not_share_nested_objects(self):
+        self.manager.create_session("s1")
+        self.manager.add_action({"action": "clickElement", "metadata": {"tag": "original"}})
+        self.manager.set_variable("query", {"text": "lofi"})
+        await self.manager.save_context("s1")
+
+        first = self.manager.load_context("s1")
+        first.previous_actions[0]["action"]["metadata"]["tag"] = "changed"
+        first.variables["query"]["text"] = "changed"
+
+        second = self.manager.load_context("s1")
+        self.assertIsNot(first, second)
+        self.assertEqual(second.previous_actions[0]["action"]["metadata"], {"tag": "original"})
+        self.assertEqual(second.variables["query"], {"text": "lofi"})
+
+    async def test_rewritten_file_is_reread(self):
+        self.manager.create_session("s1")
+        self.manager.set_variable("step", 1)
+        await self.manager.save_context("s1")
+        self.assertEqual(self.manager.load_context("s1").variables, {"step": 1})
+
+        self.manager.set_variable("step", 2)
+        await self.manager.save_context("s1")
+        self.assertEqual(self.manager.load_context("s1").variables, {"step": 2})
+
+    async def test_round_trip_keeps_tab_state(self):
+        self.manager.create_session("s1")
+        self.manager.update_tab_state("https://example.com", "Example", {"buttons": []})
+        saved = self.manager.get_current_context()
+        await self.manager.save_context("s1")
+
+        loaded = self.manager.load_context("s1")
+        self.assertEqual(loaded.current_tab.url, "https://example.com")
+        self.assertEqual(loaded.current_tab.dom_snapshot, {"buttons": []})
+        self.assertEqual(loaded.last_updated, saved.last_updated)
+
+    def test_legacy_empty_tab_loads_as_none(self):
+        path = os.path.join(self._tmp.name, "old.json")
+        with open(path, "w") as f:
+            json.dump({
+                "current_tab": {"url": None, "title": None, "dom_snapshot": None, "last_updated": None},
+                "previous_actions": [],
+                "variables": {},
+                "last_updated": "2024-01-01T00:00:00",
+            }, f)
+
+        context = self.manager.load_context("old")
+        self.assertIsNone(context.current_tab)
+        self.assertEqual(self.manager.current_session_id, "old")
+
+    def test_missing_file_creates_session(self):
+        context = self.manager.load_context("new")
+        self.assertIs(self.manager.get_current_context(), context)
+        self.assertEqual(context.previous_actions, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
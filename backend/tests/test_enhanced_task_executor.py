@@ -0,0 +1,59 @@
+"""Tests for the enhanced executor's debounced context saves."""
+import asyncio
+import unittest
+from unittest import mock
+
+from backend.enhanced_task_executor import EnhancedTaskExecutor, TaskStatus, context_manager
+
+
+class DebouncedSaveTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.executor = EnhancedTaskExecutor(save_debounce=0.01)
+        save_patch = mock.patch.object(context_manager, "save_context", new=mock.AsyncMock())
+        self.save_context = save_patch.start()
+        self.addCleanup(save_patch.stop)
+
+    async def test_saves_close_together_are_coalesced(self):
+        for _ in range(3):
+            self.executor._schedule_save("s1")
+        self.executor._schedule_save("s2")
+        await asyncio.sleep(0.05)
+
+        self.assertCountEqual(self.save_context.await_args_list, [mock.call("s1"), mock.call("s2")])
+        self.assertEqual(self.executor._pending_saves, {})
+
+    async def test_flush_replaces_the_pending_save(self):
+        self.executor._schedule_save("s1")
+        await self.executor._flush_save("s1")
+        await asyncio.sleep(0.05)
+
+        self.save_context.assert_awaited_once_with("s1")
+        self.assertEqual(self.executor._pending_saves, {})
+
+    async def test_a_task_saves_once_when_it_ends(self):
+        result = await self.executor.execute_command("debounce-test", "open youtube and search for lofi")
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(result.status, TaskStatus.COMPLETED)
+        self.assertGreater(result.total_steps, 1)
+        self.save_context.assert_awaited_once_with("debounce-test")
+        self.assertEqual(self.executor._pending_saves, {})
+
+
+class ExecuteCommandTest(unittest.IsolatedAsyncioTestCase):
+    async def test_repeated_commands_record_the_same_history(self):
+        executor = EnhancedTaskExecutor()
+        with mock.patch.object(context_manager, "save_context", new=mock.AsyncMock()), \
+                mock.patch.object(context_manager, "add_actions") as add_actions:
+            await executor.execute_command("repeat-test", "open youtube and search for lofi")
+            first_run = [len(call.args[0]) for call in add_actions.call_args_list]
+            add_actions.reset_mock()
+            await executor.execute_command("repeat-test", "open youtube and search for lofi")
+            second_run = [len(call.args[0]) for call in add_actions.call_args_list]
+
+        self.assertTrue(first_run)
+        self.assertEqual(first_run, second_run)
+
+
+if __name__ == "__main__":
+    unittest.main()
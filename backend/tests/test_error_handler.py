@@ -0,0 +1,39 @@
+"""Tests for the error handler's bounded history and summary counters."""
+import unittest
+from collections import Counter
+
+from error_handler import ErrorHandler, ErrorType, RecoveryStrategy
+
+CLICK = {"action": "clickElement", "selector": "#go"}
+
+
+class ErrorSummaryTest(unittest.TestCase):
+    def setUp(self):
+        self.handler = ErrorHandler(history_size=3)
+
+    def test_empty_summary(self):
+        self.assertEqual(self.handler.get_error_summary(), {"total_errors": 0})
+
+    def test_counts_follow_the_bounded_history(self):
+        for error, attempt in [("Timed out waiting", 0), ("Element not visible", 0),
+                               ("Timed out waiting", 0), ("Element not visible", 0),
+                               ("Timed out waiting", 5)]:
+            self.handler.generate_correction(CLICK, {"error": error}, attempt)
+
+        summary = self.handler.get_error_summary()
+        history = self.handler.error_history
+        self.assertEqual(summary["total_errors"], 3)
+        self.assertEqual(summary["error_types"], Counter(e["error_type"] for e in history))
+        self.assertEqual(summary["strategies_used"], Counter(e["strategy"] for e in history))
+        self.assertEqual(summary["error_types"], {ErrorType.TIMEOUT: 2, ErrorType.ELEMENT_NOT_VISIBLE: 1})
+        self.assertEqual(summary["strategies_used"], {
+            RecoveryStrategy.WAIT_AND_RETRY: 1,
+            RecoveryStrategy.SCROLL_AND_RETRY: 1,
+            RecoveryStrategy.REPLAN: 1
+        })
+        # The replanned error is the only unsuccessful recovery in the history
+        self.assertAlmostEqual(summary["success_rate"], 200 / 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
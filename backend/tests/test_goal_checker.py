@@ -0,0 +1,50 @@
+"""Tests for goal completion checks."""
+import unittest
+
+from goal_checker import GoalCompletionChecker
+from goal_engine import Goal, GoalType, Subgoal, TaskGraph
+
+GOAL = Goal(original_command="find laptop reviews", goal_statement="Find laptop reviews",
+            success_condition="reviews found", goal_type=GoalType.SEARCH)
+
+
+class GoalAlignmentTest(unittest.TestCase):
+    def setUp(self):
+        self.checker = GoalCompletionChecker()
+
+    def details(self, results):
+        return self.checker._validate_result_quality(GOAL, {"results": results})["details"]
+
+    def test_result_sharing_a_word_is_aligned(self):
+        self.assertIn("Good goal alignment", self.details(["Best LAPTOP of 2024", "weather"]))
+
+    def test_structured_results_are_matched_on_their_words(self):
+        self.assertIn("Good goal alignment", self.details([{"title": "reviews"}]))
+
+    def test_shared_letters_alone_are_not_aligned(self):
+        # The old check intersected words with characters, so any "a" matched
+        self.assertIn("Limited goal alignment", self.details(["a", "weather forecast"]))
+
+    def test_no_results_are_not_aligned(self):
+        self.assertIn("Limited goal alignment", self.details([]))
+
+
+class GoalCompletionTest(unittest.TestCase):
+    def setUp(self):
+        self.checker = GoalCompletionChecker()
+        self.graph = TaskGraph([Subgoal(id="search", description="Search for laptop reviews",
+                                        dependencies=[], success_criteria="results shown")])
+
+    def test_each_check_reflects_the_current_state(self):
+        first = self.checker.check_goal_completion(GOAL, self.graph, {})
+        self.assertFalse(first["completed"])
+
+        first["completed"] = True
+        self.graph.mark_completed("search")
+        second = self.checker.check_goal_completion(GOAL, self.graph, {})
+        self.assertIsNot(first, second)
+        self.assertEqual(second["progress"]["completed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Tests for TaskGraph ordering and scheduling."""
+import unittest
+
+from goal_engine import Subgoal, TaskGraph
+
+
+def subgoal(subgoal_id, *dependencies):
+    return Subgoal(id=subgoal_id, description=subgoal_id, dependencies=list(dependencies),
+                   success_criteria="done")
+
+
+class ExecutionOrderTest(unittest.TestCase):
+    def test_dependencies_come_first(self):
+        graph = TaskGraph([subgoal("compare", "a", "b"), subgoal("b", "open"), subgoal("a", "open"),
+                           subgoal("open")])
+
+        order = graph.execution_order
+        self.assertEqual(order[0], "open")
+        self.assertEqual(order[-1], "compare")
+        self.assertCountEqual(order, ["open", "a", "b", "compare"])
+
+    def test_repeated_dependencies_count_once(self):
+        graph = TaskGraph([subgoal("open"), subgoal("search", "open", "open")])
+        self.assertEqual(graph.execution_order, ["open", "search"])
+
+    def test_cycles_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            TaskGraph([subgoal("open"), subgoal("a", "open", "b"), subgoal("b", "a")])
+
+    def test_unknown_dependencies_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "unknown subgoals: \\['missing'\\]"):
+            TaskGraph([subgoal("open"), subgoal("search", "open", "missing")])
+
+
+class SchedulingTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = TaskGraph([subgoal("open"), subgoal("a", "open"), subgoal("b", "open"),
+                                subgoal("compare", "a", "b")])
+
+    def ready(self):
+        return [sg.id for sg in self.graph.get_ready_subgoals()]
+
+    def test_subgoals_become_ready_as_dependencies_complete(self):
+        self.assertEqual(self.ready(), ["open"])
+        self.graph.mark_completed("open")
+        self.assertEqual(sorted(self.ready()), ["a", "b"])
+        self.graph.mark_completed("b")
+        self.assertEqual(self.ready(), ["a"])
+        self.graph.mark_completed("a")
+        self.assertEqual(self.graph.get_next_subgoal().id, "compare")
+        self.graph.mark_completed("compare")
+
+        self.assertIsNone(self.graph.get_next_subgoal())
+        self.assertTrue(self.graph.is_complete())
+
+    def test_completing_twice_counts_once(self):
+        self.graph.mark_completed("open")
+        self.graph.mark_completed("open")
+        self.assertEqual(self.graph.completed, ["open"])
+        self.assertEqual(self.graph.get_progress()["completed"], 1)
+
+    def test_progress_counts_failures(self):
+        self.graph.mark_failed("open")
+        self.graph.mark_failed("open")
+        self.assertEqual(self.graph.get_progress()["failed"], 1)
+        self.graph.mark_completed("open")
+        progress = self.graph.get_progress()
+        self.assertEqual((progress["completed"], progress["failed"], progress["remaining"]), (1, 0, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+"""Tests for the autonomous planner's observation fingerprint and decision cache."""
+import unittest
+
+from llm_planner import AutonomousPlanner, observation_fingerprint
+
+OBSERVATION = {"text": "search", "inputs": [{"visible": True, "selector": "input#search"}],
+               "buttons": [], "links": []}
+
+
+class ObservationFingerprintTest(unittest.TestCase):
+    def test_ignores_key_order_and_volatile_fields(self):
+        reordered = dict(reversed(list(OBSERVATION.items())), timestamp=123, scrollPosition=4)
+        self.assertEqual(observation_fingerprint(reordered), observation_fingerprint(OBSERVATION))
+
+    def test_content_changes_the_fingerprint(self):
+        changed = {**OBSERVATION, "text": "results"}
+        self.assertNotEqual(observation_fingerprint(changed), observation_fingerprint(OBSERVATION))
+
+    def test_non_string_keys_and_values_are_accepted(self):
+        self.assertTrue(observation_fingerprint({"ids": {1: "a"}, "when": object()}))
+        self.assertEqual(observation_fingerprint({}), "")
+
+
+class DecisionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.planner = AutonomousPlanner()
+        self.planner.start_new_goal("search cats on youtube")
+
+    def test_returned_actions_do_not_share_state_with_the_cache(self):
+        first = self.planner.decide_next_step(OBSERVATION)
+        first[0].metadata["seen"] = True
+        first[0].text = "changed"
+
+        second = self.planner.decide_next_step(OBSERVATION)
+        self.assertEqual(second[0].metadata, {})
+        self.assertEqual(second[0].text, "search cats on youtube")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""End-to-end tests for the scroll and wait recoveries."""
+import unittest
+from unittest import mock
+
+from backend.action_schema import ANY_ACTION_ADAPTER, SequenceAction
+from backend.context_manager import CommandContext
+from backend.enhanced_task_executor import EnhancedTaskExecutor
+from backend.task_executor import TaskExecutor, TaskStatus
+from error_handler import ErrorHandler
+from retry_manager import RetryManager
+
+CLICK = {"action": "clickElement", "selector": "#go", "timeout": 1000}
+
+
+class FlakyBrowser:
+    """Fails the first attempts with the given errors, then runs actions on a TaskExecutor."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = []
+        self.executor = TaskExecutor(max_retries=1, retry_delay=0)
+
+    async def execute(self, action):
+        self.calls.append(action)
+        if self.errors:
+            return {"ok": False, "error": self.errors.pop(0)}
+        result = await self.executor.execute_task(f"task-{len(self.calls)}", [action])
+        return {"ok": result.status == TaskStatus.COMPLETED, "error": result.error, "task": result}
+
+
+@mock.patch("asyncio.sleep", new=mock.AsyncMock())
+class RecoveryTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.retry_manager = RetryManager(max_retries=3)
+        handler_patch = mock.patch("retry_manager.error_handler", ErrorHandler())
+        handler_patch.start()
+        self.addCleanup(handler_patch.stop)
+
+    async def test_scroll_recovery_runs_scroll_then_action(self):
+        browser = FlakyBrowser(["Element not visible"])
+        outcome = await self.retry_manager.execute_with_retry(dict(CLICK), browser.execute)
+
+        self.assertTrue(outcome["ok"], outcome)
+        self.assertEqual(outcome["attempts"], 2)
+        sequence = browser.calls[1]
+        self.assertEqual(sequence["action"], "sequence")
+        steps = outcome["result"]["task"].result["steps"][0]["result"]["steps"]
+        self.assertEqual([step["status"] for step in steps], ["success", "success"])
+        self.assertEqual(steps[0]["action"], "scroll_page")
+        self.assertEqual(steps[1]["element_clicked"], "#go")
+
+    async def test_wait_recovery_runs_wait_then_action(self):
+        browser = FlakyBrowser(["Timed out waiting for page"])
+        outcome = await self.retry_manager.execute_with_retry(dict(CLICK), browser.execute)
+
+        self.assertTrue(outcome["ok"], outcome)
+        steps = outcome["result"]["task"].result["steps"][0]["result"]["steps"]
+        self.assertEqual(steps[0], {"status": "success", "element_found": "#go"})
+        self.assertEqual(steps[1]["element_clicked"], "#go")
+
+    async def test_repeated_recoveries_retry_the_original_action(self):
+        browser = FlakyBrowser(["Element not visible", "Element not visible"])
+        outcome = await self.retry_manager.execute_with_retry(dict(CLICK), browser.execute)
+
+        self.assertTrue(outcome["ok"], outcome)
+        retried = [call["steps"][-1] for call in browser.calls[1:]]
+        self.assertEqual(retried, [{**CLICK, "timeout": 1500.0}] * 2)
+
+    async def test_wait_recovery_without_selector_waits_for_navigation(self):
+        browser = FlakyBrowser(["Timed out waiting for page"])
+        open_url = {"action": "openUrl", "url": "https://example.com"}
+        outcome = await self.retry_manager.execute_with_retry(dict(open_url), browser.execute)
+
+        self.assertTrue(outcome["ok"], outcome)
+        self.assertEqual(browser.calls[1]["steps"][0], {"action": "waitForNavigation", "timeout_ms": 2000})
+        steps = outcome["result"]["task"].result["steps"][0]["result"]["steps"]
+        self.assertEqual(steps[0]["action"], "wait_for_navigation")
+        self.assertEqual(steps[1]["url"], "https://example.com")
+
+
+@mock.patch("asyncio.sleep", new=mock.AsyncMock())
+class EnhancedSequenceTest(unittest.IsolatedAsyncioTestCase):
+    async def test_recoveries_run_on_enhanced_executor(self):
+        executor = EnhancedTaskExecutor()
+        handler = ErrorHandler()
+        for error in ("Element not visible", "Timed out"):
+            with self.subTest(error=error):
+                correction = handler.generate_correction(dict(CLICK), {"error": error}, 1)
+                sequence = ANY_ACTION_ADAPTER.validate_python(correction)
+                # Every step is a schema action
+                ANY_ACTION_ADAPTER.validate_python(correction["steps"][0])
+                self.assertIsInstance(sequence, SequenceAction)
+
+                result = await executor._handle_sequence(sequence, CommandContext())
+                self.assertEqual(len(result["steps"]), 2)
+                self.assertEqual(result["steps"][1]["element_clicked"], "#go")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Tests for the retry manager's bounded history and statistics counters."""
+import unittest
+from collections import Counter
+from unittest import mock
+
+from error_handler import ErrorHandler
+from retry_manager import RetryManager
+
+CLICK = {"action": "clickElement", "selector": "#go"}
+
+
+def executor(*results):
+    """Executor returning the given results in turn, repeating the last one."""
+    results = list(results)
+
+    async def execute(action):
+        return results.pop(0) if len(results) > 1 else results[0]
+    return execute
+
+
+@mock.patch("asyncio.sleep", new=mock.AsyncMock())
+class RetryStatisticsTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.retry_manager = RetryManager(max_retries=2, history_size=3)
+        handler_patch = mock.patch("retry_manager.error_handler", ErrorHandler())
+        handler_patch.start()
+        self.addCleanup(handler_patch.stop)
+
+    async def run_action(self, *results):
+        return await self.retry_manager.execute_with_retry(dict(CLICK), executor(*results))
+
+    async def test_statistics_follow_the_bounded_history(self):
+        await self.run_action({"ok": False, "error": "Network error"})
+        await self.run_action({"ok": True})
+        await self.run_action({"ok": False, "error": "Timed out waiting"})
+        await self.run_action({"ok": False, "error": "Timed out waiting"}, {"ok": True})
+        await self.run_action({"ok": False, "error": "Timed out waiting"})
+
+        stats = self.retry_manager.get_retry_statistics()
+        history = self.retry_manager.retry_history
+        failed_errors = Counter(r["result"]["error"] for r in history if not r["success"])
+        self.assertEqual(stats["total_retries"], 3)
+        self.assertEqual(stats["successful_retries"], sum(r["success"] for r in history))
+        self.assertEqual(stats["failed_retries"], 2)
+        self.assertEqual(stats["average_attempts"], sum(r["attempts"] for r in history) / 3)
+        self.assertEqual(stats["most_common_errors"], failed_errors.most_common(5))
+        self.assertEqual(stats["most_common_errors"], [("Timed out waiting", 2)])
+
+    async def test_reset_clears_the_statistics(self):
+        await self.run_action({"ok": False, "error": "Network error"})
+        self.retry_manager.reset_history()
+        self.assertEqual(self.retry_manager.get_retry_statistics(), {"total_retries": 0})
+
+        await self.run_action({"ok": True})
+        stats = self.retry_manager.get_retry_statistics()
+        self.assertEqual((stats["total_retries"], stats["successful_retries"]), (1, 1))
+        self.assertEqual(stats["most_common_errors"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
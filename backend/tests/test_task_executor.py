@@ -0,0 +1,72 @@
+"""Tests for TaskExecutor step scheduling."""
+import asyncio
+import unittest
+
+from backend.action_schema import ANY_ACTION_ADAPTER
+from backend.task_executor import TaskExecutor, TaskStatus, TaskStep, _partition_into_groups
+
+PARALLEL = {"parallelizable": True}
+
+
+class ParallelStepsTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.executor = TaskExecutor(max_retries=1, retry_delay=0)
+
+    def test_consecutive_parallelizable_steps_share_a_group(self):
+        actions = [
+            {"action": "openUrl", "url": "https://example.com"},
+            {"action": "clickElement", "selector": "#a", "metadata": PARALLEL},
+            {"action": "clickElement", "selector": "#b", "metadata": PARALLEL},
+            {"action": "keyPress", "key": "Enter"},
+            {"action": "clickElement", "selector": "#c", "metadata": PARALLEL},
+        ]
+        steps = [TaskStep(action=ANY_ACTION_ADAPTER.validate_python(action)) for action in actions]
+
+        self.assertEqual(_partition_into_groups(steps), [[0], [1, 2], [3], [4]])
+
+    async def test_parallel_steps_run_concurrently(self):
+        started = asyncio.Event()
+        both = asyncio.Event()
+
+        async def click(action):
+            # The first click only finishes once the second has started
+            if started.is_set():
+                both.set()
+            else:
+                started.set()
+                await both.wait()
+            return {"status": "success", "element_clicked": action.selector}
+
+        self.executor.register_handler("clickElement", click)
+        result = await asyncio.wait_for(self.executor.execute_task("t1", [
+            {"action": "clickElement", "selector": "#a", "metadata": PARALLEL},
+            {"action": "clickElement", "selector": "#b", "metadata": PARALLEL},
+        ]), timeout=1)
+
+        self.assertEqual(result.status, TaskStatus.COMPLETED)
+        self.assertEqual(result.steps_completed, 2)
+
+    async def test_cancelled_siblings_are_reported_failed(self):
+        async def click(action):
+            raise RuntimeError("Element not found")
+
+        async def wait(action):
+            await asyncio.Event().wait()
+
+        self.executor.register_handler("clickElement", click)
+        self.executor.register_handler("waitForElement", wait)
+        result = await asyncio.wait_for(self.executor.execute_task("t1", [
+            {"action": "waitForElement", "selector": "#slow", "metadata": PARALLEL},
+            {"action": "clickElement", "selector": "#a", "metadata": PARALLEL},
+        ]), timeout=1)
+
+        self.assertEqual(result.status, TaskStatus.FAILED)
+        self.assertEqual(result.error, "Step 2 failed: Element not found")
+        self.assertEqual(result.steps_completed, 0)
+        statuses = [step["status"] for step in result.result["steps"]]
+        self.assertEqual(statuses, [TaskStatus.FAILED, TaskStatus.FAILED])
+        self.assertEqual(result.result["steps"][0]["error"], "Cancelled after another step failed")
+
+
+if __name__ == "__main__":
+    unittest.main()